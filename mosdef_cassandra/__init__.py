@@ -1,10 +1,42 @@
-from .core.system import System
-from .core.moveset import MoveSet
+import importlib
 
-from .runners.runners import run
-from .runners.runners import restart
+__version__ = "0.3.2"
 
-from .writers.inp_functions import print_valid_kwargs
-from .writers.writers import print_inputfile
+# The public API is loaded lazily (PEP 562) so that ``import
+# mosdef_cassandra`` does not pull in mbuild, gmso, parmed, etc.
+# until System, MoveSet, run, or the writers are actually used.
+_lazy_attributes = {
+    "System": "mosdef_cassandra.core.system",
+    "MoveSet": "mosdef_cassandra.core.moveset",
+    "pack_box": "mosdef_cassandra.core.packing",
+    "run": "mosdef_cassandra.runners.runners",
+    "restart": "mosdef_cassandra.runners.runners",
+    "print_valid_kwargs": "mosdef_cassandra.writers.inp_functions",
+    "print_inputfile": "mosdef_cassandra.writers.writers",
+}
 
-__version__ = "0.3.2"
+_lazy_submodules = [
+    "analysis",
+    "core",
+    "examples",
+    "runners",
+    "utils",
+    "writers",
+]
+
+__all__ = list(_lazy_attributes)
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        module = importlib.import_module(_lazy_attributes[name])
+        attribute = getattr(module, name)
+        globals()[name] = attribute
+        return attribute
+    if name in _lazy_submodules:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_attributes) + _lazy_submodules)
@@ -1 +1,2 @@
 from .thermo import ThermoProps
+from .moves import read_checkpoint_move_sizes, read_move_stats
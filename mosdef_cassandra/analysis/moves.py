@@ -0,0 +1,202 @@
+import re
+
+import numpy as np
+
+# Heading of the summary that Cassandra writes at the end of a run;
+# the input file echoed at the start of the log comes before it
+_SUMMARY_HEADING = "writing information about the simulation"
+
+# Headings of each move type in the summary
+_MOVE_HEADINGS = {
+    "translation": "translate",
+    "rotation": "rotate",
+    "regrowth": "regrow",
+    "volume": "volume",
+    "insertion": "insert",
+    "deletion": "delete",
+    "swap": "swap",
+    "angle": "angle",
+    "dihedral": "dihedral",
+}
+
+# Labels of the move counts under each heading
+_COUNT_LABELS = {
+    "no. of trials": "attempted",
+    "no. of successful trials": "accepted",
+}
+
+_INTEGER = re.compile(r"[-+]?\d+")
+_FLOAT = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eEdD][-+]?\d+)?")
+
+
+def read_move_stats(filename):
+    """Read the number of attempted and accepted moves from a log file
+
+    Cassandra writes the number of trials and successes of each move
+    type, per species and box, in the summary at the end of its
+    ``.out.log`` file. Only that summary is read. The counts are
+    summed over species and boxes.
+
+    Parameters
+    ----------
+    filename : str
+        path to the Cassandra ``.out.log`` file
+
+    Returns
+    -------
+    move_stats : dict
+        one entry per move type found in the log (e.g., "translate",
+        "rotate", "regrow", "volume", "insert", "delete", "swap"), each
+        a dict with the number of "attempted" and "accepted" moves
+    """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    start = None
+    for iline, line in enumerate(lines):
+        if _SUMMARY_HEADING in line.lower():
+            start = iline
+    if start is None:
+        raise ValueError(
+            "No move statistics found in {}. Cassandra writes them at "
+            "the end of a finished run".format(filename)
+        )
+
+    move_stats = {}
+    current_move = None
+    for line in lines[start + 1 :]:
+        label = line.strip().lower()
+        if label in _MOVE_HEADINGS:
+            current_move = _MOVE_HEADINGS[label]
+            continue
+        if current_move is None:
+            continue
+        tokens = label.rsplit(maxsplit=1)
+        if len(tokens) != 2 or tokens[0] not in _COUNT_LABELS:
+            continue
+        if not _INTEGER.fullmatch(tokens[1]):
+            continue
+        stats = move_stats.setdefault(
+            current_move, {"attempted": 0, "accepted": 0}
+        )
+        stats[_COUNT_LABELS[tokens[0]]] += int(tokens[1])
+
+    return move_stats
+
+
+def acceptance_ratio(move_stats, move):
+    """Fraction of the attempted moves of one type that were accepted
+
+    Returns None if no moves of this type were attempted.
+    """
+    stats = move_stats.get(move)
+    if stats is None or stats["attempted"] == 0:
+        return None
+    return stats["accepted"] / stats["attempted"]
+
+
+def read_checkpoint_move_sizes(filename, n_species, n_boxes):
+    """Read the adapted maximum move sizes from a checkpoint file
+
+    During equilibration Cassandra adjusts the maximum translation,
+    rotation, and volume change toward the target acceptance ratio and
+    writes the current values to its ``.out.chk`` file. The file starts
+    with one block per species and box: a line with the species and
+    box indices, then a translation and a rotation line, each with the
+    number of trials, successes and equilibration successes followed
+    by the maximum displacement. The box section has, for each box, the
+    number of trials, volume, box shape, box matrix, a blank line, and
+    a volume line ending with the maximum volume change. Cassandra
+    writes the maximum rotation in radians; it is returned in degrees.
+
+    Parameters
+    ----------
+    filename : str
+        path to the Cassandra ``.out.chk`` file
+    n_species : int
+        number of species in the simulation
+    n_boxes : int
+        number of boxes in the simulation
+
+    Returns
+    -------
+    move_sizes : dict
+        "max_translate" in Angstrom and "max_rotate" in degrees, each
+        a numpy array with shape (n_boxes, n_species), and
+        "max_volume" in Angstrom^3, a numpy array with shape
+        (n_boxes,)
+    """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    max_translate = np.full((n_boxes, n_species), np.nan)
+    max_rotate = np.full((n_boxes, n_species), np.nan)
+    section = _checkpoint_section(lines, "translation,rotation", filename)
+    for iline, line in enumerate(section[:-2]):
+        tokens = line.split()
+        if len(tokens) != 2 or not all(
+            _INTEGER.fullmatch(token) for token in tokens
+        ):
+            continue
+        ispec, ibox = (int(token) - 1 for token in tokens)
+        if 0 <= ispec < n_species and 0 <= ibox < n_boxes:
+            max_translate[ibox, ispec] = _last_float(section[iline + 1])
+            max_rotate[ibox, ispec] = np.degrees(
+                _last_float(section[iline + 2])
+            )
+    if np.any(np.isnan(max_translate)) or np.any(np.isnan(max_rotate)):
+        raise ValueError(
+            "Unable to read the maximum translation and rotation of every "
+            "species in every box from {}".format(filename)
+        )
+
+    # The volume line of each box is the only one with three counts
+    # followed by a value
+    max_volume = []
+    for line in _checkpoint_section(lines, "box info", filename):
+        tokens = line.split()
+        if len(tokens) == 4 and all(
+            _INTEGER.fullmatch(token) for token in tokens[:3]
+        ):
+            max_volume.append(_last_float(line))
+    if len(max_volume) != n_boxes:
+        raise ValueError(
+            "Unable to read the maximum volume change of every box "
+            "from {}".format(filename)
+        )
+    max_volume = np.array(max_volume)
+
+    return {
+        "max_translate": max_translate,
+        "max_rotate": max_rotate,
+        "max_volume": max_volume,
+    }
+
+
+def _checkpoint_section(lines, heading, filename):
+    """Lines between a checkpoint section heading and the next one"""
+    start = None
+    for iline, line in enumerate(lines):
+        is_heading = line.strip().startswith("*")
+        if start is None and is_heading and heading in line.lower():
+            start = iline + 1
+        elif start is not None and is_heading:
+            return lines[start:iline]
+    if start is None:
+        raise ValueError(
+            "{} is not a Cassandra checkpoint file; it has no {} "
+            "section".format(filename, heading)
+        )
+    return lines[start:]
+
+
+def _last_float(line):
+    values = [
+        token
+        for token in line.replace("=", " ").replace(":", " ").split()
+        if _FLOAT.fullmatch(token)
+    ]
+    if len(values) == 0:
+        return np.nan
+    value = values[-1].lower().replace("d", "e")
+    return float(value)
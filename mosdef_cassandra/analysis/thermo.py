@@ -1,6 +1,14 @@
 import os
 import numpy as np
-import unyt as u
+
+# unyt is optional so that the analysis tools can be used in
+# environments with only NumPy installed
+try:
+    import unyt as u
+
+    has_unyt = True
+except ModuleNotFoundError:
+    has_unyt = False
 
 
 class ThermoProps:
@@ -45,27 +53,9 @@ class ThermoProps:
         assert prp_data.shape[1] == len(column_names)
         assert prp_data.shape[1] == len(column_units)
 
-        # Unyt mapping
-
-        units_to_unyts = {
-            "(kJ/mol)-Ext": u.Unit("kJ/mol"),
-            "(bar)": u.bar,
-            "": u.dimensionless,
-            "(A^3)": u.angstrom**3,
-            "(kg/m^3)": u.Unit("kg/m**3"),
-            "(molec/A^3)": u.Unit("count/angstrom**3"),
-        }
-
         self._properties = column_names
-        unyts = []
-        for unit in column_units:
-            try:
-                unyts.append(units_to_unyts[unit])
-            except KeyError:
-                unyts.append(u.dimensionless)
-
         self._units = column_units
-        self._unyts = unyts
+        self._unyts = None
         self._data = prp_data
 
     def print_props(self):
@@ -84,11 +74,15 @@ class ThermoProps:
             the starting step/sweep/etc.
         end : int
             the ending step/sweep/etc.
+        units : bool, optional, default=True
+            return a unyt_array with units attached. If False, return
+            a numpy.ndarray in the units written by Cassandra. Requires
+            the unyt package if True.
 
         Returns
         -------
-        unyt_array
-            the property with units
+        unyt_array or numpy.ndarray
+            the property (with units if ``units=True``)
         """
         if prp_name not in self._properties:
             raise ValueError(
@@ -107,7 +101,11 @@ class ThermoProps:
         else:
             end_idx = None
 
-        return self._data[start_idx:end_idx, col_idx] * self._unyts[col_idx]
+        values = self._data[start_idx:end_idx, col_idx]
+        if not units:
+            return values
+
+        return values * self.unyts[col_idx]
 
     def to_df(self):
         """Convert ThermoProps to a pandas.DataFrame"""
@@ -126,6 +124,20 @@ class ThermoProps:
 
         return pd.DataFrame(self._data, columns=multi_index)
 
+    @property
+    def unyts(self):
+        """The unyt units of each property"""
+        if not has_unyt:
+            raise ModuleNotFoundError(
+                "The unyt package is required to return properties with "
+                "units. Use prop(..., units=False) to return a "
+                "numpy.ndarray instead. unyt can be installed with "
+                "'conda install -c conda-forge unyt'"
+            )
+        if self._unyts is None:
+            self._unyts = [_get_unyt(unit) for unit in self._units]
+        return self._unyts
+
     @property
     def filename(self):
         return self._filename
@@ -138,3 +150,19 @@ class ThermoProps:
             raise FileNotFoundError(
                 "File {} could not be found".format(filename)
             )
+
+
+def _get_unyt(unit):
+    """Convert a unit string from the .prp header to a unyt Unit"""
+    units_to_unyts = {
+        "(kJ/mol)-Ext": u.Unit("kJ/mol"),
+        "(bar)": u.bar,
+        "": u.dimensionless,
+        "(A^3)": u.angstrom**3,
+        "(kg/m^3)": u.Unit("kg/m**3"),
+        "(molec/A^3)": u.Unit("count/angstrom**3"),
+    }
+    try:
+        return units_to_unyts[unit]
+    except KeyError:
+        return u.dimensionless
@@ -0,0 +1,315 @@
+import numpy as np
+import mbuild
+import unyt as u
+
+
+class BoxSnapshot(object):
+    def __init__(self, xyz, names=None, vectors=None, occupied=None):
+        """An immutable, array-backed snapshot of a simulation box
+
+        The coordinates, particle names, and box matrix are stored as
+        read-only NumPy arrays. Copies of a snapshot share these arrays;
+        assigning new coordinates replaces the array held by one
+        snapshot without touching any other. This protects the System
+        from outside modification without duplicating large boxes.
+
+        Parameters
+        ----------
+        xyz : array-like, shape=(n_particles, 3)
+            particle coordinates in nm
+        names : array-like, shape=(n_particles,), optional
+            particle names, as written to the .xyz file. If not
+            provided, the System fills in the species atom names.
+        vectors : array-like, shape=(3, 3), optional
+            box matrix in nm, one box vector per row
+        occupied : boolean, optional
+            whether the box holds a starting configuration. Defaults
+            to True if the box contains any particles.
+
+        Returns
+        -------
+        BoxSnapshot
+        """
+        xyz = np.array(xyz, dtype=float).reshape(-1, 3)
+        if names is not None:
+            names = _read_only(_check_names(names, xyz.shape[0]))
+        if vectors is not None:
+            vectors = _read_only(np.array(vectors, dtype=float).reshape(3, 3))
+        if occupied is None:
+            occupied = xyz.shape[0] > 0
+
+        self._xyz = _read_only(xyz)
+        self._names = names
+        self._vectors = vectors
+        self._occupied = bool(occupied)
+
+    @classmethod
+    def from_mbuild(cls, box):
+        """Create a snapshot of an mbuild.Compound or mbuild.Box
+
+        Parameters
+        ----------
+        box : mbuild.Compound or mbuild.Box
+            an occupied (Compound) or empty (Box) simulation box
+
+        Returns
+        -------
+        BoxSnapshot
+        """
+        if isinstance(box, mbuild.Compound):
+            names = [particle.name for particle in box.particles()]
+            if box.box is None:
+                vectors = None
+            else:
+                vectors = box.box.vectors
+            return cls(box.xyz, names, vectors, occupied=True)
+        elif isinstance(box, mbuild.Box):
+            return cls(np.zeros((0, 3)), [], box.vectors, occupied=False)
+        else:
+            raise TypeError("box must be an mbuild.Compound or mbuild.Box")
+
+    @classmethod
+    def from_array(cls, xyz, box, names=None):
+        """Create a snapshot from raw coordinates and a box
+
+        Parameters
+        ----------
+        xyz : np.ndarray or unyt_array, shape=(n_particles, 3)
+            particle coordinates; plain arrays are in nm
+        box : np.ndarray or unyt_array, shape=(3, 3) or (3,)
+            box matrix with one box vector per row, or the three
+            box lengths of an orthogonal box; plain arrays are in nm
+        names : array-like, shape=(n_particles,), optional
+            particle names
+
+        Returns
+        -------
+        BoxSnapshot
+        """
+        xyz = _to_nm(xyz)
+        if xyz.ndim != 2 or xyz.shape[1] != 3:
+            raise ValueError("xyz must have shape (n_particles, 3)")
+        box = _to_nm(box)
+        if box.shape == (3,):
+            box = np.diag(box)
+        elif box.shape != (3, 3):
+            raise ValueError(
+                "box must be a (3, 3) box matrix or three box lengths"
+            )
+        return cls(xyz, names, box)
+
+    @classmethod
+    def from_cassandra(cls, xyz_file, h_file, frame=-1):
+        """Create a snapshot from a frame of a Cassandra trajectory
+
+        Parameters
+        ----------
+        xyz_file : str
+            Cassandra coordinate file (e.g., ``nvt.out.xyz``)
+        h_file : str
+            Cassandra box file (e.g., ``nvt.out.H``)
+        frame : int, optional, default=-1
+            index of the frame to read; the last frame by default
+
+        Returns
+        -------
+        BoxSnapshot
+        """
+        xyz, names, n_frames = _read_xyz_frame(xyz_file, frame)
+        vectors, n_h_frames = _read_h_frame(h_file, frame)
+        if n_frames != n_h_frames:
+            raise ValueError(
+                "{} contains {} frames but {} contains {} frames".format(
+                    xyz_file, n_frames, h_file, n_h_frames
+                )
+            )
+        # Cassandra writes coordinates and box vectors in Angstrom
+        return cls(xyz / 10.0, names, vectors / 10.0)
+
+    @property
+    def xyz(self):
+        """Read-only particle coordinates in nm"""
+        return self._xyz
+
+    @xyz.setter
+    def xyz(self, xyz):
+        xyz = np.array(xyz, dtype=float)
+        if xyz.shape != self._xyz.shape:
+            raise ValueError("xyz must have shape {}".format(self._xyz.shape))
+        self._xyz = _read_only(xyz)
+
+    @property
+    def names(self):
+        """Read-only particle names, or None if unknown"""
+        return self._names
+
+    def with_names(self, names):
+        """Return a copy of the snapshot with the given particle names"""
+        snapshot = self.copy()
+        snapshot._names = _read_only(_check_names(names, self.n_particles))
+        return snapshot
+
+    @property
+    def n_particles(self):
+        return self._xyz.shape[0]
+
+    @property
+    def occupied(self):
+        """Whether the box holds a starting configuration"""
+        return self._occupied
+
+    @property
+    def vectors(self):
+        """Read-only box matrix in nm, or None if unknown"""
+        return self._vectors
+
+    @property
+    def lengths(self):
+        """Box lengths in nm"""
+        if self._vectors is None:
+            return None
+        return np.linalg.norm(self._vectors, axis=1)
+
+    @property
+    def angles(self):
+        """Box angles (alpha, beta, gamma) in degrees"""
+        if self._vectors is None:
+            return None
+        a_vec, b_vec, c_vec = self._vectors
+        lengths = self.lengths
+        alpha = np.dot(b_vec, c_vec) / (lengths[1] * lengths[2])
+        beta = np.dot(a_vec, c_vec) / (lengths[0] * lengths[2])
+        gamma = np.dot(a_vec, b_vec) / (lengths[0] * lengths[1])
+        return np.rad2deg(np.arccos(np.clip([alpha, beta, gamma], -1, 1)))
+
+    def copy(self):
+        """Return a copy that shares the underlying (read-only) arrays"""
+        snapshot = self.__class__.__new__(self.__class__)
+        snapshot.__dict__.update(self.__dict__)
+        return snapshot
+
+    def save(self, filename):
+        """Write the configuration to an .xyz file (coordinates in A)"""
+        if self._names is None:
+            raise ValueError(
+                "Particle names are required to write an .xyz file"
+            )
+        with open(filename, "w") as xyz_file:
+            xyz_file.write(str(self.n_particles))
+            xyz_file.write(
+                "\n" + filename + " - created by mosdef_cassandra\n"
+            )
+            for name, coords in zip(self._names, self._xyz * 10.0):
+                xyz_file.write(
+                    "{:s} {:11.6f} {:11.6f} {:11.6f}\n".format(name, *coords)
+                )
+
+    def to_mbuild(self):
+        """Build a new mbuild.Compound (occupied) or mbuild.Box (empty)"""
+        box = None
+        if self._vectors is not None:
+            box = mbuild.Box(lengths=self.lengths, angles=self.angles)
+        if not self._occupied:
+            return box
+        names = self._names
+        if names is None:
+            names = ["X"] * self.n_particles
+        compound = mbuild.Compound()
+        for name, pos in zip(names, self._xyz):
+            compound.add(mbuild.Compound(name=str(name), pos=pos))
+        compound.box = box
+        return compound
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def _check_names(names, n_particles):
+    names = np.array(names, dtype=str).reshape(-1)
+    if names.shape[0] != n_particles:
+        raise ValueError(
+            "The number of particle names ({}) does not match "
+            "the number of coordinates ({})".format(
+                names.shape[0], n_particles
+            )
+        )
+    return names
+
+
+def _to_nm(array):
+    if isinstance(array, u.unyt_array):
+        return np.array(array.to_value("nm"), dtype=float)
+    return np.array(array, dtype=float)
+
+
+def _read_xyz_frame(filename, frame):
+    """Read one frame of a (multi-frame) .xyz file
+
+    Returns the coordinates, the particle names and the number of
+    frames in the file.
+    """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    frames = []
+    line_idx = 0
+    while line_idx < len(lines):
+        if len(lines[line_idx].strip()) == 0:
+            line_idx += 1
+            continue
+        n_atoms = int(lines[line_idx].split()[0])
+        frames.append((line_idx + 2, n_atoms))
+        line_idx += n_atoms + 2
+    try:
+        start, n_atoms = frames[frame]
+    except IndexError:
+        raise ValueError(
+            "Frame {} not found in {} ({} frames)".format(
+                frame, filename, len(frames)
+            )
+        )
+
+    tokens = [line.split() for line in lines[start : start + n_atoms]]
+    if len(tokens) != n_atoms or any(len(t) < 4 for t in tokens):
+        raise ValueError(
+            "Frame {} of {} is incomplete".format(frame, filename)
+        )
+    names = [t[0] for t in tokens]
+    xyz = np.array([t[1:4] for t in tokens], dtype=float)
+
+    return xyz, names, len(frames)
+
+
+def _read_h_frame(filename, frame):
+    """Read the box matrix of one frame of a Cassandra .H file
+
+    Each frame holds the box volume, the 3x3 cell matrix with the box
+    vectors as columns, the number of species, and one (species,
+    number of molecules) pair per species. Returns the box matrix with
+    one box vector per row and the number of frames in the file.
+    """
+    with open(filename) as f:
+        tokens = f.read().split()
+
+    frames = []
+    idx = 0
+    try:
+        while idx < len(tokens):
+            cell_matrix = np.array(tokens[idx + 1 : idx + 10], dtype=float)
+            n_species = int(tokens[idx + 10])
+            frames.append(cell_matrix.reshape(3, 3).T)
+            idx += 11 + 2 * n_species
+    except (IndexError, ValueError):
+        raise ValueError("Unable to parse the box file {}".format(filename))
+    try:
+        vectors = frames[frame]
+    except IndexError:
+        raise ValueError(
+            "Frame {} not found in {} ({} frames)".format(
+                frame, filename, len(frames)
+            )
+        )
+
+    return vectors, len(frames)
@@ -1,8 +1,15 @@
 from copy import deepcopy
 from unyt import dimensions
-from mosdef_cassandra.utils.units import validate_unit, validate_unit_list
-from gmso.external.convert_parmed import to_parmed
+from mosdef_cassandra.analysis.moves import read_checkpoint_move_sizes
+from mosdef_cassandra.utils.cache import (
+    get_move_sizes,
+    move_size_key,
+    species_fingerprint,
+    store_move_sizes,
+)
+from mosdef_cassandra.utils.units import validate_unit, validate_unit_values
 import gmso
+import numpy as np
 import parmed
 import warnings
 import unyt as u
@@ -161,14 +168,20 @@ class MoveSet(object):
         # Here we handle species-wise exceptions
         for ispec, species in enumerate(species_topologies):
 
+            # Only the number of atoms and bonds are needed, so
+            # GMSO topologies are not converted to parmed
             if isinstance(species, gmso.Topology):
-                species = to_parmed(species)
+                n_atoms = species.n_sites
+                n_bonds = species.n_bonds
+            else:
+                n_atoms = len(species.atoms)
+                n_bonds = len(species.bonds)
 
-            if len(species.atoms) == 1:
+            if n_atoms == 1:
                 for ibox in range(self._n_boxes):
                     self.max_rotate[ibox][ispec] = 0.0 * u.degree
                 self.prob_regrow_species[ispec] = 0.0
-            elif len(species.bonds) == 0:
+            elif n_bonds == 0:
                 print(
                     "Treating {} as a non-insertable rigid species "
                     "since it has no bonds".format(species)
@@ -311,6 +324,106 @@ class MoveSet(object):
         self._restricted_type = restricted_type
         self._restricted_value = restricted_value
 
+    def cache_move_sizes(
+        self, species_topologies, temperature, pressure=None, checkpoint=None
+    ):
+        """Store the maximum move sizes for reuse by later MoveSets
+
+        The maximum translation, rotation, and volume change are stored
+        for this set of species and ensemble at the given state point.
+        Use ``checkpoint`` to store the sizes that Cassandra adapted
+        during an equilibration run. The cache is kept on disk if a
+        cache directory is set with
+        ``mosdef_cassandra.utils.cache.set_cache_dir``.
+
+        Parameters
+        ----------
+        species_topologies : list
+            the species used to create the MoveSet
+        temperature : unyt_quantity
+            temperature of the simulation
+        pressure : unyt_quantity, optional
+            pressure of the simulation
+        checkpoint : str, optional
+            path to the ``.out.chk`` file of a finished run. If given,
+            the move sizes are read from the checkpoint instead of
+            the MoveSet.
+        """
+        key = self._move_size_key(species_topologies)
+        temperature, pressure = _validate_state_point(temperature, pressure)
+        max_translate = self.max_translate.to_value("angstrom")
+        max_rotate = self.max_rotate.to_value("degree")
+        max_volume = self.max_volume.to_value("angstrom**3")
+        if checkpoint is not None:
+            move_sizes = read_checkpoint_move_sizes(
+                checkpoint, self._n_species, self._n_boxes
+            )
+            max_translate = move_sizes["max_translate"]
+            max_rotate = move_sizes["max_rotate"]
+            if np.any(max_volume > 0.0):
+                max_volume = move_sizes["max_volume"][: len(max_volume)]
+        store_move_sizes(
+            key,
+            temperature,
+            max_translate,
+            max_rotate,
+            max_volume,
+            pressure=pressure,
+        )
+
+    def seed_move_sizes(self, species_topologies, temperature, pressure=None):
+        """Set the maximum move sizes from the nearest cached state point
+
+        Looks up the move sizes stored with ``cache_move_sizes`` for
+        the same species and ensemble and uses those from the closest
+        temperature (and pressure). Equilibration then starts from move
+        sizes that are already close to the target acceptance ratio.
+
+        Parameters
+        ----------
+        species_topologies : list
+            the species used to create the MoveSet
+        temperature : unyt_quantity
+            temperature of the simulation
+        pressure : unyt_quantity, optional
+            pressure of the simulation
+
+        Returns
+        -------
+        bool
+            whether cached move sizes were found and applied
+        """
+        key = self._move_size_key(species_topologies)
+        temperature, pressure = _validate_state_point(temperature, pressure)
+        entry = get_move_sizes(key, temperature, pressure=pressure)
+        if entry is None:
+            return False
+        self.max_translate = np.array(entry["max_translate"]) * u.angstrom
+        self.max_rotate = np.array(entry["max_rotate"]) * u.degree
+        if len(entry["max_volume"]) == len(self.max_volume):
+            self.max_volume = np.array(entry["max_volume"]) * u.angstrom**3
+        return True
+
+    def _move_size_key(self, species_topologies):
+        if (
+            not isinstance(species_topologies, list)
+            or len(species_topologies) != self._n_species
+        ):
+            raise TypeError(
+                "species_topologies must be a list with one element "
+                "for each species in the MoveSet"
+            )
+        fingerprints = []
+        for species in species_topologies:
+            if isinstance(species, gmso.Topology):
+                from mosdef_cassandra.core.system import _convert_gmso
+
+                species = _convert_gmso(species)
+            fingerprints.append(
+                species_fingerprint(species, coordinates=False)
+            )
+        return move_size_key(fingerprints, self.ensemble)
+
     @property
     def ensemble(self):
         return self._ensemble
@@ -473,18 +586,16 @@ class MoveSet(object):
 
     @max_translate.setter
     def max_translate(self, max_translate):
-        max_translate = validate_unit_list(
+        max_translate = validate_unit_values(
             max_translate,
             (self._n_boxes, self._n_species),
             dimensions.length,
+            "angstrom",
             "max_translate",
         )
-        for max_val in max_translate.flatten():
-            if max_val.to_value() < 0.0:
-                raise ValueError(
-                    "Max translation values cannot be less than zero"
-                )
-        self._max_translate = max_translate
+        if np.any(max_translate < 0.0):
+            raise ValueError("Max translation values cannot be less than zero")
+        self._max_translate = u.unyt_array(max_translate, "angstrom")
 
     @property
     def max_rotate(self):
@@ -492,21 +603,18 @@ class MoveSet(object):
 
     @max_rotate.setter
     def max_rotate(self, max_rotate):
-        max_rotate = validate_unit_list(
+        max_rotate = validate_unit_values(
             max_rotate,
             (self._n_boxes, self._n_species),
             dimensions.angle,
+            "degree",
             "max_rotate",
         )
-        for max_val in max_rotate.flatten():
-            if (
-                max_val.to_value("degree") < 0.0
-                or max_val.to_value("degree") > 360.0
-            ):
-                raise ValueError(
-                    "Max rotation values must be between 0.0 and 360.0 degrees."
-                )
-        self._max_rotate = max_rotate
+        if np.any(max_rotate < 0.0) or np.any(max_rotate > 360.0):
+            raise ValueError(
+                "Max rotation values must be between 0.0 and 360.0 degrees."
+            )
+        self._max_rotate = u.unyt_array(max_rotate, "degree")
 
     @property
     def max_dihedral(self):
@@ -514,21 +622,18 @@ class MoveSet(object):
 
     @max_dihedral.setter
     def max_dihedral(self, max_dihedral):
-        max_dihedral = validate_unit_list(
+        max_dihedral = validate_unit_values(
             max_dihedral,
             (self._n_species,),
             dimensions.angle,
+            "degree",
             "max_dihedral",
         )
-        for max_val in max_dihedral:
-            if (
-                max_val.to_value("degree") < 0.0
-                or max_val.to_value("degree") > 360.0
-            ):
-                raise ValueError(
-                    "Max dihedral rotation values must be between 0.0 and 360.0 degrees."
-                )
-        self._max_dihedral = max_dihedral
+        if np.any(max_dihedral < 0.0) or np.any(max_dihedral > 360.0):
+            raise ValueError(
+                "Max dihedral rotation values must be between 0.0 and 360.0 degrees."
+            )
+        self._max_dihedral = u.unyt_array(max_dihedral, "degree")
 
     @property
     def prob_swap_from_box(self):
@@ -571,16 +676,16 @@ class MoveSet(object):
         else:
             shape = (1,)
 
-        max_volume = validate_unit_list(
+        max_volume = validate_unit_values(
             max_volume,
             shape,
             dimensions.length**3,
+            "angstrom**3",
             "max_volume",
         )
-        for max_vol in max_volume.flatten():
-            if max_vol < 0.0:
-                raise ValueError("max_volume cannot be less than zero.")
-        self._max_volume = max_volume
+        if np.any(max_volume < 0.0):
+            raise ValueError("max_volume cannot be less than zero.")
+        self._max_volume = u.unyt_array(max_volume, "angstrom**3")
 
     @property
     def insertable(self):
@@ -683,18 +788,18 @@ class MoveSet(object):
     def cbmc_rcut(self, cbmc_rcut):
         if type(cbmc_rcut) not in (list, u.unyt_array):
             cbmc_rcut = [cbmc_rcut] * self._n_boxes
-        cbmc_rcut = validate_unit_list(
+        cbmc_rcut = validate_unit_values(
             cbmc_rcut,
             (self._n_boxes,),
             dimensions.length,
+            "angstrom",
             "cbmc_rcut",
         )
 
-        for rcut in cbmc_rcut.flatten():
-            if rcut.to_value() < 0.0:
-                raise ValueError("cbmc_rcut cannot be less than zero.")
+        if np.any(cbmc_rcut < 0.0):
+            raise ValueError("cbmc_rcut cannot be less than zero.")
 
-        self._cbmc_rcut = cbmc_rcut
+        self._cbmc_rcut = u.unyt_array(cbmc_rcut, "angstrom")
 
     def print(self):
         """Print the current contents of the MoveSet"""
@@ -840,6 +945,20 @@ CBMC selections:
         return probability
 
 
+def _validate_state_point(temperature, pressure):
+    """Temperature in K and pressure in bar (or None) as floats"""
+    temperature = validate_unit(
+        temperature, dimensions.temperature, argument_name="temperature"
+    ).to_value("K")
+    if temperature <= 0.0:
+        raise ValueError("temperature must be greater than zero")
+    if pressure is not None:
+        pressure = validate_unit(
+            pressure, dimensions.pressure, argument_name="pressure"
+        ).to_value("bar")
+    return float(temperature), pressure
+
+
 def _check_restriction_type(restriction_type, restriction_value):
     valid_restrict_types = ["sphere", "cylinder", "slitpore", "interface"]
     # Check restriction insertion type
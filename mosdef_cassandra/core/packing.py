@@ -0,0 +1,323 @@
+import numpy as np
+import gmso
+import mbuild
+import parmed
+import unyt as u
+
+from mosdef_cassandra.core.box import BoxSnapshot, _to_nm
+from mosdef_cassandra.core.system import _convert_gmso
+from mosdef_cassandra.utils.cache import get_species, species_fingerprint
+from mosdef_cassandra.utils.neighbors import (
+    find_close_pairs,
+    perpendicular_widths,
+)
+from mosdef_cassandra.utils.units import validate_unit
+
+
+def pack_box(
+    species_topologies,
+    mols_to_pack,
+    box,
+    min_distance=2.0 * u.angstrom,
+    method="lattice",
+    seed=None,
+    max_rounds=1000,
+):
+    """Fill a simulation box with copies of each species
+
+    Each molecule is a rigid copy of its species geometry, placed with
+    a random orientation. With ``method="lattice"`` the molecules start
+    on a jittered lattice that spans the box; with ``method="random"``
+    they start at random positions. Molecules with an atom closer than
+    ``min_distance`` to an atom of another molecule are then given new
+    orientations at their lattice site or new random positions, all at
+    once, until none overlap. Each round uses a cell list, so its cost
+    scales linearly with the number of atoms. This is much faster than
+    inserting molecules one at a time, and avoids relying on
+    Cassandra's insertions to reach liquid densities.
+
+    The constrained geometry of a species is used if it is in the
+    species cache (e.g., after creating a System with the species);
+    otherwise the species coordinates are used as given and the bond
+    lengths are fixed when the System is created.
+
+    Parameters
+    ----------
+    species_topologies : list
+        list of parmed.Structures or gmso.Topology, with one species
+        per element
+    mols_to_pack : list
+        number of molecules of each species to place in the box
+    box : mbuild.Box, np.ndarray, or unyt_array
+        the simulation box: an mbuild.Box, a (3, 3) box matrix with one
+        box vector per row, or the three lengths of an orthogonal box.
+        Plain arrays are in nm.
+    min_distance : unyt_quantity, optional, default=2.0 * u.angstrom
+        minimum distance between atoms of different molecules
+    method : "lattice" or "random", optional, default="lattice"
+        how the starting positions of the molecules are chosen
+    seed : int, optional
+        seed for the random number generator
+    max_rounds : int, optional, default=1000
+        maximum number of rounds of moving overlapping molecules
+
+    Returns
+    -------
+    box : mosdef_cassandra.core.box.BoxSnapshot
+        the occupied box, which can be passed to ``System``
+    mols_in_box : list
+        number of each species in the box, for ``mols_in_boxes``
+    """
+    if not isinstance(species_topologies, list):
+        raise TypeError('"species_topologies" should be a list')
+    if not isinstance(mols_to_pack, list) or len(mols_to_pack) != len(
+        species_topologies
+    ):
+        raise TypeError(
+            '"mols_to_pack" should be a list with one '
+            "element for each species"
+        )
+    for n_mols in mols_to_pack:
+        if not isinstance(n_mols, int) or n_mols < 0:
+            raise TypeError(
+                "The number of each species to pack must be "
+                "specified as a non-negative integer"
+            )
+    if method not in ("lattice", "random"):
+        raise ValueError('method must be "lattice" or "random"')
+    min_distance = validate_unit(
+        min_distance, u.dimensions.length, argument_name="min_distance"
+    ).to_value("angstrom")
+
+    box_matrix = _box_matrix(box) * 10.0
+    structures = [_to_structure(top) for top in species_topologies]
+    templates = [_species_template(top) for top in structures]
+    names = []
+    for top, n_mols in zip(structures, mols_to_pack):
+        names.extend([atom.name for atom in top.atoms] * n_mols)
+    species_ids = np.repeat(np.arange(len(templates)), mols_to_pack)
+    n_total = len(species_ids)
+    rng = np.random.default_rng(seed)
+
+    if n_total == 0:
+        box = BoxSnapshot(np.zeros((0, 3)), [], box_matrix / 10.0)
+        return box, list(mols_to_pack)
+
+    # Initial poses of every molecule
+    if method == "lattice":
+        sites = _lattice_sites(box_matrix, n_total, rng)
+        centers = sites.copy()
+    else:
+        centers = rng.random((n_total, 3)) @ box_matrix
+    rotations = _random_rotations(rng, n_total)
+    placed = np.zeros(n_total, dtype=bool)
+    trial_mols = np.arange(n_total)
+
+    for _ in range(max_rounds):
+        accepted = _accept_trials(
+            templates,
+            species_ids,
+            placed,
+            centers,
+            rotations,
+            trial_mols,
+            box_matrix,
+            min_distance,
+        )
+        placed[accepted[0]] = True
+        centers[accepted[0]] = accepted[1]
+        rotations[accepted[0]] = accepted[2]
+        remaining = np.flatnonzero(~placed)
+        if len(remaining) == 0:
+            break
+        # Several new random poses for each remaining molecule, keeping
+        # the number of trials per round comparable to the box size
+        n_trials = int(np.clip(n_total // len(remaining), 1, 32))
+        trial_mols = np.repeat(remaining, n_trials)
+        trial_centers = rng.random((len(trial_mols), 3)) @ box_matrix
+        if method == "lattice":
+            # First try a new orientation at the molecule's lattice site
+            trial_centers[::n_trials] = sites[remaining]
+        trial_rotations = _random_rotations(rng, len(trial_mols))
+        centers = np.concatenate([centers[:n_total], trial_centers])
+        rotations = np.concatenate([rotations[:n_total], trial_rotations])
+    else:
+        raise ValueError(
+            "Unable to place {} of {} molecules after {} rounds. Reduce "
+            "the number of molecules or min_distance, or increase "
+            "max_rounds".format(np.sum(~placed), n_total, max_rounds)
+        )
+
+    # Molecule centers are inside the box; molecules are kept whole
+    xyz = _build_xyz(
+        templates, species_ids, centers[:n_total], rotations[:n_total]
+    )
+    box = BoxSnapshot(xyz / 10.0, names, box_matrix / 10.0)
+
+    return box, list(mols_to_pack)
+
+
+def _box_matrix(box):
+    """Box matrix in nm, with one box vector per row"""
+    if isinstance(box, mbuild.Box):
+        return np.array(box.vectors, dtype=float)
+    box = _to_nm(box)
+    if box.shape == (3,):
+        return np.diag(box)
+    elif box.shape == (3, 3):
+        return box
+    raise ValueError(
+        "box must be an mbuild.Box, a (3, 3) box matrix, "
+        "or three box lengths"
+    )
+
+
+def _to_structure(top):
+    if isinstance(top, gmso.Topology):
+        return _convert_gmso(top)
+    if not isinstance(top, parmed.Structure):
+        raise TypeError(
+            "Each species should be a parmed.Structure or gmso.Topology"
+        )
+    return top
+
+
+def _species_template(top):
+    """Species coordinates in Angstrom, centered on the origin"""
+    coordinates = np.array(top.coordinates, dtype=float).reshape(-1, 3)
+    if len(top.bonds) > 0:
+        cached = get_species(species_fingerprint(top))
+        if cached is not None:
+            coordinates = np.array(cached["coordinates"], dtype=float)
+    return coordinates - coordinates.mean(axis=0)
+
+
+def _lattice_sites(box_matrix, n_sites, rng, jitter=0.2):
+    """Random subset of a jittered lattice spanning the box"""
+    widths = perpendicular_widths(box_matrix)
+    spacing = (np.prod(widths) / n_sites) ** (1.0 / 3.0)
+    n_cells = np.maximum(np.ceil(widths / spacing).astype(int), 1)
+    while np.prod(n_cells) < n_sites:
+        n_cells[np.argmax(widths / n_cells)] += 1
+    grid = np.stack(
+        np.unravel_index(
+            rng.choice(np.prod(n_cells), n_sites, replace=False), n_cells
+        ),
+        axis=1,
+    )
+    frac = (grid + 0.5 + jitter * (rng.random(grid.shape) - 0.5)) / n_cells
+    return frac @ box_matrix
+
+
+def _random_rotations(rng, n):
+    """Uniformly distributed random rotation matrices"""
+    quaternions = rng.normal(size=(n, 4))
+    quaternions /= np.linalg.norm(quaternions, axis=1)[:, np.newaxis]
+    w, x, y, z = quaternions.T
+    return np.stack(
+        [
+            np.stack(
+                [
+                    1 - 2 * (y**2 + z**2),
+                    2 * (x * y - z * w),
+                    2 * (x * z + y * w),
+                ],
+                axis=-1,
+            ),
+            np.stack(
+                [
+                    2 * (x * y + z * w),
+                    1 - 2 * (x**2 + z**2),
+                    2 * (y * z - x * w),
+                ],
+                axis=-1,
+            ),
+            np.stack(
+                [
+                    2 * (x * z - y * w),
+                    2 * (y * z + x * w),
+                    1 - 2 * (x**2 + y**2),
+                ],
+                axis=-1,
+            ),
+        ],
+        axis=1,
+    )
+
+
+def _build_xyz(templates, species_ids, centers, rotations):
+    """Atom coordinates of each pose, in the order of the poses"""
+    n_atoms = np.array([len(template) for template in templates])
+    offsets = np.concatenate([[0], np.cumsum(n_atoms[species_ids])])
+    xyz = np.empty((offsets[-1], 3))
+    for isp, template in enumerate(templates):
+        poses = np.flatnonzero(species_ids == isp)
+        if len(poses) == 0:
+            continue
+        mol_xyz = np.einsum("aj,nkj->nak", template, rotations[poses])
+        mol_xyz += centers[poses][:, np.newaxis, :]
+        atoms = offsets[poses][:, np.newaxis] + np.arange(n_atoms[isp])
+        xyz[atoms.reshape(-1)] = mol_xyz.reshape(-1, 3)
+    return xyz
+
+
+def _accept_trials(
+    templates,
+    species_ids,
+    placed,
+    centers,
+    rotations,
+    trial_mols,
+    box_matrix,
+    min_distance,
+):
+    """Accept at most one non-overlapping trial pose per molecule
+
+    ``centers`` and ``rotations`` hold the poses of all molecules,
+    followed by the trial poses of molecules ``trial_mols`` if these
+    are not the molecules' current poses. Returns the molecules whose
+    trial was accepted, and the accepted centers and rotations.
+    """
+    n_total = len(species_ids)
+    placed_mols = np.flatnonzero(placed)
+    if len(centers) == n_total:
+        trial_poses = trial_mols
+    else:
+        trial_poses = n_total + np.arange(len(trial_mols))
+    poses = np.concatenate([placed_mols, trial_poses])
+    pose_mols = np.concatenate([placed_mols, trial_mols])
+    xyz = _build_xyz(
+        templates, species_ids[pose_mols], centers[poses], rotations[poses]
+    )
+
+    # Index of the trial each atom belongs to, -1 for placed molecules
+    n_atoms = np.array([len(template) for template in templates])
+    atom_counts = n_atoms[species_ids[pose_mols]]
+    atom_trials = np.repeat(
+        np.concatenate(
+            [np.full(len(placed_mols), -1), np.arange(len(trial_mols))]
+        ),
+        atom_counts,
+    )
+    pairs, _ = find_close_pairs(
+        xyz,
+        box_matrix,
+        min_distance,
+        molecule_ids=np.repeat(pose_mols, atom_counts),
+    )
+    itrial = atom_trials[pairs[:, 0]]
+    jtrial = atom_trials[pairs[:, 1]]
+    # A trial is rejected if it overlaps a placed molecule, or a trial
+    # of another molecule that comes before it
+    rejected = np.zeros(len(trial_mols), dtype=bool)
+    rejected[itrial[(itrial >= 0) & (jtrial < 0)]] = True
+    rejected[jtrial[(jtrial >= 0) & (itrial < 0)]] = True
+    both = (itrial >= 0) & (jtrial >= 0)
+    rejected[np.maximum(itrial[both], jtrial[both])] = True
+
+    # Keep the first accepted trial of each molecule
+    accepted = np.flatnonzero(~rejected)
+    mols, first = np.unique(trial_mols[accepted], return_index=True)
+    accepted = trial_poses[accepted[first]]
+
+    return mols, centers[accepted], rotations[accepted]
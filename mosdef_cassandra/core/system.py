@@ -1,10 +1,33 @@
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from itertools import chain
+from pathlib import Path
+import hashlib
+import weakref
 from constrainmol import ConstrainedMolecule
 from gmso.external.convert_parmed import to_parmed
 import gmso
 import numpy as np
 import mbuild
 import parmed
+import unyt as u
+
+from mosdef_cassandra.core.box import BoxSnapshot
+from mosdef_cassandra.utils.constraints import (
+    align_template,
+    bond_deviations,
+    get_bond_constraints,
+    is_rigid,
+    shake,
+)
+from mosdef_cassandra.utils.cache import (
+    get_species,
+    species_fingerprint,
+    store_species,
+)
+from mosdef_cassandra.utils.neighbors import find_close_pairs
+from mosdef_cassandra.utils.tempdir import temporary_directory
+from mosdef_cassandra.utils.units import validate_unit
 
 
 class System(object):
@@ -15,6 +38,8 @@ class System(object):
         mols_in_boxes=None,
         mols_to_add=None,
         fix_bonds=True,
+        release_solver=True,
+        angle_style="harmonic",
     ):
         """A class to contain the system to simulate in Cassandra
 
@@ -36,7 +61,10 @@ class System(object):
         ----------
         boxes : list
             one element per box. Each element should be a
-            mbuild.Compound or mbuild.Box
+            mbuild.Compound or mbuild.Box, an (xyz, box_matrix) tuple
+            of arrays in nm, or an (xyz_file, H_file) tuple with the
+            last frame of a Cassandra trajectory. Boxes are stored as
+            read-only BoxSnapshot objects.
         species_topologies : list
             list of parmed.Structures or gmso.Topology, with one species per element
         mols_in_boxes: list, optional
@@ -51,6 +79,18 @@ class System(object):
             update the bond lengths in any initial structure
             (i.e., boxes) to match the values specified in
             the species_topologies
+        release_solver : boolean, optional, default=True
+            free the constraint solver of each species once the
+            System is created, keeping only the constrained geometry
+            and bond constraints. The solver is rebuilt if it is
+            needed by a later call to ``fix_bonds``.
+        angle_style : str or list, optional, default="harmonic"
+            "harmonic" or "fixed", for all species or one element
+            per species. Species with fixed angles whose geometry is
+            then fully determined (e.g., SPC/E water) are corrected by
+            ``fix_bonds`` as rigid bodies; all other species only have
+            their bond lengths constrained. The MCF files are written
+            with the same angle styles.
 
         Returns
         -------
@@ -61,6 +101,8 @@ class System(object):
         self._mols_in_boxes = None
         self._mols_to_add = None
         self.original_tops = None
+        self._release_solver = release_solver
+        self._angle_style = angle_style
 
         # @setter decorators used to protect boxes, species
         # topologies, and mols_in_boxes from modification.
@@ -74,11 +116,15 @@ class System(object):
         # vs. number from self.mols_in_boxes and
         # self.species_topologies
         self.check_natoms()
+        self._fill_particle_names()
 
         # Fix the coordinates if the user provides a starting structure
         if fix_bonds:
             self.fix_bonds()
 
+        if release_solver:
+            self.release_solvers()
+
     # TODO: one possibility is to return list(self._boxes)
     # rather than self._boxes --> this prevents list items from
     # being edited ¯\_(ツ)_/¯
@@ -96,14 +142,25 @@ class System(object):
                     "help(mosdef_Cassandra.System) for details."
                 )
             for box in boxes:
-                if isinstance(box, mbuild.Compound):
-                    self._boxes.append(mbuild.clone(box))
-                elif isinstance(box, mbuild.Box):
-                    self._boxes.append(deepcopy(box))
+                if isinstance(box, (mbuild.Compound, mbuild.Box)):
+                    self._boxes.append(BoxSnapshot.from_mbuild(box))
+                elif isinstance(box, BoxSnapshot):
+                    self._boxes.append(box.copy())
+                elif isinstance(box, tuple) and len(box) == 2:
+                    if all(isinstance(f, (str, Path)) for f in box):
+                        self._boxes.append(
+                            BoxSnapshot.from_cassandra(
+                                str(box[0]), str(box[1])
+                            )
+                        )
+                    else:
+                        self._boxes.append(BoxSnapshot.from_array(*box))
                 else:
                     raise TypeError(
                         "Each box should be an "
-                        "mbuild.Compound or mbuild.Box object"
+                        "mbuild.Compound or mbuild.Box object, an "
+                        "(xyz, box_matrix) tuple of arrays, or an "
+                        "(xyz_file, H_file) tuple of Cassandra files"
                     )
         else:
             raise AttributeError(
@@ -127,6 +184,9 @@ class System(object):
     @species_topologies.setter
     def species_topologies(self, species_topologies):
         self._constrained_species = []
+        self._species_constrained = []
+        self._bond_constraints = []
+        self._rigid_templates = []
         if self._species_topologies is None:
             if not isinstance(species_topologies, list):
                 raise TypeError(
@@ -151,40 +211,92 @@ class System(object):
                     "and must be of the same type"
                 )
 
+            angle_style = self._angle_style
+            if isinstance(angle_style, str):
+                angle_style = [angle_style] * len(species_topologies)
+            if not isinstance(angle_style, list) or len(angle_style) != len(
+                species_topologies
+            ):
+                raise TypeError(
+                    '"angle_style" should be a string or a list with '
+                    "one element for each species"
+                )
+            for astyle in angle_style:
+                if astyle not in ["harmonic", "fixed"]:
+                    raise ValueError(
+                        'Invalid "angle_style" {} given. Supported '
+                        'options are "harmonic" and "fixed"'.format(astyle)
+                    )
+            self._angle_style = angle_style
+
             self._species_topologies = []
             self.original_tops = species_topologies
 
-            for top in species_topologies:
-                subtops = []
+            for isp, top in enumerate(species_topologies):
                 if isinstance(top, gmso.Topology):
-                    for molecule in top.unique_site_labels(name_only=True):
-                        subtops.append(
-                            top.create_subtop("molecule", (molecule, 1))
-                        )
-
-                    if len(subtops) > 1:
-                        raise ValueError(
-                            "GMSO Topology must contain only one molecule type. For example, "
-                            "if you have a box of water, you must have a single water molecule "
-                            "type in the topology. If you have a box of water and methane, you "
-                            "must have two separate single molecule topologies, one for water "
-                            " and one for methane."
-                        )
-                    subtops[0].box = top.box
-                    top = to_parmed(subtops[0])
-                    # top = to_parmed(top)
+                    # The conversion is cached per topology; work on a
+                    # private copy of the converted structure
+                    top = parmed.structure.copy(_convert_gmso(top))
+                    owned = True
+                else:
+                    owned = False
 
                 # If no bonds in topology don't try to apply constraints
                 # Store "None" in _constrained_species instead
+                self._species_constrained.append(len(top.bonds) > 0)
                 if len(top.bonds) > 0:
-                    constrain = ConstrainedMolecule(top)
-                    constrain.solve()
-                    top.coordinates = constrain.xyz
+                    # Reuse the geometry if this species has already
+                    # been constrained, e.g., by a previous System
+                    fingerprint = species_fingerprint(top)
+                    cached = get_species(fingerprint)
+                    if cached is None:
+                        constrain = ConstrainedMolecule(top)
+                        constrain.solve()
+                        top.coordinates = constrain.xyz
+                        # Only keep the solver in the process-wide
+                        # cache if Systems keep theirs
+                        if self._release_solver:
+                            cached_constrain = None
+                        else:
+                            cached_constrain = constrain
+                        cached = store_species(
+                            fingerprint,
+                            top.coordinates,
+                            get_bond_constraints(top),
+                            is_rigid(top),
+                            constrain=cached_constrain,
+                        )
+                        # The solve also updated the coordinates of the
+                        # input topology; make reusing it a cache hit
+                        store_species(
+                            species_fingerprint(top),
+                            cached["coordinates"],
+                            cached["bond_constraints"],
+                            cached["rigid"],
+                            constrain=cached_constrain,
+                        )
+                    else:
+                        top.coordinates = cached["coordinates"].copy()
+                        # The solver is built on demand by fix_bonds
+                        constrain = cached["constrain"]
                     self._constrained_species.append(constrain)
+                    self._bond_constraints.append(cached["bond_constraints"])
+                    # Rigid species only need to be snapped onto
+                    # the constrained geometry. Flexible angles leave
+                    # the geometry free, so those species use SHAKE
+                    if cached["rigid"] and angle_style[isp] == "fixed":
+                        self._rigid_templates.append(cached["coordinates"])
+                    else:
+                        self._rigid_templates.append(None)
                 else:
                     self._constrained_species.append(None)
+                    self._bond_constraints.append(None)
+                    self._rigid_templates.append(None)
 
-                self._species_topologies.append(parmed.structure.copy(top))
+                if owned:
+                    self._species_topologies.append(top)
+                else:
+                    self._species_topologies.append(parmed.structure.copy(top))
 
         else:
             raise AttributeError(
@@ -294,6 +406,11 @@ class System(object):
 
         self._mols_to_add = deepcopy(mols_to_add)
 
+    @property
+    def angle_style(self):
+        """Angle style of each species, used for the MCF files"""
+        return list(self._angle_style)
+
     def check_natoms(self):
         """Confirm that the number of existing atoms in each box
         agrees with the number of atoms specified from the combination
@@ -311,7 +428,7 @@ class System(object):
         # If the box is empty it should be an mbuild.Box object. If occupied
         # it should be an mbuild.Compound object.
         for ibox, box in enumerate(self.boxes):
-            if isinstance(box, mbuild.Compound):
+            if box.occupied:
                 if box.n_particles != atoms_in_box[ibox]:
                     err_msg = (
                         "The number of atoms in box {} ({}) "
@@ -339,7 +456,7 @@ class System(object):
                         )
                         raise ValueError(addtl_msg + "\n" + err_msg)
                     raise ValueError(err_msg)
-            elif isinstance(box, mbuild.Box):
+            else:
                 if sum(self.mols_in_boxes[ibox]) > 0:
                     raise ValueError(
                         "Box {} is an mbuild.Box object "
@@ -352,42 +469,770 @@ class System(object):
                         )
                     )
 
-    def fix_bonds(self):
-        """Apply the bond length constraints to each molecule in the system"""
+    def _fill_particle_names(self):
+        """Name the particles of boxes created from raw coordinates"""
+        for ibox, box in enumerate(self._boxes):
+            if box.names is not None:
+                continue
+            names = []
+            for top, n_mols in zip(
+                self.species_topologies, self.mols_in_boxes[ibox]
+            ):
+                names.extend([atom.name for atom in top.atoms] * n_mols)
+            self._boxes[ibox] = box.with_names(names)
+
+    def check_overlaps(self, rcut_min=1.0 * u.angstrom, sigma_fraction=None):
+        """Find intermolecular atom pairs that are too close together
+
+        Each occupied box is searched with a cell list, so the cost
+        scales linearly with the number of atoms. Cassandra rejects any
+        move that places two atoms closer than ``rcut_min``, so a
+        starting structure with such pairs cannot equilibrate.
+
+        Parameters
+        ----------
+        rcut_min : unyt_quantity, optional, default=1.0 * u.angstrom
+            report pairs closer than this distance
+        sigma_fraction : float, optional
+            also report pairs closer than this fraction of their
+            (Lorentz-Berthelot) sigma
+
+        Returns
+        -------
+        overlaps : list
+            one dict per box, with "pairs": (n_pairs, 2) array of atom
+            indices within the box and "distances": unyt_array of the
+            pair distances in Angstrom. Empty boxes have no pairs.
+        """
+        rcut_min = validate_unit(
+            rcut_min, u.dimensions.length, argument_name="rcut_min"
+        ).to_value("angstrom")
+        if sigma_fraction is not None:
+            sigma_fraction = float(sigma_fraction)
+            sigmas = [
+                np.array([atom.sigma for atom in top.atoms], dtype=float)
+                for top in self.species_topologies
+            ]
+
+        overlaps = []
         for ibox, box in enumerate(self.boxes):
-            if isinstance(box, mbuild.Box):
+            pairs = np.zeros((0, 2), dtype=int)
+            distances = np.zeros(0)
+            if box.occupied and box.n_particles > 1:
+                if box.vectors is None:
+                    raise ValueError(
+                        "Box {} does not have box vectors".format(ibox + 1)
+                    )
+                mols = self.mols_in_boxes[ibox]
+                atoms_per_mol = np.repeat(
+                    [len(top.atoms) for top in self.species_topologies], mols
+                )
+                molecule_ids = np.repeat(
+                    np.arange(len(atoms_per_mol)), atoms_per_mol
+                )
+                cutoff = rcut_min
+                if sigma_fraction is not None:
+                    atom_sigmas = np.concatenate(
+                        [np.tile(sigma, n) for sigma, n in zip(sigmas, mols)]
+                    )
+                    cutoff = max(cutoff, sigma_fraction * atom_sigmas.max())
+                pairs, distances = find_close_pairs(
+                    box.xyz * 10.0,
+                    box.vectors * 10.0,
+                    cutoff,
+                    molecule_ids=molecule_ids,
+                )
+                if sigma_fraction is not None:
+                    pair_sigmas = 0.5 * (
+                        atom_sigmas[pairs[:, 0]] + atom_sigmas[pairs[:, 1]]
+                    )
+                    close = (distances < rcut_min) | (
+                        distances < sigma_fraction * pair_sigmas
+                    )
+                    pairs = pairs[close]
+                    distances = distances[close]
+            overlaps.append(
+                {"pairs": pairs, "distances": distances * u.angstrom}
+            )
+
+        return overlaps
+
+    def fix_bonds(self, tolerance=1e-6, max_iterations=1000, n_procs=1):
+        """Apply the bond length constraints to each molecule in the system
+
+        The bond length deviations of every molecule are first checked
+        at once and molecules that already satisfy their constraints
+        are left untouched. The remaining molecules of each species are
+        corrected together with a batched SHAKE-style iteration. Species
+        with a fixed angle style whose geometry is fully fixed by bonds
+        and angles (e.g., SPC/E water) are instead replaced with the
+        constrained species geometry, superimposed onto each molecule.
+        Any molecule that does not converge is passed to the full
+        constraint solver (constrainmol).
+
+        Parameters
+        ----------
+        tolerance : float, optional, default=1e-6
+            maximum relative deviation of each bond length from its
+            equilibrium value
+        max_iterations : int, optional, default=1000
+            maximum number of SHAKE iterations before falling back
+            to the constraint solver
+        n_procs : int, optional, default=1
+            number of processes used to run the constraint solver
+
+        Returns
+        -------
+        report : dict
+            "checked": number of molecules with constraints,
+            "corrected": number of molecules outside the tolerance,
+            "solver": number of molecules passed to the constraint solver
+        """
+        report = {"checked": 0, "corrected": 0, "solver": 0}
+        new_coordinates = []
+        unsolved = []
+        for ibox, box in enumerate(self.boxes):
+            if not box.occupied:
+                new_coordinates.append(None)
                 continue
-            unconstrained_coordinates = box.xyz
-            constrained_coordinates = np.zeros(box.xyz.shape)
-            n_species = len(self.species_topologies)
+            coordinates = box.xyz
+            modified = False
             idx_offset = 0
-            for isp in range(n_species):
-                constrain = self._constrained_species[isp]
+            for isp in range(len(self.species_topologies)):
                 n_mols = self.mols_in_boxes[ibox][isp]
                 n_atoms = self._species_topologies[isp].coordinates.shape[0]
-                # If no constrained molecule grab all the coordinates
-                # in one big block
-                if constrain is None:
-                    start_idx = idx_offset
-                    end_idx = idx_offset + n_mols * n_atoms
-                    constrained_coordinates[start_idx:end_idx] = (
-                        unconstrained_coordinates[start_idx:end_idx]
+                start_idx = idx_offset
+                idx_offset += n_mols * n_atoms
+                # Skip species without constraints
+                if not self._species_constrained[isp] or n_mols == 0:
+                    continue
+                mol_xyz = (
+                    coordinates[start_idx:idx_offset].reshape(
+                        n_mols, n_atoms, 3
+                    )
+                    * 10.0  # nm to Angstrom
+                )
+                report["checked"] += n_mols
+                to_fix = np.flatnonzero(
+                    self._constraint_deviations(isp, mol_xyz) >= tolerance
+                )
+                if len(to_fix) == 0:
+                    continue
+                report["corrected"] += len(to_fix)
+
+                template = self._rigid_templates[isp]
+                bond_constraints = self._bond_constraints[isp]
+                if template is not None:
+                    new_xyz = align_template(template, mol_xyz[to_fix])
+                    converged = np.ones(len(to_fix), dtype=bool)
+                elif bond_constraints is not None:
+                    bonds, bond_lengths = bond_constraints
+                    new_xyz, converged = shake(
+                        mol_xyz[to_fix],
+                        bonds,
+                        bond_lengths,
+                        tolerance=tolerance,
+                        max_iterations=max_iterations,
                     )
-                # Else we apply the constraints one molecule
-                # at a time
                 else:
-                    for imol in range(n_mols):
-                        start_idx = idx_offset + imol * n_atoms
-                        end_idx = idx_offset + (imol + 1) * n_atoms
-                        constrain.update_xyz(
-                            unconstrained_coordinates[start_idx:end_idx]
-                            * 10.0  # nm to Angstrom
+                    new_xyz = mol_xyz[to_fix]
+                    converged = np.zeros(len(to_fix), dtype=bool)
+                mol_xyz[to_fix] = new_xyz
+                if not np.all(converged):
+                    # Keep the original coordinates as the starting
+                    # point for the constraint solver
+                    not_converged = to_fix[~converged]
+                    unsolved.append(
+                        (
+                            ibox,
+                            isp,
+                            start_idx,
+                            not_converged,
+                            coordinates[start_idx:idx_offset].reshape(
+                                n_mols, n_atoms, 3
+                            )[not_converged]
+                            * 10.0,
                         )
-                        constrain.solve()
-                        constrained_coordinates[start_idx:end_idx] = (
-                            constrain.xyz / 10.0
-                        )  # Angstrom to nm
-                # Now we're done with isp; update idx_offset
-                idx_offset += n_mols * n_atoms
+                    )
+                    report["solver"] += len(not_converged)
+                if not modified:
+                    coordinates = coordinates.copy()
+                    modified = True
+                coordinates[start_idx:idx_offset] = (
+                    mol_xyz.reshape(-1, 3) / 10.0
+                )  # Angstrom to nm
+            new_coordinates.append(coordinates if modified else None)
+
+        # Fall back to the constraint solver for anything
+        # SHAKE could not handle
+        solved = self._solve_constraints(
+            [(isp, xyz) for _, isp, _, _, xyz in unsolved], n_procs
+        )
+        for (ibox, isp, start_idx, mol_idxs, _), new_xyz in zip(
+            unsolved, solved
+        ):
+            n_atoms = new_xyz.shape[1]
+            atom_idxs = (
+                start_idx
+                + mol_idxs[:, np.newaxis] * n_atoms
+                + np.arange(n_atoms)
+            )
+            new_coordinates[ibox][atom_idxs.flatten()] = (
+                new_xyz.reshape(-1, 3) / 10.0
+            )
+
+        for box, coordinates in zip(self.boxes, new_coordinates):
+            if coordinates is not None:
+                box.xyz = coordinates
+
+        return report
+
+    def save(self, filename):
+        """Save the System to a NumPy ``.npz`` file
+
+        The file holds the box coordinates, particle names and box
+        matrices, the number of molecules in and to add to each box,
+        the constrained species geometries and bond constraints, and the
+        force field parameters of each species as plain arrays (atoms,
+        bonds, angles, dihedrals, impropers and 1-4 pairs). GMSO
+        topologies are also stored in the GMSO JSON format.
+        ``System.load`` recreates the System without retyping the
+        species or re-solving the constraints.
+
+        Parameters
+        ----------
+        filename : str
+            path of the file to write; ``.npz`` is appended by NumPy
+            if not present
+        """
+        data = {
+            "format_version": np.array(_SAVE_FORMAT_VERSION),
+            "mols_in_boxes": np.array(self.mols_in_boxes, dtype=int),
+            "mols_to_add": np.array(self.mols_to_add, dtype=int),
+            "angle_style": np.array(self._angle_style),
+        }
+        for ibox, box in enumerate(self.boxes):
+            prefix = "box{}_".format(ibox)
+            data[prefix + "xyz"] = box.xyz
+            data[prefix + "names"] = box.names
+            if box.vectors is None:
+                data[prefix + "vectors"] = np.zeros(0)
+            else:
+                data[prefix + "vectors"] = box.vectors
+            data[prefix + "occupied"] = np.array(box.occupied)
+        for isp, top in enumerate(self.species_topologies):
+            prefix = "species{}_".format(isp)
+            data[prefix + "coordinates"] = np.array(top.coordinates)
+            bond_constraints = self._bond_constraints[isp]
+            data[prefix + "constrained"] = np.array(
+                self._species_constrained[isp]
+            )
+            data[prefix + "has_bond_constraints"] = np.array(
+                bond_constraints is not None
+            )
+            if bond_constraints is not None:
+                data[prefix + "bonds"] = bond_constraints[0]
+                data[prefix + "bond_lengths"] = bond_constraints[1]
+            data[prefix + "rigid"] = np.array(
+                self._rigid_templates[isp] is not None
+            )
+            for key, value in _structure_to_arrays(top).items():
+                data[prefix + "top_" + key] = value
+            # Only GMSO inputs need the original topologies
+            if isinstance(self.original_tops[isp], gmso.Topology):
+                data[prefix + "gmso"] = np.array(
+                    _gmso_to_json(self.original_tops[isp])
+                )
+
+        np.savez(filename, **data)
+
+    @classmethod
+    def load(cls, filename):
+        """Load a System written with ``System.save``
+
+        Parameters
+        ----------
+        filename : str
+            path of the ``.npz`` file
+
+        Returns
+        -------
+        mosdef_cassandra.System
+        """
+        if not Path(filename).is_file():
+            raise FileNotFoundError(f"System file {filename} does not exist.")
+
+        system = cls.__new__(cls)
+        with np.load(filename, allow_pickle=False) as data:
+            if int(data["format_version"]) != _SAVE_FORMAT_VERSION:
+                raise ValueError(
+                    "{} was written with an unsupported format "
+                    "version ({})".format(
+                        filename, int(data["format_version"])
+                    )
+                )
+            mols_in_boxes = data["mols_in_boxes"].tolist()
+            mols_to_add = data["mols_to_add"].tolist()
+            angle_style = data["angle_style"].tolist()
+            n_species = len(mols_in_boxes[0])
+            species_topologies = []
+            original_tops = []
+            for isp in range(n_species):
+                prefix = "species{}_".format(isp)
+                top = _structure_from_arrays(data, prefix + "top_")
+                species_topologies.append(top)
+                if prefix + "gmso" in data.files:
+                    original_tops.append(
+                        _gmso_from_json(str(data[prefix + "gmso"]))
+                    )
+                else:
+                    original_tops.append(top)
+
+            boxes = []
+            for ibox in range(len(mols_in_boxes)):
+                prefix = "box{}_".format(ibox)
+                vectors = data[prefix + "vectors"]
+                boxes.append(
+                    BoxSnapshot(
+                        data[prefix + "xyz"],
+                        data[prefix + "names"],
+                        vectors if vectors.size > 0 else None,
+                        occupied=bool(data[prefix + "occupied"]),
+                    )
+                )
+
+            species_constrained = []
+            bond_constraints = []
+            rigid_templates = []
+            for isp, top in enumerate(species_topologies):
+                prefix = "species{}_".format(isp)
+                coordinates = data[prefix + "coordinates"]
+                top.coordinates = coordinates
+                if data[prefix + "has_bond_constraints"]:
+                    bond_constraints.append(
+                        (data[prefix + "bonds"], data[prefix + "bond_lengths"])
+                    )
+                else:
+                    bond_constraints.append(None)
+                if data[prefix + "rigid"]:
+                    rigid_templates.append(coordinates)
+                else:
+                    rigid_templates.append(None)
+                species_constrained.append(bool(data[prefix + "constrained"]))
+
+        system._boxes = boxes
+        system._species_topologies = species_topologies
+        system._original_topology = original_tops
+        system._mols_in_boxes = mols_in_boxes
+        system._mols_to_add = mols_to_add
+        # The constraint solvers are built on demand by fix_bonds
+        system._constrained_species = [None] * len(species_topologies)
+        system._species_constrained = species_constrained
+        system._release_solver = True
+        system._angle_style = angle_style
+        system._bond_constraints = bond_constraints
+        system._rigid_templates = rigid_templates
+        system.check_natoms()
+
+        return system
+
+    def _constraint_deviations(self, isp, mol_xyz):
+        """Largest relative constraint violation of each molecule"""
+        template = self._rigid_templates[isp]
+        bond_constraints = self._bond_constraints[isp]
+        if template is not None:
+            # Every interatomic distance is fixed for rigid species
+            pairs = np.transpose(np.triu_indices(len(template), k=1))
+            lengths = np.linalg.norm(
+                template[pairs[:, 0]] - template[pairs[:, 1]], axis=1
+            )
+            return bond_deviations(mol_xyz, pairs, lengths)
+        elif bond_constraints is not None:
+            bonds, bond_lengths = bond_constraints
+            return bond_deviations(mol_xyz, bonds, bond_lengths)
+        else:
+            return np.full(mol_xyz.shape[0], np.inf)
+
+    def release_solvers(self):
+        """Free the constraint solver of each species
+
+        Only the constrained species geometries and bond constraints
+        are kept. The solvers are rebuilt if needed by ``fix_bonds``.
+        """
+        self._constrained_species = [None] * len(self._constrained_species)
+
+    def _get_solver(self, isp):
+        """Return the constraint solver of a species, building it if needed"""
+        constrain = self._constrained_species[isp]
+        if constrain is None:
+            constrain = ConstrainedMolecule(self._species_topologies[isp])
+            if not self._release_solver:
+                self._constrained_species[isp] = constrain
+        return constrain
+
+    def _solve_constraints(self, unsolved, n_procs=1):
+        """Run the constraint solver on each (species, xyz) pair"""
+        n_mols = sum(xyz.shape[0] for _, xyz in unsolved)
+        if n_procs is None or n_procs <= 1 or n_mols <= 1:
+            solved = []
+            for isp, xyz in unsolved:
+                constrain = self._get_solver(isp)
+                new_xyz = np.empty(xyz.shape)
+                for imol in range(xyz.shape[0]):
+                    constrain.update_xyz(xyz[imol])
+                    constrain.solve()
+                    new_xyz[imol] = constrain.xyz
+                solved.append(new_xyz)
+            return solved
+
+        # Split each species' molecules into chunks that are solved
+        # by separate processes
+        jobs = []
+        for isp, xyz in unsolved:
+            n_chunks = min(n_procs, xyz.shape[0])
+            jobs.append(
+                [
+                    (self._species_topologies[isp], chunk)
+                    for chunk in np.array_split(xyz, n_chunks)
+                ]
+            )
+        with ProcessPoolExecutor(max_workers=n_procs) as executor:
+            futures = [
+                [executor.submit(_solve_molecules, *job) for job in chunks]
+                for chunks in jobs
+            ]
+            solved = [
+                np.concatenate([future.result() for future in chunks])
+                for chunks in futures
+            ]
+        return solved
+
+
+_SAVE_FORMAT_VERSION = 2
+
+# parmed structures converted from gmso.Topology objects, keyed by the
+# topology and checked against a cheap summary of its current state
+_gmso_conversions = weakref.WeakKeyDictionary()
+
+
+def _convert_gmso(top):
+    """Convert a single-molecule gmso.Topology to a parmed.Structure
+
+    The conversion is done once per topology object and reused as long
+    as the topology is unchanged. The returned structure is shared and
+    must not be modified.
+    """
+    state = _gmso_state(top)
+    try:
+        cached = _gmso_conversions.get(top)
+    except TypeError:
+        cached = None
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    subtops = []
+    for molecule in top.unique_site_labels(name_only=True):
+        subtops.append(top.create_subtop("molecule", (molecule, 1)))
+
+    if len(subtops) > 1:
+        raise ValueError(
+            "GMSO Topology must contain only one molecule type. For example, "
+            "if you have a box of water, you must have a single water molecule "
+            "type in the topology. If you have a box of water and methane, you "
+            "must have two separate single molecule topologies, one for water "
+            " and one for methane."
+        )
+    subtops[0].box = top.box
+    structure = to_parmed(subtops[0])
+
+    try:
+        _gmso_conversions[top] = (state, structure)
+    except TypeError:
+        # Topology cannot be weakly referenced; skip caching
+        pass
+
+    return structure
+
+
+def _gmso_state(top):
+    """Summary of a gmso.Topology used to detect modifications
+
+    Covers the number of sites and connections, the positions and the
+    force field parameters: site charges, atom types, connection types,
+    scaling factors and combining rule.
+    """
+    positions = np.ascontiguousarray(top.positions.to_value("nm"))
+    parameters = hashlib.sha1()
+    for site in top.sites:
+        parameters.update(
+            "s {} {} {};".format(
+                site.name, site.charge, _potential_state(site.atom_type)
+            ).encode()
+        )
+    for connection in chain(
+        top.bonds, top.angles, top.dihedrals, top.impropers
+    ):
+        parameters.update(
+            "c {} {};".format(
+                [
+                    top.get_index(site)
+                    for site in connection.connection_members
+                ],
+                _potential_state(connection.connection_type),
+            ).encode()
+        )
+    parameters.update(
+        "{} {};".format(top.scaling_factors, top.combining_rule).encode()
+    )
+    return (
+        top.n_sites,
+        top.n_bonds,
+        top.n_angles,
+        top.n_dihedrals,
+        top.n_impropers,
+        hashlib.sha1(positions.tobytes()).hexdigest(),
+        parameters.hexdigest(),
+    )
+
+
+def _potential_state(potential):
+    """Name, expression and parameters of a GMSO atom or connection type"""
+    if potential is None:
+        return "None"
+    parameters = sorted(
+        (name, str(value)) for name, value in potential.parameters.items()
+    )
+    return "{} {} {}".format(potential.name, potential.expression, parameters)
+
+
+def _structure_to_arrays(structure):
+    """Store the force field parameters of a species as plain arrays
+
+    Only the terms written to the MCF file are stored: atoms, bonds,
+    angles, dihedrals, RB torsions, impropers and the scaled 1-4 pairs.
+    Missing parameters are stored as NaN.
+    """
+    unsupported = [
+        name
+        for name in ["urey_bradleys", "cmaps"]
+        if len(getattr(structure, name)) > 0
+    ]
+    if len(unsupported) > 0:
+        raise ValueError(
+            "Unable to save a species with {}".format(", ".join(unsupported))
+        )
+
+    def params(terms, names):
+        values = np.full((len(terms), len(names)), np.nan)
+        for iterm, term in enumerate(terms):
+            if term.type is not None:
+                values[iterm] = [getattr(term.type, name) for name in names]
+        return values
+
+    def atoms(terms, names):
+        idxs = [[getattr(term, name).idx for name in names] for term in terms]
+        return np.array(idxs, dtype=int).reshape(-1, len(names))
+
+    def torsions(terms):
+        idxs = atoms(terms, ["atom1", "atom2", "atom3", "atom4"])
+        flags = np.array(
+            [[term.improper, term.ignore_end] for term in terms], dtype=int
+        ).reshape(-1, 2)
+        return np.hstack([idxs, flags])
+
+    # Periodic dihedrals may have several terms each
+    dihedral_terms = []
+    for idihedral, dihedral in enumerate(structure.dihedrals):
+        if dihedral.type is None:
+            dihedral_terms.append([idihedral] + [np.nan] * 5)
+            continue
+        if isinstance(dihedral.type, parmed.DihedralTypeList):
+            dtypes = dihedral.type
+        else:
+            dtypes = [dihedral.type]
+        for dtype in dtypes:
+            dihedral_terms.append(
+                [
+                    idihedral,
+                    dtype.phi_k,
+                    dtype.per,
+                    dtype.phase,
+                    dtype.scee,
+                    dtype.scnb,
+                ]
+            )
+
+    return {
+        "atom_names": np.array(
+            [atom.name for atom in structure.atoms], dtype=str
+        ),
+        "atom_types": np.array(
+            [atom.type for atom in structure.atoms], dtype=str
+        ),
+        "residue_names": np.array(
+            [atom.residue.name for atom in structure.atoms], dtype=str
+        ),
+        "residue_idxs": np.array(
+            [atom.residue.idx for atom in structure.atoms], dtype=int
+        ),
+        "atomic_numbers": np.array(
+            [atom.atomic_number for atom in structure.atoms], dtype=int
+        ),
+        "atom_params": np.array(
+            [
+                [atom.mass, atom.charge, atom.rmin, atom.epsilon]
+                for atom in structure.atoms
+            ],
+            dtype=float,
+        ).reshape(-1, 4),
+        "bonds": atoms(structure.bonds, ["atom1", "atom2"]),
+        "bond_params": params(structure.bonds, ["k", "req"]),
+        "angles": atoms(structure.angles, ["atom1", "atom2", "atom3"]),
+        "angle_params": params(structure.angles, ["k", "theteq"]),
+        "dihedrals": torsions(structure.dihedrals),
+        "dihedral_params": np.array(dihedral_terms, dtype=float).reshape(
+            -1, 6
+        ),
+        "rb_torsions": torsions(structure.rb_torsions),
+        "rb_torsion_params": params(
+            structure.rb_torsions,
+            ["c0", "c1", "c2", "c3", "c4", "c5", "scee", "scnb"],
+        ),
+        "impropers": atoms(
+            structure.impropers, ["atom1", "atom2", "atom3", "atom4"]
+        ),
+        "improper_params": params(structure.impropers, ["psi_k", "psi_eq"]),
+        "adjusts": atoms(structure.adjusts, ["atom1", "atom2"]),
+        "adjust_params": params(
+            structure.adjusts, ["rmin", "epsilon", "chgscale"]
+        ),
+        "combining_rule": np.array(structure.combining_rule),
+        "box": np.array(
+            [] if structure.box is None else structure.box, dtype=float
+        ),
+    }
+
+
+def _structure_from_arrays(data, prefix):
+    """Recreate a species written by ``_structure_to_arrays``"""
+    structure = parmed.Structure()
+    atom_params = data[prefix + "atom_params"]
+    for iatom in range(atom_params.shape[0]):
+        mass, charge, rmin, epsilon = atom_params[iatom]
+        atom = parmed.Atom(
+            name=str(data[prefix + "atom_names"][iatom]),
+            type=str(data[prefix + "atom_types"][iatom]),
+            atomic_number=int(data[prefix + "atomic_numbers"][iatom]),
+            mass=mass,
+            charge=charge,
+            rmin=rmin,
+            epsilon=epsilon,
+        )
+        structure.add_atom(
+            atom,
+            str(data[prefix + "residue_names"][iatom]),
+            int(data[prefix + "residue_idxs"][iatom]),
+        )
+    atoms = structure.atoms
+
+    terms = [
+        ("bonds", 2, parmed.Bond, parmed.BondType),
+        ("angles", 3, parmed.Angle, parmed.AngleType),
+        ("rb_torsions", 4, parmed.Dihedral, parmed.RBTorsionType),
+        ("impropers", 4, parmed.Improper, parmed.ImproperType),
+        (
+            "adjusts",
+            2,
+            parmed.NonbondedException,
+            parmed.NonbondedExceptionType,
+        ),
+    ]
+    for name, n_atoms, term_class, type_class in terms:
+        term_list = getattr(structure, name)
+        type_list = getattr(structure, name[:-1] + "_types")
+        values = data[prefix + name[:-1] + "_params"]
+        for term_idxs, term_params in zip(data[prefix + name], values):
+            term_atoms = [atoms[int(idx)] for idx in term_idxs[:n_atoms]]
+            if np.any(np.isnan(term_params)):
+                term_type = None
+            else:
+                term_type = type_class(*term_params)
+                type_list.append(term_type)
+            if term_class is parmed.Dihedral:
+                term = term_class(
+                    *term_atoms,
+                    improper=bool(term_idxs[4]),
+                    ignore_end=bool(term_idxs[5]),
+                    type=term_type,
+                )
+            else:
+                term = term_class(*term_atoms, type=term_type)
+            term_list.append(term)
+
+    dihedral_params = data[prefix + "dihedral_params"]
+    for idihedral, dihedral_idxs in enumerate(data[prefix + "dihedrals"]):
+        terms = dihedral_params[dihedral_params[:, 0] == idihedral, 1:]
+        if np.any(np.isnan(terms)):
+            dtype = None
+        elif len(terms) == 1:
+            dtype = parmed.DihedralType(*terms[0])
+        else:
+            dtype = parmed.DihedralTypeList(
+                [parmed.DihedralType(*term) for term in terms]
+            )
+        if dtype is not None:
+            structure.dihedral_types.append(dtype)
+        structure.dihedrals.append(
+            parmed.Dihedral(
+                *[atoms[int(idx)] for idx in dihedral_idxs[:4]],
+                improper=bool(dihedral_idxs[4]),
+                ignore_end=bool(dihedral_idxs[5]),
+                type=dtype,
+            )
+        )
+
+    for type_list in [
+        structure.bond_types,
+        structure.angle_types,
+        structure.dihedral_types,
+        structure.rb_torsion_types,
+        structure.improper_types,
+        structure.adjust_types,
+    ]:
+        type_list.claim()
+    structure.combining_rule = str(data[prefix + "combining_rule"])
+    box = data[prefix + "box"]
+    if box.size > 0:
+        structure.box = box
+
+    return structure
+
+
+def _gmso_to_json(top):
+    """Serialize a gmso.Topology with the GMSO JSON writer"""
+    with temporary_directory() as tmp_dir:
+        filename = Path(tmp_dir) / "topology.json"
+        top.save(str(filename))
+        return filename.read_text()
+
+
+def _gmso_from_json(text):
+    """Read a gmso.Topology written by ``_gmso_to_json``"""
+    with temporary_directory() as tmp_dir:
+        filename = Path(tmp_dir) / "topology.json"
+        filename.write_text(text)
+        return gmso.Topology.load(str(filename))
+
+
+def _solve_molecules(structure, xyz):
+    """Apply the bond constraints of ``structure`` to each molecule
 
-            box.xyz = constrained_coordinates
+    Module-level so that it can be run in a separate process.
+    """
+    constrain = ConstrainedMolecule(structure)
+    new_xyz = np.empty(xyz.shape)
+    for imol in range(xyz.shape[0]):
+        constrain.update_xyz(xyz[imol])
+        constrain.solve()
+        new_xyz[imol] = constrain.xyz
+    return new_xyz
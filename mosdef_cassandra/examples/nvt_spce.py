@@ -29,18 +29,17 @@ def run_nvt_spce(**custom_args):
     # Use Cassandra to insert some initial number of species
     mols_to_add = [[50]]
 
-    # Define the system object
-    system = mc.System(box_list, species_list, mols_to_add=mols_to_add)
+    # Define the system object. SPC/E geometry is rigid, so the
+    # angles are fixed; the default angle style is "harmonic"
+    system = mc.System(
+        box_list,
+        species_list,
+        mols_to_add=mols_to_add,
+        angle_style="fixed",
+    )
     # Get the move probabilities
     moveset = mc.MoveSet("nvt", species_list)
 
-    default_args = {
-        "angle_style": ["fixed"],
-    }
-
-    # Combine default/custom args and override default
-    custom_args = {**default_args, **custom_args}
-
     # Run a simulation with at 300 K with 10000 MC moves
     mc.run(
         system=system,
@@ -0,0 +1,383 @@
+import datetime
+import platform
+
+import numpy as np
+
+from mosdef_cassandra.utils.cache import get_timings, store_timing
+from mosdef_cassandra.utils.estimates import estimate_memory, format_bytes
+from mosdef_cassandra.utils.ewald import ewald_cost
+from mosdef_cassandra.writers.inp_functions import generate_input
+from mosdef_cassandra.writers.inp_parser import CassandraInput
+
+# Seconds per unit of work (one pair interaction) assumed when there
+# are no timed runs in the history
+_DEFAULT_SECONDS_PER_UNIT = 2.0e-8
+
+# Work of checking the distance to one molecule, relative to a pair
+# interaction. Cassandra loops over every molecule in the box to find
+# the ones within the cutoff.
+_MOLECULE_CHECK_COST = 0.25
+
+# Number of timed runs with the most similar work per step used to
+# calibrate a prediction
+_N_NEIGHBORS = 5
+
+
+def input_features(system, moveset, inp):
+    """Work per MC step of a Cassandra input file
+
+    The work of each kind of move is counted in pair interactions.
+    Moving a molecule requires its van der Waals interactions with
+    the atoms within the cutoff, its electrostatic interactions
+    (including the reciprocal space work of the Ewald sum, see
+    ``mosdef_cassandra.utils.ewald.ewald_cost``), and a distance check
+    with every molecule in the box. Without stored pair energies the
+    energy before the move is computed as well. Moves that grow a
+    molecule with CBMC add the trial positions and dihedral angles
+    within the CBMC cutoff. Volume moves recompute the energy of the
+    whole box. The work per step is the average over the move
+    probabilities of the MoveSet.
+
+    In GCMC, inserted species are assumed to fill half of the room
+    between the molecules in the box and ``max_molecules``.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet to simulate
+    inp : str or mosdef_cassandra.writers.inp_parser.CassandraInput
+        the input file generated for the System and MoveSet
+
+    Returns
+    -------
+    features : dict
+        the "n_atoms" and "n_molecules" in each box, the
+        "vdw_cutoff", "charge_style", and "charge_cutoff" of each box,
+        "pair_energy", "max_molecules", the "move_probabilities",
+        "cbmc_n_insert" and "cbmc_n_dihed", the "units" and
+        "run_length", the number of "steps" (None if the units are
+        minutes), and the "cost_per_step" in pair interactions
+    """
+    # tuning imports the runners, which use this module
+    from mosdef_cassandra.runners.tuning import move_probabilities
+
+    if isinstance(inp, str):
+        inp = CassandraInput.from_string(inp)
+
+    n_boxes = len(system.boxes)
+    n_species = len(system.species_topologies)
+    max_molecules = [
+        int(line.split()[1]) for line in inp["Molecule_Files"].data
+    ]
+    pair_energy = inp["Pair_Energy"].data[0].lower() == "true"
+
+    vdw_cutoffs = []
+    for line in inp["VDW_Style"].data:
+        tokens = line.split()
+        if tokens[0] == "none":
+            vdw_cutoffs.append(0.0)
+        else:
+            vdw_cutoffs.append(float(tokens[-1]))
+    charge_styles = []
+    charge_cutoffs = []
+    ewald_accuracies = []
+    for line in inp["Charge_Style"].data:
+        tokens = line.split()
+        if tokens[0] == "none":
+            charge_styles.append("none")
+            charge_cutoffs.append(0.0)
+            ewald_accuracies.append(None)
+        else:
+            charge_styles.append(tokens[1])
+            charge_cutoffs.append(float(tokens[2]))
+            if tokens[1] == "ewald":
+                ewald_accuracies.append(float(tokens[3]))
+            else:
+                ewald_accuracies.append(None)
+    cbmc_info = inp["CBMC_Info"]
+    n_insert = int(cbmc_info.get_keyword("kappa_ins"))
+    n_dihed = int(cbmc_info.get_keyword("kappa_dih"))
+    cbmc_cutoffs = [
+        float(cutoff) for cutoff in cbmc_info.get_keyword("rcut_cbmc").split()
+    ]
+
+    # Molecules of each species in each box during the run
+    n_molecules = np.zeros((n_boxes, n_species))
+    for ibox in range(n_boxes):
+        for isp in range(n_species):
+            n_molecules[ibox, isp] = (
+                system.mols_in_boxes[ibox][isp] + system.mols_to_add[ibox][isp]
+            )
+    if moveset.ensemble == "gcmc":
+        for isp in range(n_species):
+            if moveset.insertable[isp]:
+                room = max(max_molecules[isp] - n_molecules[0, isp], 0)
+                n_molecules[0, isp] += 0.5 * room
+
+    species_atoms = np.array(
+        [len(top.atoms) for top in system.species_topologies], dtype=float
+    )
+    species_charges = np.array(
+        [
+            sum(1 for atom in top.atoms if atom.charge != 0.0)
+            for top in system.species_topologies
+        ],
+        dtype=float,
+    )
+    # CBMC grows a molecule one fragment (an atom bonded to two or
+    # more others) at a time
+    species_fragments = np.array(
+        [
+            max(1, sum(1 for atom in top.atoms if len(atom.bonds) > 1))
+            for top in system.species_topologies
+        ],
+        dtype=float,
+    )
+
+    energy_cost = np.zeros((n_boxes, n_species))
+    cbmc_cost = np.zeros((n_boxes, n_species))
+    for ibox, box in enumerate(system.boxes):
+        box_matrix = np.asarray(box.vectors, dtype=float) * 10.0
+        volume = abs(np.linalg.det(box_matrix))
+        n_atoms = np.dot(n_molecules[ibox], species_atoms)
+        n_charges = np.dot(n_molecules[ibox], species_charges)
+        check = n_molecules[ibox].sum() * _MOLECULE_CHECK_COST
+
+        # Fraction of the box within a cutoff, over cutoff**3
+        sphere = 4.0 / 3.0 * np.pi / volume
+        vdw_pairs = n_atoms * sphere * vdw_cutoffs[ibox] ** 3
+        if charge_styles[ibox] == "ewald":
+            charge_pairs = ewald_cost(
+                box_matrix,
+                n_charges,
+                charge_cutoffs[ibox],
+                ewald_accuracies[ibox],
+            )["cost"]
+        else:
+            charge_pairs = n_charges * sphere * charge_cutoffs[ibox] ** 3
+        cbmc_pairs = n_atoms * sphere * cbmc_cutoffs[ibox] ** 3
+
+        energy_cost[ibox] = (
+            check + species_atoms * vdw_pairs + species_charges * charge_pairs
+        )
+        trials = n_insert + n_dihed * (species_fragments - 1.0)
+        cbmc_cost[ibox] = (
+            trials * (check + species_atoms * cbmc_pairs) + energy_cost[ibox]
+        )
+
+    # Average over the molecules that are moved
+    if n_molecules.sum() > 0.0:
+        weights = n_molecules / n_molecules.sum()
+    else:
+        weights = np.zeros((n_boxes, n_species))
+        weights[0] = 1.0 / n_species
+    insert_weights = weights * np.array(moveset.insertable, dtype=float)
+    if insert_weights.sum() > 0.0:
+        insert_weights /= insert_weights.sum()
+    else:
+        insert_weights = weights
+    energy = np.sum(weights * energy_cost)
+    cbmc = np.sum(weights * cbmc_cost)
+    cbmc_insert = np.sum(insert_weights * cbmc_cost)
+    if not pair_energy:
+        # Also compute the energy before the move
+        energy *= 2.0
+
+    move_costs = {
+        "translate": energy,
+        "rotate": energy,
+        "angle": energy,
+        "dihedral": energy,
+        "regrow": 2.0 * cbmc,
+        "insert": cbmc_insert,
+        "swap": 2.0 * cbmc_insert,
+        "volume": 0.5 * np.sum(n_molecules * energy_cost),
+    }
+    probabilities = move_probabilities(moveset)
+    cost_per_step = sum(
+        probability * move_costs[move]
+        for move, probability in probabilities.items()
+    )
+
+    length_info = inp["Simulation_Length_Info"]
+    units = length_info.get_keyword("units")
+    run_length = int(length_info.get_keyword("run"))
+    if units == "steps":
+        steps = run_length
+    elif units == "sweeps":
+        try:
+            steps_per_sweep = int(length_info.get_keyword("steps_per_sweep"))
+        except KeyError:
+            # Cassandra defaults to one step per molecule
+            steps_per_sweep = max(int(n_molecules.sum()), 1)
+        steps = run_length * steps_per_sweep
+    else:
+        steps = None
+
+    return {
+        "n_atoms": np.dot(n_molecules, species_atoms).tolist(),
+        "n_molecules": n_molecules.sum(axis=1).tolist(),
+        "vdw_cutoff": vdw_cutoffs,
+        "charge_style": charge_styles,
+        "charge_cutoff": charge_cutoffs,
+        "pair_energy": pair_energy,
+        "max_molecules": max_molecules,
+        "move_probabilities": probabilities,
+        "cbmc_n_insert": n_insert,
+        "cbmc_n_dihed": n_dihed,
+        "units": units,
+        "run_length": run_length,
+        "steps": steps,
+        "cost_per_step": float(cost_per_step),
+    }
+
+
+def predict_run(system, moveset, run_type, run_length, temperature, **kwargs):
+    """Predict the runtime and memory of a Cassandra simulation
+
+    The input file is generated as in ``mosdef_cassandra.run`` and the
+    work per MC step is computed with ``input_features``. The time per
+    unit of work is calibrated with the timed runs in the history
+    (see ``record_run``) whose work per step is closest to this run.
+    Runs are recorded by ``mosdef_cassandra.run``, in the on-disk
+    cache if one is set with
+    ``mosdef_cassandra.utils.cache.set_cache_dir``. Without a history,
+    a typical time per pair interaction is assumed, so the prediction
+    is only good to an order of magnitude. The time to generate the
+    fragment libraries is not included.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet to simulate
+    run_type : "equilibration" or "production"
+        the type of run
+    run_length : int
+        length of the MC simulation
+    temperature : unyt_quantity
+        temperature at which to perform the MC simulation
+    **kwargs : keyword arguments
+        any other valid keyword arguments, see
+        ``mosdef_cassandra.print_valid_kwargs()`` for details
+
+    Returns
+    -------
+    prediction : dict
+        the wall clock "time" in seconds, the number of "steps", the
+        "steps_per_second", the "memory" Cassandra preallocates in
+        bytes, the number of timed runs the prediction is calibrated
+        with ("n_history"), and the "features" from ``input_features``
+    """
+    inp_data = generate_input(
+        system=system,
+        moveset=moveset,
+        run_type=run_type,
+        run_length=run_length,
+        temperature=temperature,
+        **kwargs,
+    )
+    features = input_features(system, moveset, inp_data)
+    seconds_per_unit, n_history = _seconds_per_unit(features["cost_per_step"])
+    seconds_per_step = seconds_per_unit * features["cost_per_step"]
+    if features["steps"] is None:
+        elapsed = 60.0 * features["run_length"]
+        steps = int(elapsed / seconds_per_step)
+    else:
+        steps = features["steps"]
+        elapsed = steps * seconds_per_step
+    memory = estimate_memory(
+        system, features["max_molecules"], features["pair_energy"]
+    )
+
+    return {
+        "time": elapsed,
+        "steps": steps,
+        "steps_per_second": 1.0 / seconds_per_step,
+        "memory": memory["total"],
+        "n_history": n_history,
+        "features": features,
+    }
+
+
+def record_run(features, elapsed):
+    """Add a timed Cassandra run to the history
+
+    Runs whose length is given in minutes are not recorded since the
+    number of steps is not known in advance.
+
+    Parameters
+    ----------
+    features : dict
+        the features of the run from ``input_features``
+    elapsed : float
+        wall clock time of the run in seconds
+
+    Returns
+    -------
+    dict or None
+        the record with the "cost_per_step", "steps", "time",
+        "n_atoms", "host", and "date"
+    """
+    if features["steps"] is None or features["steps"] <= 0 or elapsed <= 0.0:
+        return None
+    record = {
+        "cost_per_step": features["cost_per_step"],
+        "steps": features["steps"],
+        "time": float(elapsed),
+        "n_atoms": sum(features["n_atoms"]),
+        "host": platform.node(),
+        "date": datetime.datetime.now().isoformat(),
+    }
+    return store_timing(record)
+
+
+def _seconds_per_unit(cost_per_step):
+    """Time per unit of work from the most similar timed runs"""
+    rates = []
+    distances = []
+    for record in get_timings():
+        if record["time"] <= 0.0 or record["cost_per_step"] <= 0.0:
+            continue
+        rates.append(
+            record["time"] / (record["steps"] * record["cost_per_step"])
+        )
+        distances.append(
+            abs(np.log(record["cost_per_step"]) - np.log(cost_per_step))
+        )
+    if len(rates) == 0:
+        return _DEFAULT_SECONDS_PER_UNIT, 0
+    nearest = np.argsort(distances)[:_N_NEIGHBORS]
+    rates = np.array(rates)[nearest]
+    return float(np.exp(np.mean(np.log(rates)))), len(nearest)
+
+
+def _format_prediction(prediction):
+    """Summary of a prediction from ``predict_run``"""
+    if prediction["n_history"] > 0:
+        source = "calibrated with {} past runs".format(prediction["n_history"])
+    else:
+        source = "no past runs recorded, order of magnitude only"
+    return (
+        "Predicted runtime: {} for {} steps ({:.3g} steps/s, {}).\n"
+        "Cassandra will preallocate about {}.".format(
+            _format_duration(prediction["time"]),
+            prediction["steps"],
+            prediction["steps_per_second"],
+            source,
+            format_bytes(prediction["memory"]),
+        )
+    )
+
+
+def _format_duration(seconds):
+    if seconds < 60.0:
+        return "{:.0f} seconds".format(seconds)
+    if seconds < 3600.0:
+        return "{:.1f} minutes".format(seconds / 60.0)
+    if seconds < 86400.0:
+        return "{:.1f} hours".format(seconds / 3600.0)
+    return "{:.1f} days".format(seconds / 86400.0)
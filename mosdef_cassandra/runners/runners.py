@@ -2,8 +2,16 @@ import datetime
 import subprocess
 import os
 import re
+import time
 
 
+from mosdef_cassandra.runners.predict import (
+    _format_prediction,
+    input_features,
+    predict_run,
+    record_run,
+)
+from mosdef_cassandra.runners.utils import check_overlaps
 from mosdef_cassandra.runners.utils import check_system
 from mosdef_cassandra.runners.utils import get_restart_name
 from mosdef_cassandra.writers.writers import write_mcfs
@@ -11,18 +19,29 @@ from mosdef_cassandra.writers.writers import write_configs
 from mosdef_cassandra.writers.writers import write_input
 from mosdef_cassandra.writers.writers import write_pdb
 from mosdef_cassandra.writers.writers import write_restart_input
+from mosdef_cassandra.writers.inp_parser import CassandraInput
 from mosdef_cassandra.utils.detect import detect_cassandra_binaries
 from mosdef_cassandra.utils.exceptions import CassandraRuntimeError
 
 
-def run(system, moveset, run_type, run_length, temperature, **kwargs):
+def run(
+    system,
+    moveset,
+    run_type,
+    run_length,
+    temperature,
+    dry_run=False,
+    **kwargs,
+):
     """Run the Monte Carlo simulation with Cassandra
 
     The following steps are performed: write the molecular connectivity
     files for each species to disk, write the starting structures
     (if any) to disk, generate and write the Cassandra input file to disk,
     call Cassandra to generate the required fragment libraries, and
-    call Cassandra to run the MC simulation.
+    call Cassandra to run the MC simulation. The wall clock time of the
+    simulation is added to the history used to predict the runtime of
+    later runs (see ``mosdef_cassandra.runners.predict.predict_run``).
 
     Parameters
     ----------
@@ -38,11 +57,29 @@ def run(system, moveset, run_type, run_length, temperature, **kwargs):
         length of the MC simulation
     temperature : float
         temperature at which to perform the MC simulation
+    dry_run : boolean, optional, default=False
+        check the inputs and print the predicted runtime and memory
+        without writing any files or running Cassandra
     **kwargs : keyword arguments
         any other valid keyword arguments, see
         ``mosdef_cassandra.print_valid_kwargs()`` for details
+
+    Returns
+    -------
+    prediction : dict or None
+        with ``dry_run``, the prediction from
+        ``mosdef_cassandra.runners.predict.predict_run``
     """
 
+    if dry_run:
+        check_system(system, moveset)
+        check_overlaps(system, kwargs.get("rcut_min"))
+        prediction = predict_run(
+            system, moveset, run_type, run_length, temperature, **kwargs
+        )
+        print(_format_prediction(prediction))
+        return prediction
+
     # Check that the user has the Cassandra binary on their PATH
     # Also need library_setup.py on the PATH and python2
     py, fraglib_setup, cassandra = detect_cassandra_binaries()
@@ -50,12 +87,10 @@ def run(system, moveset, run_type, run_length, temperature, **kwargs):
     # Sanity checks
     # TODO: Write more of these
     check_system(system, moveset)
+    check_overlaps(system, kwargs.get("rcut_min"))
 
     # Write MCF files
-    if "angle_style" in kwargs:
-        write_mcfs(system, angle_style=kwargs["angle_style"])
-    else:
-        write_mcfs(system)
+    write_mcfs(system, angle_style=kwargs.get("angle_style"))
 
     # Write starting configs (if needed)
     write_configs(system)
@@ -92,8 +127,13 @@ def run(system, moveset, run_type, run_length, temperature, **kwargs):
     )
 
     # Run simulation
+    features = input_features(
+        system, moveset, CassandraInput.from_file(inp_file)
+    )
     print("Running Cassandra...")
+    start = time.perf_counter()
     _run_cassandra(cassandra, inp_file, log_file)
+    record_run(features, time.perf_counter() - start)
 
 
 def restart(
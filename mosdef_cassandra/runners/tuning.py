@@ -0,0 +1,535 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+import datetime
+import time
+
+import numpy as np
+import unyt as u
+
+from mosdef_cassandra.analysis.moves import read_move_stats
+from mosdef_cassandra.runners.runners import (
+    _run_cassandra,
+    _run_fraglib_setup,
+)
+from mosdef_cassandra.runners.utils import check_overlaps, check_system
+from mosdef_cassandra.utils.detect import detect_cassandra_binaries
+from mosdef_cassandra.utils.tempdir import temporary_cd, temporary_directory
+from mosdef_cassandra.utils.units import validate_unit
+from mosdef_cassandra.writers.inp_parser import CassandraInput
+from mosdef_cassandra.writers.writers import (
+    write_configs,
+    write_input,
+    write_mcfs,
+    write_pdb,
+)
+
+# MoveSet probability attribute and log file move types of each
+# kind of move. Insertions and deletions share prob_insert.
+_MOVE_TYPES = {
+    "translate": ("prob_translate", ["translate"]),
+    "rotate": ("prob_rotate", ["rotate"]),
+    "regrow": ("prob_regrow", ["regrow"]),
+    "volume": ("prob_volume", ["volume"]),
+    "insert": ("prob_insert", ["insert", "delete"]),
+    "swap": ("prob_swap", ["swap"]),
+    "angle": ("prob_angle", ["angle"]),
+    "dihedral": ("prob_dihedral", ["dihedral"]),
+}
+
+# Log file move types that grow molecules with CBMC
+_CBMC_MOVES = ["insert", "delete", "swap", "regrow"]
+
+
+def run_pilots(
+    system,
+    movesets,
+    run_length,
+    temperature,
+    variations=None,
+    run_type="equilibration",
+    n_procs=1,
+    workdir=None,
+    **kwargs,
+):
+    """Run short Cassandra simulations of one System with several setups
+
+    The MCFs, starting structures, and fragment libraries are written
+    once and shared by every pilot run. Each pilot uses its own MoveSet
+    and keyword arguments and is timed separately.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    movesets : list
+        one mosdef_cassandra.MoveSet per pilot run
+    run_length : int or list
+        length of each pilot run, or a list with one length per run
+    temperature : unyt_quantity
+        temperature of the pilot runs
+    variations : list, optional
+        one dict of keyword arguments per pilot run, merged on top of
+        ``kwargs``
+    run_type : "equilibration" or "production", default="equilibration"
+        the type of each pilot run
+    n_procs : int, optional, default=1
+        number of pilot runs to execute at the same time. Concurrent
+        runs compete for the CPU, so timings are only comparable
+        between runs made with the same ``n_procs``.
+    workdir : str, optional
+        directory to run the pilots in. A temporary directory that is
+        removed afterwards is used by default.
+    **kwargs : keyword arguments
+        any other valid keyword arguments, shared by all pilot runs
+
+    Returns
+    -------
+    pilots : list
+        one dict per pilot run with the "run_name", the wall clock
+        "time" in seconds, and the "moves" read with
+        ``mosdef_cassandra.analysis.moves.read_move_stats``
+    """
+    if workdir is None:
+        with temporary_directory() as tmp_dir:
+            return run_pilots(
+                system,
+                movesets,
+                run_length,
+                temperature,
+                variations=variations,
+                run_type=run_type,
+                n_procs=n_procs,
+                workdir=tmp_dir,
+                **kwargs,
+            )
+
+    if variations is None:
+        variations = [{} for moveset in movesets]
+    if len(variations) != len(movesets):
+        raise ValueError(
+            "variations must have one entry per MoveSet in movesets"
+        )
+    if isinstance(run_length, int):
+        run_length = [run_length] * len(movesets)
+    if len(run_length) != len(movesets):
+        raise ValueError(
+            "run_length must be an int or have one entry per MoveSet"
+        )
+    py, fraglib_setup, cassandra = detect_cassandra_binaries()
+    for moveset in movesets:
+        check_system(system, moveset)
+    check_overlaps(system, kwargs.get("rcut_min"))
+
+    base_name = kwargs.pop("run_name", "pilot")
+    with temporary_cd(workdir):
+        write_mcfs(system, angle_style=kwargs.get("angle_style"))
+        write_configs(system)
+        for isp, top in enumerate(system.species_topologies):
+            write_pdb(top, "species{}.pdb".format(isp + 1))
+
+        inp_files = []
+        for idx, (moveset, variation, length) in enumerate(
+            zip(movesets, variations, run_length)
+        ):
+            pilot_kwargs = {**kwargs, **variation}
+            pilot_kwargs.setdefault(
+                "run_name", "{}.{:03d}".format(base_name, idx)
+            )
+            inp_files.append(
+                write_input(
+                    system=system,
+                    moveset=moveset,
+                    run_type=run_type,
+                    run_length=length,
+                    temperature=temperature,
+                    **pilot_kwargs,
+                )
+            )
+
+        log_file = "mosdef_cassandra_{}.log".format(
+            datetime.datetime.now().strftime("%Y-%m-%d_%H:%M:%S.%f")
+        )
+        _run_fraglib_setup(
+            py,
+            fraglib_setup,
+            cassandra,
+            inp_files[0],
+            log_file,
+            len(system.species_topologies),
+        )
+        # The fragment library setup only fills in the Fragment_Files
+        # of the input it is given; the libraries are shared by all
+        # pilots since they use the same MCFs and temperature
+        fragment_files = CassandraInput.from_file(inp_files[0])[
+            "Fragment_Files"
+        ].data
+        for inp_file in inp_files[1:]:
+            inp = CassandraInput.from_file(inp_file)
+            inp["Fragment_Files"] = fragment_files
+            inp.write(inp_file)
+
+        def run_pilot(inp_file):
+            start = time.perf_counter()
+            _run_cassandra(cassandra, inp_file, inp_file + ".log")
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max(1, n_procs)) as executor:
+            timings = list(executor.map(run_pilot, inp_files))
+
+        pilots = []
+        for inp_file, timing in zip(inp_files, timings):
+            run_name = inp_file[: -len(".inp")]
+            pilots.append(
+                {
+                    "run_name": run_name,
+                    "time": timing,
+                    "moves": read_move_stats(run_name + ".out.log"),
+                }
+            )
+
+    return pilots
+
+
+def move_probabilities(moveset):
+    """Probability of each kind of move in a MoveSet
+
+    Insertions and deletions are attempted with the same probability,
+    so the "insert" entry is twice ``prob_insert``.
+
+    Returns
+    -------
+    probabilities : dict
+        probability of each kind of move that is attempted
+    """
+    probabilities = {}
+    for move, (attribute, log_moves) in _MOVE_TYPES.items():
+        probability = getattr(moveset, attribute) * len(log_moves)
+        if probability > 0.0:
+            probabilities[move] = probability
+    return probabilities
+
+
+def set_move_probabilities(moveset, probabilities):
+    """Return a copy of a MoveSet with new move probabilities
+
+    Parameters
+    ----------
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet to copy
+    probabilities : dict
+        probability of each kind of move, as returned by
+        ``move_probabilities``. Moves that are not listed are not
+        attempted. The probabilities are normalized to sum to one.
+
+    Returns
+    -------
+    mosdef_cassandra.MoveSet
+    """
+    total = sum(probabilities.values())
+    if total <= 0.0:
+        raise ValueError("At least one move probability must be positive")
+    for move in probabilities:
+        if move not in _MOVE_TYPES:
+            raise ValueError(
+                "Unknown move type {}. Valid move types are {}".format(
+                    move, list(_MOVE_TYPES)
+                )
+            )
+
+    # Round to a fixed precision for the input file and give the
+    # remainder to the most likely move so the total is exactly one
+    scaled = {
+        move: round(probability / total, 6)
+        for move, probability in probabilities.items()
+    }
+    largest = max(scaled, key=scaled.get)
+    scaled[largest] = round(scaled[largest] + 1.0 - sum(scaled.values()), 6)
+
+    new_moveset = deepcopy(moveset)
+    for move, (attribute, log_moves) in _MOVE_TYPES.items():
+        probability = scaled.get(move, 0.0) / len(log_moves)
+        setattr(new_moveset, attribute, probability)
+
+    return new_moveset
+
+
+def optimize_move_probabilities(
+    system,
+    moveset,
+    temperature,
+    pilot_length=1000,
+    weights=None,
+    **kwargs,
+):
+    """Choose move probabilities that maximize sampling per CPU-second
+
+    Two pilot runs of the MoveSet, of different lengths, are followed
+    by one pilot run per kind of move, each with half of the
+    probability given to that move. The
+    acceptance ratio of each kind of move is read from the Cassandra
+    logs and its cost per attempt is fit to the run times.
+
+    The time needed to decorrelate the system is modeled as the sum
+    over the kinds of move of ``w / (p * a)``, where ``p`` is the
+    probability, ``a`` the acceptance ratio, and ``w`` the weight of
+    the move. Multiplying by the cost per step, ``sum(p * c)``, the
+    CPU time is smallest for ``p`` proportional to
+    ``sqrt(w / (a * c))``.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet to optimize; the moves it attempts are kept
+    temperature : unyt_quantity
+        temperature of the simulation
+    pilot_length : int, optional, default=1000
+        length of each pilot run
+    weights : dict, optional
+        relative importance of each kind of move ("translate",
+        "rotate", "regrow", "volume", "insert", "swap", "angle",
+        "dihedral") for the properties of interest. Defaults to one
+        for every move.
+    **kwargs : keyword arguments
+        passed to ``run_pilots``, e.g., ``n_procs``, and any valid
+        keyword arguments for the Cassandra input file
+
+    Returns
+    -------
+    mosdef_cassandra.MoveSet
+        a copy of ``moveset`` with optimized move probabilities
+    """
+    if weights is None:
+        weights = {}
+    for move, weight in weights.items():
+        if move not in _MOVE_TYPES:
+            raise ValueError(
+                "Unknown move type {}. Valid move types are {}".format(
+                    move, list(_MOVE_TYPES)
+                )
+            )
+        if weight <= 0.0:
+            raise ValueError("Move weights must be positive")
+    probabilities = move_probabilities(moveset)
+    moves = list(probabilities)
+    if len(moves) < 2:
+        return deepcopy(moveset)
+
+    # Pilot runs: the MoveSet itself, at full and at a tenth of the
+    # length to separate the startup time, and one per move with the
+    # probability of that move boosted
+    base = np.array([probabilities[move] for move in moves])
+    pilot_probabilities = [base, base]
+    run_lengths = [pilot_length, max(pilot_length // 10, 1)]
+    for imove in range(len(moves)):
+        boosted = 0.5 * base
+        boosted[imove] += 0.5
+        pilot_probabilities.append(boosted)
+        run_lengths.append(pilot_length)
+    movesets = [
+        set_move_probabilities(moveset, dict(zip(moves, p)))
+        for p in pilot_probabilities
+    ]
+    pilots = run_pilots(system, movesets, run_lengths, temperature, **kwargs)
+
+    costs = _fit_move_costs(
+        np.array(pilot_probabilities),
+        np.array([pilot["time"] for pilot in pilots]),
+        np.array(run_lengths),
+    )
+    acceptances = _acceptance_ratios(pilots, moves)
+
+    new_probabilities = {}
+    for imove, move in enumerate(moves):
+        if acceptances[move] is None:
+            continue
+        new_probabilities[move] = np.sqrt(
+            weights.get(move, 1.0) / (acceptances[move] * costs[imove])
+        )
+    # Moves that were never attempted keep their original share
+    untouched = sum(
+        probabilities[move] for move in moves if move not in new_probabilities
+    )
+    total = sum(new_probabilities.values())
+    for move in moves:
+        if move in new_probabilities:
+            new_probabilities[move] *= (1.0 - untouched) / total
+        else:
+            new_probabilities[move] = probabilities[move]
+
+    return set_move_probabilities(moveset, new_probabilities)
+
+
+def tune_cbmc(
+    system,
+    moveset,
+    temperature,
+    pilot_length=1000,
+    n_insert=None,
+    n_dihed=None,
+    rcut=None,
+    n_procs=1,
+    **kwargs,
+):
+    """Choose the CBMC settings with the most accepted moves per second
+
+    One pilot run is made for each combination of the candidate
+    ``cbmc_n_insert``, ``cbmc_n_dihed``, and ``cbmc_rcut`` values. The
+    pilot runs are compared by the number of accepted CBMC moves
+    (insertions, deletions, swaps, and regrowths) per CPU-second, after
+    subtracting the startup time, which is estimated from an extra pilot
+    run at a tenth of the length. The best settings are written into
+    ``moveset``.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet to tune; its CBMC settings are updated in place
+    temperature : unyt_quantity
+        temperature of the simulation
+    pilot_length : int, optional, default=1000
+        length of each pilot run
+    n_insert : list, optional
+        candidate values of ``cbmc_n_insert``. Defaults to 5, 10, 20,
+        and 40.
+    n_dihed : list, optional
+        candidate values of ``cbmc_n_dihed``. Defaults to 5, 10, and 20.
+    rcut : list, optional
+        candidate values of ``cbmc_rcut``, as unyt_quantities. Defaults
+        to the current value.
+    n_procs : int, optional, default=1
+        number of pilot runs to execute at the same time. Each
+        Cassandra run uses a single core, so the run times are CPU
+        times as long as ``n_procs`` does not exceed the number of
+        available cores.
+    **kwargs : keyword arguments
+        passed to ``run_pilots`` and any valid keyword arguments for the
+        Cassandra input file
+
+    Returns
+    -------
+    candidates : list
+        one dict per candidate with the "cbmc_n_insert",
+        "cbmc_n_dihed", and "cbmc_rcut", the number of "accepted" CBMC
+        moves, the run "time" in seconds, and the "rate" of accepted
+        moves per second, sorted from the highest to the lowest rate
+    """
+    if n_insert is None:
+        n_insert = [5, 10, 20, 40]
+    if n_dihed is None:
+        n_dihed = [5, 10, 20]
+    if rcut is None:
+        rcut = [moveset.cbmc_rcut[0]]
+    for value in rcut:
+        validate_unit(value, u.dimensions.length, argument_name="rcut")
+    if len(n_insert) == 0 or len(n_dihed) == 0 or len(rcut) == 0:
+        raise ValueError("Each CBMC parameter needs at least one candidate")
+
+    settings = []
+    movesets = []
+    for n_insert_value in n_insert:
+        for n_dihed_value in n_dihed:
+            for rcut_value in rcut:
+                candidate = deepcopy(moveset)
+                candidate.cbmc_n_insert = n_insert_value
+                candidate.cbmc_n_dihed = n_dihed_value
+                candidate.cbmc_rcut = rcut_value
+                settings.append(
+                    {
+                        "cbmc_n_insert": n_insert_value,
+                        "cbmc_n_dihed": n_dihed_value,
+                        "cbmc_rcut": rcut_value,
+                    }
+                )
+                movesets.append(candidate)
+
+    # The last pilot repeats the first candidate at a tenth of the
+    # length to estimate the startup time
+    short_length = max(pilot_length // 10, 1)
+    run_lengths = [pilot_length] * len(movesets) + [short_length]
+    pilots = run_pilots(
+        system,
+        movesets + [movesets[0]],
+        run_lengths,
+        temperature,
+        n_procs=n_procs,
+        **kwargs,
+    )
+    startup = 0.0
+    if pilot_length > short_length:
+        full_time = pilots[0]["time"]
+        short_time = pilots[-1]["time"]
+        startup = (pilot_length * short_time - short_length * full_time) / (
+            pilot_length - short_length
+        )
+
+    candidates = []
+    for setting, pilot in zip(settings, pilots[:-1]):
+        accepted = sum(
+            pilot["moves"].get(move, {}).get("accepted", 0)
+            for move in _CBMC_MOVES
+        )
+        # Never let the startup estimate eat most of a run
+        elapsed = pilot["time"] - min(max(startup, 0.0), 0.5 * pilot["time"])
+        candidates.append(
+            {
+                **setting,
+                "accepted": accepted,
+                "time": pilot["time"],
+                "rate": accepted / elapsed if elapsed > 0.0 else 0.0,
+            }
+        )
+    candidates.sort(key=lambda candidate: candidate["rate"], reverse=True)
+
+    best = candidates[0]
+    moveset.cbmc_n_insert = best["cbmc_n_insert"]
+    moveset.cbmc_n_dihed = best["cbmc_n_dihed"]
+    moveset.cbmc_rcut = best["cbmc_rcut"]
+
+    return candidates
+
+
+def _fit_move_costs(pilot_probabilities, timings, run_lengths):
+    """Least squares fit of the CPU time per attempt of each move
+
+    Each run time is modeled as a fixed startup time plus the run
+    length times the probability-weighted cost of the moves.
+    """
+    n_pilots, n_moves = pilot_probabilities.shape
+    design = np.column_stack(
+        [
+            np.ones(n_pilots),
+            run_lengths[:, np.newaxis] * pilot_probabilities,
+        ]
+    )
+    solution, *_ = np.linalg.lstsq(design, timings, rcond=None)
+    costs = solution[1:]
+    # Timing noise can make cheap moves look free (or worse); clip
+    # the estimates to a small fraction of the largest cost per step
+    mean_cost = np.max((timings - max(solution[0], 0.0)) / run_lengths)
+    if mean_cost <= 0.0:
+        mean_cost = 1.0
+    floor = 1e-3 * max(np.max(costs), mean_cost)
+    return np.where(costs > floor, costs, floor)
+
+
+def _acceptance_ratios(pilots, moves, min_acceptance=1e-3):
+    """Acceptance ratio of each kind of move over all pilot runs"""
+    acceptances = {}
+    for move in moves:
+        attempted = 0
+        accepted = 0
+        for pilot in pilots:
+            for log_move in _MOVE_TYPES[move][1]:
+                stats = pilot["moves"].get(log_move)
+                if stats is not None:
+                    attempted += stats["attempted"]
+                    accepted += stats["accepted"]
+        if attempted == 0:
+            acceptances[move] = None
+        else:
+            acceptances[move] = max(accepted / attempted, min_acceptance)
+    return acceptances
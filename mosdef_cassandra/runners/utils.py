@@ -1,7 +1,9 @@
-import mbuild
 import parmed
 import glob
 import re
+import unyt as u
+
+from mosdef_cassandra.core.box import BoxSnapshot
 
 
 def check_system(system, moveset):
@@ -27,12 +29,10 @@ def check_system(system, moveset):
             )
 
     for box in system.boxes:
-        if not isinstance(box, mbuild.Box) and not isinstance(
-            box, mbuild.Compound
-        ):
+        if not isinstance(box, BoxSnapshot):
             raise TypeError(
-                "Not all System.boxes are mbuild.Box "
-                "or mbuild.Compound objects. It appears "
+                "Not all System.boxes are BoxSnapshot "
+                "objects. It appears "
                 "your System object has been corrupted"
             )
 
@@ -65,6 +65,43 @@ def check_system(system, moveset):
         )
 
 
+def check_overlaps(system, rcut_min=None):
+    """Check the starting structures for overlapping molecules
+
+    Cassandra rejects every move that leaves two atoms closer than
+    ``rcut_min``, so any such intermolecular pair in a starting
+    structure is reported before the simulation is set up.
+    """
+    if rcut_min is None:
+        rcut_min = 1.0 * u.angstrom
+    elif not isinstance(rcut_min, u.unyt_array) or (
+        rcut_min.units.dimensions != u.dimensions.length
+    ):
+        # Invalid values are reported when the input file is written
+        return
+
+    overlaps = system.check_overlaps(rcut_min=rcut_min)
+    for ibox, overlap in enumerate(overlaps):
+        n_pairs = len(overlap["pairs"])
+        if n_pairs > 0:
+            imin = overlap["distances"].argmin()
+            iatom, jatom = overlap["pairs"][imin]
+            raise ValueError(
+                "Box {} contains {} intermolecular atom pair(s) closer "
+                "than rcut_min ({}). The closest are atoms {} and {}, "
+                "{:.3f} angstrom apart. Cassandra rejects every move from "
+                "this configuration; please provide a starting structure "
+                "without overlapping molecules".format(
+                    ibox + 1,
+                    n_pairs,
+                    rcut_min,
+                    iatom + 1,
+                    jatom + 1,
+                    overlap["distances"][imin].to_value("angstrom"),
+                )
+            )
+
+
 def get_restart_name(restart_from, run_name):
     """Get the run name for a restart"""
     if restart_from is None:
@@ -13,6 +13,18 @@ class BaseTest:
         methane = oplsaa.apply(methane)
         return methane
 
+    @pytest.fixture
+    def methane_gmso(self):
+        import forcefield_utilities as ffutils
+        from gmso.external import from_mbuild
+        from gmso.parameterization import apply
+
+        methane = from_mbuild(mbuild.load("C", smiles=True))
+        methane.identify_connections()
+        oplsaa = ffutils.FoyerFFs().load("oplsaa").to_gmso_ff()
+        methane = apply(methane, oplsaa, remove_untyped=True)
+        return methane
+
     @pytest.fixture
     def butane_oplsaa(self):
         oplsaa = foyer.forcefields.load_OPLSAA()
@@ -1,8 +1,10 @@
 import sys
 import pytest
+import subprocess
 import numpy as np
 
-from mosdef_cassandra.analysis import ThermoProps
+from mosdef_cassandra.analysis import ThermoProps, read_move_stats
+from mosdef_cassandra.analysis.moves import acceptance_ratio
 from mosdef_cassandra.tests.base_test import BaseTest
 from mosdef_cassandra.tests.base_test import get_fn
 
@@ -43,6 +45,57 @@ class TestAnalysis(BaseTest):
         assert np.isclose(pressure[0].value, 152.82276)
         assert np.isclose(pressure[-1].value, -2.9842435)
 
+    def test_extract_prop_no_units(self):
+        thermo = ThermoProps(get_fn("equil.out.box1.prp"))
+        pressure = thermo.prop("Pressure", units=False)
+        assert type(pressure) == np.ndarray
+        assert np.isclose(pressure[-1], 42.242944)
+
+    def test_import_without_dependencies(self):
+        # Block the optional and simulation dependencies in a fresh
+        # interpreter; reading a .prp file should only require NumPy
+        code = (
+            "import sys\n"
+            "for mod in ['unyt', 'pandas', 'mbuild', 'gmso', 'parmed', "
+            "'foyer', 'constrainmol']:\n"
+            "    sys.modules[mod] = None\n"
+            "from mosdef_cassandra.analysis import ThermoProps\n"
+            "thermo = ThermoProps(sys.argv[1])\n"
+            "print(thermo.prop('Pressure', units=False)[-1])\n"
+            "try:\n"
+            "    thermo.prop('Pressure')\n"
+            "except ModuleNotFoundError:\n"
+            "    print('no unyt')\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code, get_fn("equil.out.box1.prp")],
+            capture_output=True,
+            universal_newlines=True,
+        )
+        assert result.returncode == 0, result.stderr
+        lines = result.stdout.split()
+        assert np.isclose(float(lines[0]), 42.242944)
+        assert lines[1:] == ["no", "unyt"]
+
+    def test_read_move_stats(self, tmp_path):
+        move_stats = read_move_stats(get_fn("gcmc.out.log"))
+        # The move probabilities echoed from the input are not counted
+        assert move_stats == {
+            "translate": {"attempted": 2512, "accepted": 1193},
+            "rotate": {"attempted": 2476, "accepted": 1317},
+            "insert": {"attempted": 2490, "accepted": 61},
+            "delete": {"attempted": 2522, "accepted": 49},
+        }
+        assert np.isclose(acceptance_ratio(move_stats, "rotate"), 1317 / 2476)
+        assert acceptance_ratio(move_stats, "volume") is None
+
+        # Runs that did not finish have no summary
+        log = tmp_path / "gcmc.out.log"
+        with open(get_fn("gcmc.out.log")) as f:
+            log.write_text(f.read().split("Writing information")[0])
+        with pytest.raises(ValueError, match=r"No move statistics"):
+            read_move_stats(str(log))
+
     @pytest.mark.skipif(not has_pandas, reason="pandas not installed")
     def test_to_df(self):
         thermo = ThermoProps(get_fn("equil.out.box1.prp"))
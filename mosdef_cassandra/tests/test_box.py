@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import mbuild
+import unyt as u
+
+from mosdef_cassandra.core.box import BoxSnapshot
+from mosdef_cassandra.tests.base_test import BaseTest
+
+
+class TestBoxSnapshot(BaseTest):
+    def test_from_compound(self, methane_single):
+        snapshot = BoxSnapshot.from_mbuild(methane_single)
+        assert snapshot.occupied
+        assert snapshot.n_particles == methane_single.n_particles
+        assert np.allclose(snapshot.xyz, methane_single.xyz)
+        assert list(snapshot.names) == [
+            particle.name for particle in methane_single.particles()
+        ]
+        assert np.allclose(snapshot.vectors, methane_single.box.vectors)
+
+    def test_from_box(self, box):
+        snapshot = BoxSnapshot.from_mbuild(box)
+        assert not snapshot.occupied
+        assert snapshot.n_particles == 0
+        assert np.allclose(snapshot.lengths, [5.0, 5.0, 5.0])
+        assert np.allclose(snapshot.angles, [90.0, 90.0, 90.0])
+
+    def test_invalid(self):
+        with pytest.raises(TypeError, match=r"mbuild.Compound or mbuild.Box"):
+            BoxSnapshot.from_mbuild(np.zeros((3, 3)))
+        with pytest.raises(ValueError, match=r"particle names"):
+            BoxSnapshot(np.zeros((3, 3)), ["C", "H"])
+
+    def test_copy_on_write(self):
+        snapshot = BoxSnapshot(np.zeros((2, 3)), ["C", "C"], np.eye(3))
+        copy = snapshot.copy()
+        assert copy.xyz is snapshot.xyz
+        with pytest.raises(ValueError, match=r"read-only"):
+            copy.xyz[0, 0] = 1.0
+        copy.xyz = np.ones((2, 3))
+        assert np.allclose(copy.xyz, 1.0)
+        assert np.allclose(snapshot.xyz, 0.0)
+        with pytest.raises(ValueError, match=r"must have shape"):
+            copy.xyz = np.ones((3, 3))
+
+    def test_save(self, tmp_path):
+        xyz = np.array([[0.0, 0.0, 0.0], [0.1, 0.2, 0.3]])
+        snapshot = BoxSnapshot(xyz, ["C", "H"], np.eye(3))
+        filename = str(tmp_path / "box1.in.xyz")
+        snapshot.save(filename)
+        with open(filename) as f:
+            lines = f.readlines()
+        assert lines[0].strip() == "2"
+        assert lines[3].split()[0] == "H"
+        assert np.allclose(
+            [float(x) for x in lines[3].split()[1:]], xyz[1] * 10
+        )
+
+    def test_to_mbuild(self):
+        xyz = np.array([[0.0, 0.0, 0.0], [0.1, 0.2, 0.3]])
+        snapshot = BoxSnapshot(xyz, ["C", "H"], 2.0 * np.eye(3))
+        compound = snapshot.to_mbuild()
+        assert isinstance(compound, mbuild.Compound)
+        assert np.allclose(compound.xyz, xyz)
+        assert np.allclose(compound.box.lengths, [2.0, 2.0, 2.0])
+        empty = BoxSnapshot(np.zeros((0, 3)), [], 2.0 * np.eye(3))
+        assert isinstance(empty.to_mbuild(), mbuild.Box)
+
+    def test_from_array(self):
+        xyz = np.array([[0.0, 0.0, 0.0], [0.1, 0.2, 0.3]])
+        snapshot = BoxSnapshot.from_array(xyz, [2.0, 3.0, 4.0])
+        assert snapshot.occupied
+        assert snapshot.names is None
+        assert np.allclose(snapshot.vectors, np.diag([2.0, 3.0, 4.0]))
+        snapshot = BoxSnapshot.from_array(
+            xyz * 10.0 * u.angstrom, np.eye(3) * 20.0 * u.angstrom
+        )
+        assert np.allclose(snapshot.xyz, xyz)
+        assert np.allclose(snapshot.vectors, 2.0 * np.eye(3))
+        named = snapshot.with_names(["C", "H"])
+        assert list(named.names) == ["C", "H"]
+        assert snapshot.names is None
+        with pytest.raises(ValueError, match=r"must have shape"):
+            BoxSnapshot.from_array(np.zeros(3), np.eye(3))
+        with pytest.raises(ValueError, match=r"box must be"):
+            BoxSnapshot.from_array(xyz, np.eye(2))
+
+    def test_from_cassandra(self, tmp_path):
+        xyz_file = tmp_path / "nvt.out.xyz"
+        h_file = tmp_path / "nvt.out.H"
+        with open(xyz_file, "w") as f:
+            for step in [100, 200]:
+                f.write("2\n MC_STEP: {}\n".format(step))
+                f.write("C 0.0 0.0 0.0\n")
+                f.write("H 1.0 2.0 {}\n".format(step / 100.0))
+        with open(h_file, "w") as f:
+            for length in [30.0, 40.0]:
+                f.write("{}\n".format(length**3))
+                for row in np.eye(3) * length:
+                    f.write("{} {} {}\n".format(*row))
+                f.write("\n1\n1 1\n")
+        snapshot = BoxSnapshot.from_cassandra(str(xyz_file), str(h_file))
+        assert list(snapshot.names) == ["C", "H"]
+        assert np.allclose(snapshot.xyz[1], [0.1, 0.2, 0.2])
+        assert np.allclose(snapshot.vectors, 4.0 * np.eye(3))
+        snapshot = BoxSnapshot.from_cassandra(
+            str(xyz_file), str(h_file), frame=0
+        )
+        assert np.allclose(snapshot.xyz[1], [0.1, 0.2, 0.1])
+        assert np.allclose(snapshot.vectors, 3.0 * np.eye(3))
+        with pytest.raises(ValueError, match=r"not found"):
+            BoxSnapshot.from_cassandra(str(xyz_file), str(h_file), frame=2)
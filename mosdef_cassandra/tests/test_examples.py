@@ -139,12 +139,12 @@ class TestExamples(BaseTest):
                         ex.run_nvt_mbuild(fix_bonds)
 
     def test_run_failure(self):
+        # Cutoffs longer than half the box are rejected before
+        # Cassandra is started
         custom_args = {"vdw_cutoff": 17.0 * u.angstrom}
         with temporary_directory() as tmp_dir:
             with temporary_cd(tmp_dir):
-                with pytest.raises(
-                    CassandraRuntimeError, match=r"Cassandra exited with"
-                ):
+                with pytest.raises(ValueError, match=r"vdw_cutoff of box 1"):
                     ex.run_nvt(**custom_args)
 
     def test_run_npt(self):
@@ -0,0 +1,47 @@
+import pytest
+import subprocess
+import sys
+
+import mosdef_cassandra as mc
+from mosdef_cassandra.tests.base_test import BaseTest
+
+
+class TestImports(BaseTest):
+    def test_lazy_import(self):
+        # Run in a fresh interpreter; the test session has already
+        # imported the heavy dependencies
+        code = (
+            "import sys; import mosdef_cassandra; "
+            "heavy = ['mbuild', 'gmso', 'parmed', 'foyer', 'constrainmol']; "
+            "print([mod for mod in heavy if mod in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            universal_newlines=True,
+        )
+        assert result.returncode == 0
+        assert result.stdout.strip() == "[]"
+
+    def test_public_api(self):
+        from mosdef_cassandra.core.system import System
+        from mosdef_cassandra.core.moveset import MoveSet
+        from mosdef_cassandra.runners.runners import run, restart
+
+        assert mc.System is System
+        assert mc.MoveSet is MoveSet
+        assert mc.run is run
+        assert mc.restart is restart
+        assert callable(mc.print_valid_kwargs)
+        assert callable(mc.print_inputfile)
+        assert "System" in dir(mc)
+
+    def test_submodule_access(self):
+        import mosdef_cassandra.analysis
+
+        assert mc.analysis is mosdef_cassandra.analysis
+        assert mc.analysis.ThermoProps is not None
+
+    def test_invalid_attribute(self):
+        with pytest.raises(AttributeError, match=r"not_an_attribute"):
+            mc.not_an_attribute
@@ -1,9 +1,11 @@
 import pytest
 import warnings
+import numpy as np
 import unyt as u
 import mosdef_cassandra as mc
 
-from mosdef_cassandra.tests.base_test import BaseTest
+from mosdef_cassandra.tests.base_test import BaseTest, get_fn
+from mosdef_cassandra.utils.cache import clear_move_size_cache
 from unyt.exceptions import IterableUnitCoercionError
 
 
@@ -19,6 +21,16 @@ class TestMoveSet(BaseTest):
         ):
             moveset = mc.MoveSet("nvt", methane_oplsaa)
 
+    def test_gmso_species(self, methane_gmso, methane_oplsaa):
+        gmso_moveset = mc.MoveSet("nvt", [methane_gmso])
+        parmed_moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        assert gmso_moveset.prob_regrow == parmed_moveset.prob_regrow
+        assert gmso_moveset.prob_rotate == parmed_moveset.prob_rotate
+        assert (
+            gmso_moveset.prob_regrow_species
+            == parmed_moveset.prob_regrow_species
+        )
+
     def test_invalid_species_type(self):
         with pytest.raises(
             TypeError,
@@ -420,6 +432,10 @@ class TestMoveSet(BaseTest):
             moveset.max_translate = [[1.0 * u.angstrom], [-1.0 * u.angstrom]]
         moveset.max_translate = [[1.0 * u.angstrom], [1 * u.angstrom]]
         assert moveset.max_translate[1][0] == 1.0 * u.angstrom
+        # Stored in the units of the Cassandra input file
+        moveset.max_translate = [[0.1 * u.nm], [0.2 * u.nm]]
+        assert moveset.max_translate.units == u.angstrom
+        assert np.allclose(moveset.max_translate.to_value(), [[1.0], [2.0]])
 
         with pytest.raises(TypeError, match=r"must be a list"):
             moveset.max_rotate = 1.0 * u.degree
@@ -624,3 +640,64 @@ class TestMoveSet(BaseTest):
             AttributeError, match=r"Ensemble cannot be changed"
         ):
             moveset.ensemble = "nvt"
+
+    def test_seed_move_sizes(self, methane_oplsaa, butane_oplsaa):
+        clear_move_size_cache()
+        species = [methane_oplsaa, butane_oplsaa]
+        moveset = mc.MoveSet("npt", species)
+        assert not moveset.seed_move_sizes(species, 300.0 * u.K)
+
+        moveset.max_translate = [[0.5 * u.angstrom, 0.3 * u.angstrom]]
+        moveset.max_rotate = [[40.0 * u.degree, 20.0 * u.degree]]
+        moveset.max_volume = 200.0 * u.angstrom**3
+        moveset.cache_move_sizes(species, 300.0 * u.K, 1.0 * u.bar)
+        moveset.max_translate = [[1.5 * u.angstrom, 1.3 * u.angstrom]]
+        moveset.cache_move_sizes(species, 400.0 * u.K, 1.0 * u.bar)
+
+        new_moveset = mc.MoveSet("npt", species)
+        assert new_moveset.seed_move_sizes(species, 310.0 * u.K, 1.0 * u.bar)
+        assert np.allclose(
+            new_moveset.max_translate.to_value("angstrom"), [[0.5, 0.3]]
+        )
+        assert np.allclose(
+            new_moveset.max_rotate.to_value("degree"), [[40.0, 20.0]]
+        )
+        assert np.allclose(
+            new_moveset.max_volume.to_value("angstrom**3"), [200.0]
+        )
+        assert new_moveset.seed_move_sizes(species, 390.0 * u.K)
+        assert np.allclose(
+            new_moveset.max_translate.to_value("angstrom"), [[1.5, 1.3]]
+        )
+
+        # Other ensembles and species have their own entries
+        nvt_moveset = mc.MoveSet("nvt", species)
+        assert not nvt_moveset.seed_move_sizes(species, 300.0 * u.K)
+        with pytest.raises(TypeError, match=r"one element for each species"):
+            new_moveset.seed_move_sizes([methane_oplsaa], 300.0 * u.K)
+        clear_move_size_cache()
+
+    def test_cache_move_sizes_from_checkpoint(
+        self, methane_oplsaa, butane_oplsaa
+    ):
+        clear_move_size_cache()
+        species = [methane_oplsaa, butane_oplsaa]
+        moveset = mc.MoveSet("npt", species)
+        moveset.cache_move_sizes(
+            species,
+            300.0 * u.K,
+            1.0 * u.bar,
+            checkpoint=get_fn("npt.out.chk"),
+        )
+        new_moveset = mc.MoveSet("npt", species)
+        assert new_moveset.seed_move_sizes(species, 300.0 * u.K, 1.0 * u.bar)
+        assert np.allclose(
+            new_moveset.max_translate.to_value("angstrom"), [[0.75, 0.41]]
+        )
+        assert np.allclose(
+            new_moveset.max_rotate.to_value("degree"), [[30.0, 20.0]]
+        )
+        assert np.allclose(
+            new_moveset.max_volume.to_value("angstrom**3"), [250.0]
+        )
+        clear_move_size_cache()
@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+import unyt as u
+
+import mosdef_cassandra as mc
+from mosdef_cassandra.core.packing import pack_box
+from mosdef_cassandra.tests.base_test import BaseTest
+
+
+class TestPackBox(BaseTest):
+    @pytest.mark.parametrize("method", ["lattice", "random"])
+    def test_pack_box(self, methane_oplsaa, butane_oplsaa, box, method):
+        packed, mols_in_box = pack_box(
+            [methane_oplsaa, butane_oplsaa],
+            [200, 100],
+            box,
+            method=method,
+            seed=12,
+        )
+        assert mols_in_box == [200, 100]
+        assert packed.occupied
+        assert packed.n_particles == 200 * 5 + 100 * 14
+        assert np.allclose(packed.vectors, box.vectors)
+
+        system = mc.System(
+            [packed],
+            [methane_oplsaa, butane_oplsaa],
+            mols_in_boxes=[mols_in_box],
+        )
+        overlaps = system.check_overlaps(rcut_min=1.0 * u.angstrom)
+        assert len(overlaps[0]["pairs"]) == 0
+
+    def test_pack_box_reproducible(self, methane_oplsaa):
+        packed1, _ = pack_box([methane_oplsaa], [50], [3.0, 3.0, 3.0], seed=1)
+        packed2, _ = pack_box([methane_oplsaa], [50], [3.0, 3.0, 3.0], seed=1)
+        assert np.allclose(packed1.xyz, packed2.xyz)
+
+    def test_pack_box_rigid_copies(self, methane_oplsaa):
+        packed, _ = pack_box([methane_oplsaa], [20], [3.0, 3.0, 3.0])
+        n_atoms = len(methane_oplsaa.atoms)
+        xyz = packed.xyz.reshape(20, n_atoms, 3)
+        distances = np.linalg.norm(
+            xyz[:, :, np.newaxis] - xyz[:, np.newaxis, :], axis=-1
+        )
+        # Every molecule is a rotated copy of the same geometry
+        assert np.allclose(distances, distances[0])
+
+    def test_pack_box_too_dense(self, methane_oplsaa):
+        with pytest.raises(ValueError, match=r"Unable to place"):
+            pack_box([methane_oplsaa], [5000], [2.0, 2.0, 2.0], max_rounds=5)
+
+    def test_invalid_args(self, methane_oplsaa, box):
+        with pytest.raises(TypeError, match=r"one element for each species"):
+            pack_box([methane_oplsaa], [10, 10], box)
+        with pytest.raises(TypeError, match=r"non-negative integer"):
+            pack_box([methane_oplsaa], [10.0], box)
+        with pytest.raises(ValueError, match=r"lattice"):
+            pack_box([methane_oplsaa], [10], box, method="grid")
+        with pytest.raises(TypeError, match=r"min_distance"):
+            pack_box([methane_oplsaa], [10], box, min_distance=2.0)
@@ -0,0 +1,128 @@
+import pytest
+from pathlib import Path
+import numpy as np
+import unyt as u
+
+import mosdef_cassandra as mc
+from mosdef_cassandra.runners.predict import (
+    input_features,
+    predict_run,
+    record_run,
+)
+from mosdef_cassandra.tests.base_test import BaseTest
+from mosdef_cassandra.utils.cache import (
+    clear_timing_cache,
+    get_timings,
+    set_cache_dir,
+)
+from mosdef_cassandra.utils.tempdir import temporary_cd, temporary_directory
+from mosdef_cassandra.writers.inp_functions import generate_input
+
+
+class TestPredict(BaseTest):
+    @pytest.fixture
+    def cache_dir(self, tmp_path):
+        clear_timing_cache()
+        set_cache_dir(tmp_path)
+        yield tmp_path
+        set_cache_dir(None)
+        clear_timing_cache()
+
+    @pytest.fixture
+    def system(self, methane_oplsaa, box):
+        return mc.System([box], [methane_oplsaa], mols_to_add=[[100]])
+
+    def features(self, system, moveset, **kwargs):
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=1000,
+            temperature=300.0 * u.K,
+            **kwargs,
+        )
+        return input_features(system, moveset, inp_data)
+
+    def test_input_features(self, methane_oplsaa, system):
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        features = self.features(system, moveset)
+        assert features["steps"] == 1000
+        assert features["n_atoms"] == [500.0]
+        assert features["vdw_cutoff"] == [12.0]
+        assert features["pair_energy"]
+        assert features["cost_per_step"] > 0.0
+
+        short = self.features(system, moveset, vdw_cutoff=8.0 * u.angstrom)
+        assert short["cost_per_step"] < features["cost_per_step"]
+        no_pairs = self.features(system, moveset, pair_energy=False)
+        assert no_pairs["cost_per_step"] > features["cost_per_step"]
+
+        sweeps = self.features(
+            system, moveset, units="sweeps", steps_per_sweep=10
+        )
+        assert sweeps["steps"] == 10000
+        minutes = self.features(system, moveset, units="minutes")
+        assert minutes["steps"] is None
+
+    def test_predict_run(self, cache_dir, methane_oplsaa, system):
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        prediction = predict_run(
+            system, moveset, "equilibration", 1000, 300.0 * u.K
+        )
+        assert prediction["n_history"] == 0
+        assert prediction["steps"] == 1000
+        assert prediction["memory"] > 0
+
+        # Past runs at 1e-7 seconds per pair interaction
+        features = prediction["features"]
+        for scale in [0.5, 1.0, 2.0]:
+            past = dict(
+                features, cost_per_step=scale * features["cost_per_step"]
+            )
+            record_run(past, 1e-7 * past["steps"] * past["cost_per_step"])
+        assert len(get_timings()) == 3
+        assert record_run(dict(features, steps=None), 1.0) is None
+
+        prediction = predict_run(
+            system, moveset, "equilibration", 5000, 300.0 * u.K
+        )
+        assert prediction["n_history"] == 3
+        assert np.isclose(
+            prediction["time"], 5000 * features["cost_per_step"] * 1e-7
+        )
+
+        # The history is kept on disk
+        clear_timing_cache()
+        assert len(get_timings()) == 3
+        clear_timing_cache(disk=True)
+        assert len(get_timings()) == 0
+
+    def test_switch_cache_dir(self, cache_dir, tmp_path_factory):
+        features = {"steps": 1000, "cost_per_step": 1.0, "n_atoms": [10.0]}
+        record_run(features, 1.0)
+        assert len(get_timings()) == 1
+        other_dir = tmp_path_factory.mktemp("other")
+        set_cache_dir(other_dir)
+        assert len(get_timings()) == 0
+        record_run(features, 2.0)
+        # The history in the first directory is not overwritten
+        set_cache_dir(cache_dir)
+        assert len(get_timings()) == 1
+        set_cache_dir(other_dir)
+        assert len(get_timings()) == 1
+
+    def test_dry_run(self, methane_oplsaa, system, capsys):
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        with temporary_directory() as tmp_dir:
+            with temporary_cd(tmp_dir):
+                prediction = mc.run(
+                    system,
+                    moveset,
+                    "equilibration",
+                    1000,
+                    300.0 * u.K,
+                    dry_run=True,
+                )
+                assert len(list(Path(".").iterdir())) == 0
+        assert prediction["steps"] == 1000
+        assert "Predicted runtime" in capsys.readouterr().out
@@ -1,5 +1,7 @@
 import pytest
 from pathlib import Path
+import numpy as np
+import unyt as u
 
 import mosdef_cassandra as mc
 from mosdef_cassandra.tests.base_test import BaseTest
@@ -52,6 +54,20 @@ class TestRunners(BaseTest):
             system.mols_in_boxes[0][0] = 10
             mc.run(system, moveset, 300.0, "equilibration", 500)
 
+    def test_overlapping_molecules(self, methane_oplsaa, methane_single):
+        xyz = methane_single.xyz
+        system = mc.System(
+            [(np.vstack([xyz, xyz + 0.005]), np.diag([3.0, 3.0, 3.0]))],
+            [methane_oplsaa],
+            mols_in_boxes=[[2]],
+        )
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        with temporary_directory() as tmp_dir:
+            with temporary_cd(tmp_dir):
+                with pytest.raises(ValueError, match=r"closer than rcut_min"):
+                    mc.run(system, moveset, "equilibration", 500, 300.0 * u.K)
+                assert len(list(Path(".").iterdir())) == 0
+
     def test_restart_run_name_simple(self):
         restart_from, run_name = get_restart_name("equil", "equil.rst")
         assert run_name == "equil.rst"
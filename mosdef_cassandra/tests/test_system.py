@@ -1,4 +1,7 @@
 import pytest
+import mbuild
+import numpy as np
+import unyt as u
 
 import mosdef_cassandra as mc
 from mosdef_cassandra.tests.base_test import BaseTest
@@ -80,6 +83,36 @@ class TestSystem(BaseTest):
             system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
             system.boxes = [box]
 
+    def test_boxes_protected(self, methane_oplsaa, methane_single):
+        system = mc.System(
+            [methane_single], [methane_oplsaa], mols_in_boxes=[[1]]
+        )
+        xyz = system.boxes[0].xyz.copy()
+        # Changes to the original compound do not affect the system
+        methane_single.translate([1.0, 1.0, 1.0])
+        assert np.allclose(system.boxes[0].xyz, xyz)
+        # And the stored coordinates cannot be edited in place
+        with pytest.raises(ValueError, match=r"read-only"):
+            system.boxes[0].xyz[0] = 0.0
+
+    def test_array_box(self, methane_oplsaa, methane_single):
+        xyz = methane_single.xyz
+        system = mc.System(
+            [(xyz, methane_single.box.vectors)],
+            [methane_oplsaa],
+            mols_in_boxes=[[1]],
+        )
+        assert system.boxes[0].occupied
+        assert list(system.boxes[0].names) == [
+            atom.name for atom in methane_oplsaa.atoms
+        ]
+        with pytest.raises(ValueError, match=r"number of atoms"):
+            mc.System(
+                [(xyz, methane_single.box.vectors)],
+                [methane_oplsaa],
+                mols_in_boxes=[[2]],
+            )
+
     def test_edit_topologies(self, methane_oplsaa, box):
         with pytest.raises(AttributeError, match=r"cannot be modified"):
             system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
@@ -95,3 +128,264 @@ class TestSystem(BaseTest):
         system.mols_to_add = [[100]]
 
         assert system.mols_to_add == [[100]]
+
+    def test_fix_bonds(self, butane_oplsaa):
+        butane = mbuild.load("CCCC", smiles=True)
+        filled = mbuild.fill_box(butane, n_compounds=10, box=[3.0, 3.0, 3.0])
+        system = mc.System([filled], [butane_oplsaa], mols_in_boxes=[[10]])
+        top = system.species_topologies[0]
+        xyz = system.boxes[0].xyz.reshape(10, len(top.atoms), 3) * 10.0
+        for bond in top.bonds:
+            lengths = np.linalg.norm(
+                xyz[:, bond.atom1.idx] - xyz[:, bond.atom2.idx], axis=1
+            )
+            assert np.allclose(lengths, bond.type.req, rtol=1e-5)
+
+    def test_fix_bonds_report(self, butane_oplsaa):
+        butane = mbuild.load("CCCC", smiles=True)
+        filled = mbuild.fill_box(butane, n_compounds=10, box=[3.0, 3.0, 3.0])
+        system = mc.System([filled], [butane_oplsaa], mols_in_boxes=[[10]])
+        # Constraints are already satisfied after construction
+        report = system.fix_bonds()
+        assert report == {"checked": 10, "corrected": 0, "solver": 0}
+        # Distort two molecules and send them to the solver in parallel
+        n_atoms = len(system.species_topologies[0].atoms)
+        xyz = system.boxes[0].xyz.copy()
+        xyz[: 2 * n_atoms] *= 1.01
+        system.boxes[0].xyz = xyz
+        report = system.fix_bonds(max_iterations=1, n_procs=2)
+        assert report["checked"] == 10
+        assert report["corrected"] == 2
+        assert report["solver"] == 2
+        xyz = system.boxes[0].xyz.reshape(10, n_atoms, 3) * 10.0
+        top = system.species_topologies[0]
+        for bond in top.bonds:
+            lengths = np.linalg.norm(
+                xyz[:, bond.atom1.idx] - xyz[:, bond.atom2.idx], axis=1
+            )
+            assert np.allclose(lengths, bond.type.req, rtol=1e-5)
+
+    def test_species_cache(self, butane_oplsaa, box):
+        system1 = mc.System(
+            [box], [butane_oplsaa], mols_to_add=[[10]], release_solver=False
+        )
+        system2 = mc.System(
+            [box], [butane_oplsaa], mols_to_add=[[10]], release_solver=False
+        )
+        assert (
+            system1._constrained_species[0] is system2._constrained_species[0]
+        )
+        assert np.allclose(
+            system1.species_topologies[0].coordinates,
+            system2.species_topologies[0].coordinates,
+        )
+
+    def test_save_load(self, tmp_path, butane_oplsaa, box):
+        butane = mbuild.load("CCCC", smiles=True)
+        filled = mbuild.fill_box(butane, n_compounds=10, box=[3.0, 3.0, 3.0])
+        system = mc.System(
+            [filled, box],
+            [butane_oplsaa],
+            mols_in_boxes=[[10], [0]],
+            mols_to_add=[[0], [5]],
+        )
+        filename = str(tmp_path / "system.npz")
+        system.save(filename)
+        loaded = mc.System.load(filename)
+        assert loaded.mols_in_boxes == system.mols_in_boxes
+        assert loaded.mols_to_add == system.mols_to_add
+        assert np.allclose(loaded.boxes[0].xyz, system.boxes[0].xyz)
+        assert list(loaded.boxes[0].names) == list(system.boxes[0].names)
+        assert np.allclose(loaded.boxes[0].vectors, system.boxes[0].vectors)
+        assert not loaded.boxes[1].occupied
+        assert np.allclose(
+            loaded.species_topologies[0].coordinates,
+            system.species_topologies[0].coordinates,
+        )
+        loaded_top = loaded.species_topologies[0]
+        top = system.species_topologies[0]
+        assert len(loaded_top.atoms) == len(top.atoms)
+        assert [atom.type for atom in loaded_top.atoms] == [
+            atom.type for atom in top.atoms
+        ]
+        assert np.allclose(
+            [atom.charge for atom in loaded_top.atoms],
+            [atom.charge for atom in top.atoms],
+        )
+        assert np.allclose(
+            [atom.sigma for atom in loaded_top.atoms],
+            [atom.sigma for atom in top.atoms],
+        )
+        assert np.allclose(
+            [bond.type.req for bond in loaded_top.bonds],
+            [bond.type.req for bond in top.bonds],
+        )
+        assert np.allclose(
+            [angle.type.theteq for angle in loaded_top.angles],
+            [angle.type.theteq for angle in top.angles],
+        )
+        assert len(loaded_top.rb_torsions) == len(top.rb_torsions)
+        assert np.allclose(
+            [torsion.type.c1 for torsion in loaded_top.rb_torsions],
+            [torsion.type.c1 for torsion in top.rb_torsions],
+        )
+        assert loaded.fix_bonds()["corrected"] == 0
+
+        # Files are plain arrays and can be read without pickle
+        with np.load(filename, allow_pickle=False) as data:
+            assert all(data[key].dtype != object for key in data.files)
+
+    def test_load_missing(self):
+        with pytest.raises(FileNotFoundError, match=r"does not exist"):
+            mc.System.load("missing.npz")
+
+    def test_gmso_conversion_cached(self, methane_gmso, box):
+        from mosdef_cassandra.core.system import _gmso_conversions
+
+        system1 = mc.System([box], [methane_gmso], mols_to_add=[[10]])
+        structure = _gmso_conversions[methane_gmso][1]
+        system2 = mc.System([box], [methane_gmso], mols_to_add=[[10]])
+        assert _gmso_conversions[methane_gmso][1] is structure
+        # Each System keeps its own copy of the converted structure
+        assert (
+            system1.species_topologies[0] is not system2.species_topologies[0]
+        )
+        assert system1.species_topologies[0] is not structure
+        assert len(system1.species_topologies[0].atoms) == 5
+
+        # Changing the force field parameters converts the topology again
+        site = methane_gmso.sites[0]
+        site.charge = site.charge + 0.1 * u.elementary_charge
+        system3 = mc.System([box], [methane_gmso], mols_to_add=[[10]])
+        assert _gmso_conversions[methane_gmso][1] is not structure
+        assert np.isclose(
+            system3.species_topologies[0].atoms[0].charge,
+            system1.species_topologies[0].atoms[0].charge + 0.1,
+        )
+
+    def test_release_solver(self, butane_oplsaa):
+        butane = mbuild.load("CCCC", smiles=True)
+        filled = mbuild.fill_box(butane, n_compounds=10, box=[3.0, 3.0, 3.0])
+        system = mc.System([filled], [butane_oplsaa], mols_in_boxes=[[10]])
+        assert system._constrained_species == [None]
+        # The solver is rebuilt when needed and released again
+        n_atoms = len(system.species_topologies[0].atoms)
+        xyz = system.boxes[0].xyz.copy()
+        xyz[:n_atoms] *= 1.01
+        system.boxes[0].xyz = xyz
+        report = system.fix_bonds(max_iterations=1)
+        assert report["solver"] == 1
+        assert system._constrained_species == [None]
+
+        system = mc.System(
+            [filled],
+            [butane_oplsaa],
+            mols_in_boxes=[[10]],
+            release_solver=False,
+        )
+        assert system._constrained_species[0] is not None
+        system.release_solvers()
+        assert system._constrained_species == [None]
+
+    def test_fix_bonds_rigid(self, methane_oplsaa):
+        methane = mbuild.load("C", smiles=True)
+        filled = mbuild.fill_box(methane, n_compounds=10, box=[3.0, 3.0, 3.0])
+        system = mc.System([filled], [methane_oplsaa], mols_in_boxes=[[10]])
+        template = system.species_topologies[0].coordinates
+        n_atoms = len(template)
+        xyz = filled.xyz.copy()
+        # Rotate the first H about the C to distort the H-C-H angles,
+        # then stretch the bond to the second H
+        c_xyz, h1_xyz, h2_xyz = xyz[0], xyz[1], xyz[2]
+        axis = np.cross(h1_xyz - c_xyz, h2_xyz - c_xyz)
+        axis /= np.linalg.norm(axis)
+        theta = np.radians(20.0)
+        bond = h1_xyz - c_xyz
+        xyz[1] = c_xyz + (
+            bond * np.cos(theta)
+            + np.cross(axis, bond) * np.sin(theta)
+            + axis * np.dot(axis, bond) * (1.0 - np.cos(theta))
+        )
+        xyz[2] = c_xyz + 1.05 * (h2_xyz - c_xyz)
+
+        def angle(mol_xyz):
+            v1 = mol_xyz[1] - mol_xyz[0]
+            v2 = mol_xyz[2] - mol_xyz[0]
+            return np.degrees(
+                np.arccos(
+                    np.dot(v1, v2) / np.linalg.norm(v1) / np.linalg.norm(v2)
+                )
+            )
+
+        box_matrix = np.diag(filled.box.lengths)
+        # Flexible angles are kept; only the bonds are constrained
+        system = mc.System(
+            [(xyz, box_matrix)], [methane_oplsaa], mols_in_boxes=[[10]]
+        )
+        mol_xyz = system.boxes[0].xyz[:n_atoms] * 10.0
+        bonds, bond_lengths = system._bond_constraints[0]
+        assert np.allclose(
+            np.linalg.norm(
+                mol_xyz[bonds[:, 0]] - mol_xyz[bonds[:, 1]], axis=1
+            ),
+            bond_lengths,
+        )
+        assert np.abs(angle(mol_xyz) - angle(template)) > 10.0
+
+        # Fixed angles snap the molecule onto the species geometry
+        system = mc.System(
+            [(xyz, box_matrix)],
+            [methane_oplsaa],
+            mols_in_boxes=[[10]],
+            angle_style="fixed",
+        )
+        mol_xyz = system.boxes[0].xyz.reshape(10, n_atoms, 3) * 10.0
+        distances = np.linalg.norm(
+            mol_xyz[:, :, np.newaxis] - mol_xyz[:, np.newaxis, :], axis=-1
+        )
+        template_distances = np.linalg.norm(
+            template[:, np.newaxis] - template[np.newaxis, :], axis=-1
+        )
+        assert np.allclose(distances, template_distances)
+
+        with pytest.raises(ValueError, match=r"Invalid \"angle_style\""):
+            mc.System(
+                [filled],
+                [methane_oplsaa],
+                mols_in_boxes=[[10]],
+                angle_style="rigid",
+            )
+
+    def test_check_overlaps(self, methane_oplsaa, methane_single):
+        xyz = methane_single.xyz
+        box_matrix = np.diag([3.0, 3.0, 3.0])
+        system = mc.System(
+            [(np.vstack([xyz, xyz + 1.0]), box_matrix)],
+            [methane_oplsaa],
+            mols_in_boxes=[[2]],
+        )
+        overlaps = system.check_overlaps()
+        assert len(overlaps) == 1
+        assert len(overlaps[0]["pairs"]) == 0
+
+        # Shift the second molecule onto the first one
+        system = mc.System(
+            [(np.vstack([xyz, xyz + 0.005]), box_matrix)],
+            [methane_oplsaa],
+            mols_in_boxes=[[2]],
+        )
+        overlaps = system.check_overlaps(rcut_min=1.0 * u.angstrom)
+        pairs = overlaps[0]["pairs"]
+        assert len(pairs) > 0
+        # Only intermolecular pairs are reported
+        assert np.all(pairs[:, 0] < 5) and np.all(pairs[:, 1] >= 5)
+        assert np.all(overlaps[0]["distances"] < 1.0 * u.angstrom)
+        assert len(system.check_overlaps(0.05 * u.angstrom)[0]["pairs"]) == 0
+        assert (
+            len(
+                system.check_overlaps(0.05 * u.angstrom, sigma_fraction=0.5)[
+                    0
+                ]["pairs"]
+            )
+            > 0
+        )
@@ -0,0 +1,232 @@
+import shutil
+
+import pytest
+import numpy as np
+import unyt as u
+
+import mosdef_cassandra as mc
+import mosdef_cassandra.runners.tuning as tuning
+from mosdef_cassandra.runners.tuning import (
+    move_probabilities,
+    optimize_move_probabilities,
+    run_pilots,
+    set_move_probabilities,
+    tune_cbmc,
+)
+from mosdef_cassandra.tests.base_test import BaseTest, get_fn
+from mosdef_cassandra.writers.inp_parser import CassandraInput
+
+
+def mock_cassandra(monkeypatch):
+    """Replace the Cassandra binaries used by run_pilots
+
+    The fragment library setup only fills in the Fragment_Files of the
+    input it is given, as library_setup.py does. Each Cassandra run
+    checks that its input has fragment files and writes a copy of the
+    GCMC log file.
+    """
+
+    def fake_run_fraglib_setup(
+        py, fraglib_setup, cassandra, inp_file, log_file, nspecies
+    ):
+        inp = CassandraInput.from_file(inp_file)
+        inp["Fragment_Files"] = [
+            "species{0}/frag1/frag1.dat  1".format(isp + 1)
+            for isp in range(nspecies)
+        ]
+        inp.write(inp_file)
+
+    def fake_run_cassandra(cassandra, inp_file, log_file):
+        inp = CassandraInput.from_file(inp_file)
+        assert len(inp["Fragment_Files"].data) > 0
+        run_name = inp["Run_Name"].data[0]
+        shutil.copy(get_fn("gcmc.out.log"), run_name + ".out.log")
+
+    monkeypatch.setattr(
+        tuning,
+        "detect_cassandra_binaries",
+        lambda: ("python", "library_setup.py", "cassandra.exe"),
+    )
+    monkeypatch.setattr(tuning, "_run_fraglib_setup", fake_run_fraglib_setup)
+    monkeypatch.setattr(tuning, "_run_cassandra", fake_run_cassandra)
+
+
+class TestRunPilots(BaseTest):
+    def test_run_pilots(self, monkeypatch, tmp_path, methane_oplsaa, box):
+        mock_cassandra(monkeypatch)
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        pilots = run_pilots(
+            system,
+            [moveset] * 3,
+            [100, 200, 300],
+            300.0 * u.K,
+            n_procs=2,
+            workdir=str(tmp_path),
+        )
+        assert [pilot["run_name"] for pilot in pilots] == [
+            "pilot.000",
+            "pilot.001",
+            "pilot.002",
+        ]
+        for pilot in pilots:
+            inp = CassandraInput.from_file(
+                str(tmp_path / (pilot["run_name"] + ".inp"))
+            )
+            assert inp["Fragment_Files"].data == [
+                "species1/frag1/frag1.dat  1"
+            ]
+            assert pilot["moves"]["insert"]["attempted"] > 0
+            assert pilot["time"] >= 0.0
+
+
+class TestMoveProbabilities(BaseTest):
+    def test_move_probabilities(self, methane_oplsaa):
+        moveset = mc.MoveSet("gcmc", [methane_oplsaa])
+        probabilities = move_probabilities(moveset)
+        assert set(probabilities) == {
+            "translate",
+            "rotate",
+            "regrow",
+            "insert",
+        }
+        assert np.isclose(probabilities["insert"], 2 * moveset.prob_insert)
+        assert np.isclose(sum(probabilities.values()), 1.0)
+
+    def test_set_move_probabilities(self, methane_oplsaa):
+        moveset = mc.MoveSet("gcmc", [methane_oplsaa])
+        new_moveset = set_move_probabilities(
+            moveset, {"translate": 3.0, "rotate": 1.0, "insert": 1.0}
+        )
+        assert new_moveset is not moveset
+        assert np.isclose(new_moveset.prob_translate, 0.6)
+        assert new_moveset.prob_regrow == 0.0
+        assert np.isclose(new_moveset.prob_insert, 0.1)
+        assert np.isclose(
+            sum(move_probabilities(new_moveset).values()), 1.0, atol=1e-12
+        )
+        # The original MoveSet is unchanged
+        assert moveset.prob_regrow > 0.0
+
+    def test_set_invalid_move(self, methane_oplsaa):
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        with pytest.raises(ValueError, match=r"Unknown move type"):
+            set_move_probabilities(moveset, {"teleport": 1.0})
+        with pytest.raises(ValueError, match=r"must be positive"):
+            set_move_probabilities(moveset, {"translate": 0.0})
+
+    def test_optimize_move_probabilities(
+        self, monkeypatch, methane_oplsaa, box
+    ):
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        # CPU seconds per attempt and acceptance ratio of each move
+        costs = {"translate": 1e-4, "rotate": 2e-4, "regrow": 1e-3}
+        acceptances = {"translate": 0.5, "rotate": 0.5, "regrow": 0.05}
+
+        def fake_run_pilots(system, movesets, run_length, temperature, **kw):
+            pilots = []
+            for pilot_moveset, length in zip(movesets, run_length):
+                probabilities = move_probabilities(pilot_moveset)
+                elapsed = 0.5 + length * sum(
+                    probabilities[move] * costs[move] for move in costs
+                )
+                moves = {}
+                for move, probability in probabilities.items():
+                    attempted = int(length * probability)
+                    accepted = int(attempted * acceptances[move])
+                    moves[move] = {
+                        "attempted": attempted,
+                        "accepted": accepted,
+                    }
+                pilots.append(
+                    {"run_name": "pilot", "time": elapsed, "moves": moves}
+                )
+            return pilots
+
+        monkeypatch.setattr(tuning, "run_pilots", fake_run_pilots)
+        optimized = optimize_move_probabilities(
+            system, moveset, 300.0 * u.K, pilot_length=100000
+        )
+        expected = {
+            move: np.sqrt(1.0 / (acceptances[move] * costs[move]))
+            for move in costs
+        }
+        total = sum(expected.values())
+        probabilities = move_probabilities(optimized)
+        for move in costs:
+            assert np.isclose(
+                probabilities[move], expected[move] / total, atol=1e-3
+            )
+
+
+class TestTuneCBMC(BaseTest):
+    def test_tune_cbmc(self, monkeypatch, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa])
+        moveset = mc.MoveSet("gcmc", [methane_oplsaa])
+
+        def fake_run_pilots(system, movesets, run_length, temperature, **kw):
+            assert kw["n_procs"] == 4
+            pilots = []
+            for pilot_moveset, length in zip(movesets, run_length):
+                n_insert = pilot_moveset.cbmc_n_insert
+                # Acceptance saturates while the cost keeps growing
+                accepted = int(length * n_insert / (n_insert + 10))
+                elapsed = 2.0 + length * 1e-3 * (1.0 + 0.05 * n_insert)
+                moves = {"insert": {"attempted": length, "accepted": accepted}}
+                pilots.append(
+                    {"run_name": "pilot", "time": elapsed, "moves": moves}
+                )
+            return pilots
+
+        monkeypatch.setattr(tuning, "run_pilots", fake_run_pilots)
+        candidates = tune_cbmc(
+            system,
+            moveset,
+            300.0 * u.K,
+            pilot_length=10000,
+            n_insert=[1, 5, 20, 80],
+            n_dihed=[10],
+            n_procs=4,
+        )
+        assert len(candidates) == 4
+        rates = [candidate["rate"] for candidate in candidates]
+        assert rates == sorted(rates, reverse=True)
+        assert candidates[0]["cbmc_n_insert"] == 20
+        assert moveset.cbmc_n_insert == 20
+        assert moveset.cbmc_n_dihed == 10
+        assert np.allclose(moveset.cbmc_rcut.to_value("angstrom"), 6.0)
+
+    def test_tune_cbmc_pilots(
+        self, monkeypatch, tmp_path, methane_oplsaa, box
+    ):
+        mock_cassandra(monkeypatch)
+        system = mc.System([box], [methane_oplsaa])
+        moveset = mc.MoveSet("gcmc", [methane_oplsaa])
+        candidates = tune_cbmc(
+            system,
+            moveset,
+            300.0 * u.K,
+            pilot_length=1000,
+            n_insert=[5, 10],
+            n_dihed=[10],
+            chemical_potentials=[-35.0 * (u.kJ / u.mol)],
+            workdir=str(tmp_path),
+        )
+        assert len(candidates) == 2
+        for candidate in candidates:
+            assert candidate["accepted"] > 0
+        assert moveset.cbmc_n_insert in [5, 10]
+        inp_files = sorted(tmp_path.glob("pilot.*.inp"))
+        assert len(inp_files) == 3
+        for inp_file in inp_files:
+            inp = CassandraInput.from_file(str(inp_file))
+            assert len(inp["Fragment_Files"].data) > 0
+
+    def test_invalid_candidates(self, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa])
+        moveset = mc.MoveSet("gcmc", [methane_oplsaa])
+        with pytest.raises(ValueError, match=r"at least one candidate"):
+            tune_cbmc(system, moveset, 300.0 * u.K, n_insert=[])
+        with pytest.raises(TypeError, match=r"rcut"):
+            tune_cbmc(system, moveset, 300.0 * u.K, rcut=[6.0])
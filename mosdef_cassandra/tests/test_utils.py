@@ -2,9 +2,50 @@ import pytest
 import numpy as np
 import unyt as u
 import mbuild
+import mosdef_cassandra as mc
 
 from mosdef_cassandra.tests.base_test import BaseTest
-from mosdef_cassandra.utils.units import validate_unit, validate_unit_list
+from mosdef_cassandra.utils.units import (
+    validate_unit,
+    validate_unit_list,
+    validate_unit_values,
+)
+from mosdef_cassandra.utils.constraints import (
+    align_template,
+    bond_deviations,
+    get_bond_constraints,
+    is_rigid,
+    shake,
+)
+from mosdef_cassandra.utils.cache import (
+    clear_move_size_cache,
+    clear_species_cache,
+    get_move_sizes,
+    get_species,
+    move_size_key,
+    set_cache_dir,
+    species_fingerprint,
+    store_move_sizes,
+    store_species,
+)
+from mosdef_cassandra.utils.estimates import (
+    estimate_memory,
+    estimate_output,
+    ideal_gas_molecules,
+    molecular_volume,
+    select_output_freqs,
+    select_pair_energy,
+)
+from mosdef_cassandra.utils.ewald import (
+    ewald_cost,
+    ewald_parameters,
+    optimal_ewald_cutoff,
+    tune_charge_style,
+)
+from mosdef_cassandra.utils.neighbors import (
+    find_close_pairs,
+    perpendicular_widths,
+)
 from unyt import dimensions
 from unyt.exceptions import IterableUnitCoercionError
 
@@ -112,3 +153,387 @@ class TestConvertBox(BaseTest):
     def test_invalid_unit_list(self, unit_list, shape, dimension):
         with pytest.raises(TypeError, match="argument must be a list"):
             validate_unit_list(unit_list, shape, dimension)
+
+    @pytest.mark.parametrize(
+        "unit_list, shape",
+        [
+            ([1.0 * u.nm, 10.0 * u.angstrom], (2,)),
+            ([[1.0 * u.nm], [10.0] * u.angstrom], (2, 1)),
+            ((1.0 * u.nm, 1.0 * u.nm), (2,)),
+        ],
+    )
+    def test_validate_unit_list_mixed_units(self, unit_list, shape):
+        unit_list = validate_unit_list(unit_list, shape, dimensions.length)
+        assert unit_list.shape == shape
+        assert np.allclose(unit_list.to_value("nm"), 1.0)
+
+    def test_validate_unit_list_ragged(self):
+        with pytest.raises(TypeError, match="argument must be a list"):
+            validate_unit_list(
+                [[1.0 * u.nm], [1.0 * u.nm, 1.0 * u.nm]],
+                (2, 1),
+                dimensions.length,
+            )
+
+    def test_validate_unit_values(self):
+        values = validate_unit_values(
+            [[1.0 * u.nm, 2.0 * u.nm]], (1, 2), dimensions.length, "angstrom"
+        )
+        assert type(values) == np.ndarray
+        assert np.allclose(values, [[10.0, 20.0]])
+        with pytest.raises(TypeError, match="test must be a list"):
+            validate_unit_values(
+                [1.0 * u.nm], (1,), dimensions.angle, "degree", "test"
+            )
+
+
+class TestConstraints(BaseTest):
+    @pytest.fixture
+    def chain(self):
+        xyz = np.array(
+            [
+                [0.0, 0.0, 0.0],
+                [1.54, 0.0, 0.0],
+                [2.05, 1.45, 0.0],
+                [3.59, 1.45, 0.0],
+            ]
+        )
+        bonds = np.array([[0, 1], [1, 2], [2, 3]])
+        bond_lengths = np.array([1.54, 1.54, 1.54])
+        return xyz, bonds, bond_lengths
+
+    def test_get_bond_constraints(self, butane_oplsaa):
+        bonds, bond_lengths = get_bond_constraints(butane_oplsaa)
+        assert bonds.shape == (len(butane_oplsaa.bonds), 2)
+        assert bond_lengths.shape == (len(butane_oplsaa.bonds),)
+        assert np.allclose(
+            bond_lengths, [bond.type.req for bond in butane_oplsaa.bonds]
+        )
+
+    def test_shake(self, chain):
+        xyz, bonds, bond_lengths = chain
+        rng = np.random.default_rng(12345)
+        mol_xyz = xyz + rng.normal(0.0, 0.05, size=(100, 4, 3))
+        new_xyz, converged = shake(mol_xyz, bonds, bond_lengths)
+        assert new_xyz.shape == (100, 4, 3)
+        assert np.all(converged)
+        assert np.all(bond_deviations(new_xyz, bonds, bond_lengths) < 1e-6)
+        # Input is not modified in place
+        assert not np.allclose(mol_xyz, new_xyz)
+
+    def test_shake_satisfied(self, chain):
+        xyz, bonds, bond_lengths = chain
+        mol_xyz = np.tile(xyz, (5, 1, 1))
+        lengths = np.linalg.norm(xyz[bonds[:, 0]] - xyz[bonds[:, 1]], axis=1)
+        new_xyz, converged = shake(mol_xyz, bonds, lengths)
+        assert np.all(converged)
+        assert np.allclose(new_xyz, mol_xyz)
+
+    def test_shake_not_converged(self):
+        mol_xyz = np.zeros((2, 2, 3))
+        new_xyz, converged = shake(mol_xyz, np.array([[0, 1]]), [1.0])
+        assert not np.any(converged)
+
+    def test_shake_invalid_shape(self, chain):
+        xyz, bonds, bond_lengths = chain
+        with pytest.raises(ValueError, match=r"must have shape"):
+            shake(xyz, bonds, bond_lengths)
+
+    def test_is_rigid(self, methane_oplsaa, butane_oplsaa):
+        assert is_rigid(methane_oplsaa)
+        assert not is_rigid(butane_oplsaa)
+
+    def test_align_template(self):
+        template = np.array(
+            [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [-0.3338, 0.9426, 0.0]]
+        )
+        # Rotate about z and translate each molecule
+        angles = np.linspace(0.0, 2.0 * np.pi, 10)
+        rotation = np.zeros((10, 3, 3))
+        rotation[:, 0, 0] = np.cos(angles)
+        rotation[:, 0, 1] = -np.sin(angles)
+        rotation[:, 1, 0] = np.sin(angles)
+        rotation[:, 1, 1] = np.cos(angles)
+        rotation[:, 2, 2] = 1.0
+        shift = np.arange(30.0).reshape(10, 1, 3)
+        mol_xyz = np.einsum("aj,nkj->nak", template, rotation) + shift
+        assert np.allclose(align_template(template, mol_xyz), mol_xyz)
+
+        # Distorted molecules are replaced by the template geometry
+        rng = np.random.default_rng(12345)
+        noisy_xyz = mol_xyz + rng.normal(0.0, 0.05, size=mol_xyz.shape)
+        new_xyz = align_template(template, noisy_xyz)
+        for iatom, jatom in [(0, 1), (0, 2), (1, 2)]:
+            assert np.allclose(
+                np.linalg.norm(new_xyz[:, iatom] - new_xyz[:, jatom], axis=1),
+                np.linalg.norm(template[iatom] - template[jatom]),
+            )
+        assert np.allclose(new_xyz.mean(axis=1), noisy_xyz.mean(axis=1))
+
+    def test_align_template_invalid_shape(self, chain):
+        xyz, bonds, bond_lengths = chain
+        with pytest.raises(ValueError, match=r"must have shape"):
+            align_template(xyz, np.zeros((2, 3, 3)))
+
+
+class TestSpeciesCache(BaseTest):
+    @pytest.fixture
+    def cache_dir(self, tmp_path):
+        clear_species_cache()
+        set_cache_dir(tmp_path)
+        yield tmp_path
+        set_cache_dir(None)
+        clear_species_cache()
+
+    def test_fingerprint(self, methane_oplsaa, butane_oplsaa):
+        fingerprint = species_fingerprint(methane_oplsaa)
+        assert fingerprint == species_fingerprint(methane_oplsaa)
+        assert fingerprint != species_fingerprint(butane_oplsaa)
+        methane_oplsaa.coordinates = methane_oplsaa.coordinates + 0.1
+        assert fingerprint != species_fingerprint(methane_oplsaa)
+
+    def test_store_and_get(self, cache_dir, methane_oplsaa):
+        fingerprint = species_fingerprint(methane_oplsaa)
+        assert get_species(fingerprint) is None
+        bond_constraints = get_bond_constraints(methane_oplsaa)
+        store_species(
+            fingerprint,
+            methane_oplsaa.coordinates,
+            bond_constraints,
+            True,
+        )
+        entry = get_species(fingerprint)
+        assert np.allclose(entry["coordinates"], methane_oplsaa.coordinates)
+        assert entry["rigid"]
+
+        # Entry is reloaded from disk after clearing the memory cache
+        clear_species_cache()
+        entry = get_species(fingerprint)
+        assert entry is not None
+        assert entry["constrain"] is None
+        assert np.allclose(entry["coordinates"], methane_oplsaa.coordinates)
+        assert np.array_equal(
+            entry["bond_constraints"][0], bond_constraints[0]
+        )
+        assert np.allclose(entry["bond_constraints"][1], bond_constraints[1])
+
+        clear_species_cache(disk=True)
+        assert get_species(fingerprint) is None
+
+    def test_move_sizes(self, cache_dir, methane_oplsaa):
+        clear_move_size_cache()
+        fingerprint = species_fingerprint(methane_oplsaa, coordinates=False)
+        methane_oplsaa.coordinates = methane_oplsaa.coordinates + 0.1
+        assert fingerprint == species_fingerprint(
+            methane_oplsaa, coordinates=False
+        )
+        key = move_size_key([fingerprint], "npt")
+        assert key != move_size_key([fingerprint], "nvt")
+        assert get_move_sizes(key, 300.0) is None
+
+        store_move_sizes(key, 300.0, [[0.5]], [[20.0]], [100.0], pressure=1.0)
+        store_move_sizes(key, 300.0, [[0.6]], [[20.0]], [100.0], pressure=50.0)
+        store_move_sizes(key, 350.0, [[0.7]], [[20.0]], [100.0], pressure=1.0)
+        # Replaces the entry at the same state point
+        store_move_sizes(key, 350.0, [[0.8]], [[20.0]], [100.0], pressure=1.0)
+
+        assert get_move_sizes(key, 305.0, 2.0)["max_translate"] == [[0.5]]
+        assert get_move_sizes(key, 305.0, 40.0)["max_translate"] == [[0.6]]
+        assert get_move_sizes(key, 340.0)["max_translate"] == [[0.8]]
+
+        # Entries are reloaded from disk after clearing the memory cache
+        clear_move_size_cache()
+        assert get_move_sizes(key, 340.0)["max_translate"] == [[0.8]]
+        clear_move_size_cache(disk=True)
+        assert get_move_sizes(key, 340.0) is None
+
+    def test_move_sizes_switch_dir(self, cache_dir, tmp_path_factory):
+        clear_move_size_cache()
+        key = move_size_key(["species"], "nvt")
+        store_move_sizes(key, 300.0, [[0.5]], [[20.0]], [0.0])
+        other_dir = tmp_path_factory.mktemp("other")
+        set_cache_dir(other_dir)
+        # Move sizes loaded from the first directory are not reused
+        assert get_move_sizes(key, 300.0) is None
+        store_move_sizes(key, 350.0, [[0.7]], [[20.0]], [0.0])
+        set_cache_dir(cache_dir)
+        # The history of each directory is kept separate on disk
+        assert get_move_sizes(key, 350.0)["max_translate"] == [[0.5]]
+        set_cache_dir(other_dir)
+        assert get_move_sizes(key, 300.0)["max_translate"] == [[0.7]]
+        clear_move_size_cache()
+
+
+class TestNeighbors(BaseTest):
+    @staticmethod
+    def _brute_force(xyz, box_matrix, cutoff, molecule_ids):
+        frac = xyz @ np.linalg.inv(box_matrix)
+        pairs = []
+        for iatom in range(len(xyz)):
+            for jatom in range(iatom + 1, len(xyz)):
+                if molecule_ids[iatom] == molecule_ids[jatom]:
+                    continue
+                dfrac = frac[jatom] - frac[iatom]
+                dfrac -= np.round(dfrac)
+                if np.linalg.norm(dfrac @ box_matrix) < cutoff:
+                    pairs.append([iatom, jatom])
+        return np.array(pairs, dtype=int).reshape(-1, 2)
+
+    def test_perpendicular_widths(self):
+        assert np.allclose(
+            perpendicular_widths(np.diag([1.0, 2.0, 3.0])), [1.0, 2.0, 3.0]
+        )
+        box_matrix = np.array([[2.0, 0.0, 0.0], [1.0, 2.0, 0.0], [0, 0, 2]])
+        assert np.allclose(
+            perpendicular_widths(box_matrix), [4.0 / np.sqrt(5.0), 2.0, 2.0]
+        )
+
+    @pytest.mark.parametrize(
+        "box_matrix",
+        [
+            np.diag([20.0, 20.0, 20.0]),
+            np.diag([30.0, 12.0, 25.0]),
+            np.array([[20.0, 0.0, 0.0], [5.0, 18.0, 0.0], [3.0, 4.0, 17.0]]),
+            np.diag([4.0, 4.0, 4.0]),
+        ],
+    )
+    def test_find_close_pairs(self, box_matrix):
+        rng = np.random.default_rng(12)
+        xyz = rng.random((500, 3)) @ box_matrix - 2.0
+        molecule_ids = np.arange(500) // 3
+        pairs, distances = find_close_pairs(
+            xyz, box_matrix, 1.5, molecule_ids=molecule_ids
+        )
+        expected = self._brute_force(xyz, box_matrix, 1.5, molecule_ids)
+        assert np.array_equal(pairs, expected)
+        assert np.all(distances < 1.5)
+
+    def test_find_close_pairs_periodic(self):
+        xyz = np.array([[0.1, 5.0, 5.0], [9.8, 5.0, 5.0], [5.0, 5.0, 5.0]])
+        pairs, distances = find_close_pairs(xyz, np.diag([10.0] * 3), 1.0)
+        assert np.array_equal(pairs, [[0, 1]])
+        assert np.allclose(distances, [0.3])
+
+    def test_find_close_pairs_sparse(self):
+        # Far more cells than particles; only occupied cells are stored
+        xyz = np.array(
+            [
+                [0.1, 5.0, 5.0],
+                [1e7 - 0.2, 5.0, 5.0],
+                [5e6, 5e6, 5e6],
+                [5e6 + 0.5, 5e6, 5e6],
+            ]
+        )
+        pairs, distances = find_close_pairs(xyz, np.diag([1e7] * 3), 1.0)
+        assert np.array_equal(pairs, [[0, 1], [2, 3]])
+        assert np.allclose(distances, [0.3, 0.5])
+
+    def test_find_close_pairs_invalid(self):
+        with pytest.raises(ValueError, match=r"less than half"):
+            find_close_pairs(np.zeros((2, 3)), np.diag([2.0] * 3), 1.0)
+        with pytest.raises(ValueError, match=r"one entry per particle"):
+            find_close_pairs(
+                np.zeros((2, 3)), np.diag([10.0] * 3), 1.0, [0, 1, 2]
+            )
+
+
+class TestEstimates(BaseTest):
+    def test_ideal_gas_molecules(self):
+        # At mu = kT ln(Lambda^3 / V) there is one molecule on average
+        volume = 1.0e5
+        n_molecules = ideal_gas_molecules(volume, 300.0, 0.0, 16.04)
+        mu = -8.314462618e-3 * 300.0 * np.log(n_molecules)
+        assert np.isclose(ideal_gas_molecules(volume, 300.0, mu, 16.04), 1.0)
+        assert ideal_gas_molecules(volume, 300.0, -40.0, 16.04) < 1.0
+
+    def test_molecular_volume(self, methane_oplsaa):
+        volume = molecular_volume(methane_oplsaa)
+        sigmas = np.array([atom.sigma for atom in methane_oplsaa.atoms])
+        assert np.isclose(volume, np.sum(np.pi / 6.0 * sigmas**3))
+
+    def test_estimate_memory(self, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        memory = estimate_memory(system, [1000])
+        assert memory["pair_energy"] == 2 * 8 * 1000**2
+        assert memory["total"] == memory["molecules"] + memory["pair_energy"]
+        memory = estimate_memory(system, [1000], pair_energy=False)
+        assert memory["pair_energy"] == 0
+
+    def test_select_pair_energy(self, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        assert select_pair_energy(system, [1000], memory_budget=1.0)
+        assert not select_pair_energy(system, [100000], memory_budget=1.0)
+        with pytest.raises(TypeError, match=r"memory_budget"):
+            select_pair_energy(system, [1000], memory_budget="1 GB")
+
+    def test_estimate_output(self, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        moveset = mc.MoveSet("gcmc", [methane_oplsaa])
+        properties = ["energy_total", "nmols"]
+        output = estimate_output(
+            system, moveset, [100], 1000, 10, 100, properties
+        )
+        # Coordinates are sized for max_molecules in GCMC
+        assert output["out.box1.xyz"] == 10 * 100 * 5 * 50
+        assert output["out.box1.prp"] == 100 * 3 * 20
+        assert output["total"] == sum(
+            n_bytes for name, n_bytes in output.items() if name != "total"
+        )
+
+    def test_select_output_freqs(self, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[1000]])
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        properties = ["energy_total"]
+        prop_freq, coord_freq = select_output_freqs(
+            system, moveset, [1000], 10000000, properties, disk_budget=0.1
+        )
+        output = estimate_output(
+            system,
+            moveset,
+            [1000],
+            10000000,
+            prop_freq,
+            coord_freq,
+            properties,
+        )
+        assert output["total"] <= 0.1 * 1024**3
+        assert prop_freq == 1000
+        assert coord_freq == 50000
+        # A fixed frequency is kept
+        assert select_output_freqs(
+            system, moveset, [1000], 500, properties, prop_freq=7
+        ) == (7, 1)
+
+
+class TestEwald(BaseTest):
+    def test_ewald_parameters(self):
+        alpha, k_cut = ewald_parameters(12.0, 1e-5)
+        assert np.isclose(alpha, np.sqrt(-np.log(1e-5)) / 12.0)
+        assert np.isclose(k_cut, 2.0 * np.sqrt(-np.log(1e-5)) * alpha)
+        with pytest.raises(ValueError, match=r"accuracy"):
+            ewald_parameters(12.0, 1.5)
+
+    def test_optimal_ewald_cutoff(self):
+        box_matrix = np.diag([60.0, 60.0, 60.0])
+        cutoff = optimal_ewald_cutoff(box_matrix, 20000, 1e-5)
+        assert 6.0 < cutoff < 30.0
+        # The real- and reciprocal-space work are balanced
+        cost = ewald_cost(box_matrix, 20000, cutoff, 1e-5)
+        assert np.isclose(cost["pairs"], cost["k_vectors"])
+        for other in [0.8 * cutoff, 1.2 * cutoff]:
+            assert (
+                ewald_cost(box_matrix, 20000, other, 1e-5)["cost"]
+                > cost["cost"]
+            )
+        # Dilute systems are limited by the box
+        assert np.isclose(optimal_ewald_cutoff(box_matrix, 10, 1e-5), 30.0)
+
+    def test_tune_charge_style(self, butane_oplsaa, box):
+        system = mc.System([box], [butane_oplsaa], mols_to_add=[[100]])
+        (ewald,) = tune_charge_style(system, accuracy=1e-3)
+        assert ewald["charge_style"] == "ewald"
+        assert ewald["n_charges"] == 1400
+        (dsf,) = tune_charge_style(system, accuracy=1e-3, allow_dsf=True)
+        assert dsf["charge_style"] == "dsf"
+        assert dsf["charge_cutoff"] >= 12.0
+        assert dsf["cost"] < ewald["cost"]
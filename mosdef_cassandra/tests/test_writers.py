@@ -2,14 +2,21 @@ import pytest
 from copy import deepcopy
 from pathlib import Path
 
+import mbuild
 import mosdef_cassandra as mc
 import unyt as u
 from mosdef_cassandra.tests.base_test import BaseTest
+from mosdef_cassandra.utils.estimates import estimate_max_molecules
+from mosdef_cassandra.utils.ewald import tune_charge_style
 from mosdef_cassandra.writers.inp_functions import generate_input
+from mosdef_cassandra.writers.inp_functions import generate_inputs
 from mosdef_cassandra.writers.writers import _generate_restart_inp
 from mosdef_cassandra.writers.writers import write_input
+from mosdef_cassandra.writers.writers import write_inputs
 from mosdef_cassandra.writers.writers import write_restart_input
 from mosdef_cassandra.writers.writers import write_mcfs
+from mosdef_cassandra.writers.inp_parser import CassandraInput
+from mosdef_cassandra.writers.inp_parser import InputSection
 from mosdef_cassandra.utils.tempdir import *
 
 
@@ -396,14 +403,152 @@ class TestInpFunctions(BaseTest):
             run_type="equilibration",
             run_length=500,
             temperature=300.0 * u.K,
-            charge_cutoff_box2=30.0 * u.angstrom,
+            charge_cutoff_box2=20.0 * u.angstrom,
             ewald_accuracy=5e-6,
         )
         assert (
-            "# Charge_Style\ncoul ewald 12.0 5e-06\ncoul ewald 30.0 5e-06\n"
+            "# Charge_Style\ncoul ewald 12.0 5e-06\ncoul ewald 20.0 5e-06\n"
             in inp_data
         )
 
+    def test_cutoffs_fit_box(self, twobox_system, methane_oplsaa):
+        (system, moveset) = twobox_system
+        with pytest.raises(ValueError, match=r"vdw_cutoff of box 1"):
+            generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                vdw_cutoff=26.0 * u.angstrom,
+            )
+        with pytest.raises(ValueError, match=r"charge_cutoff of box 2"):
+            generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                charge_cutoff_box2=30.0 * u.angstrom,
+            )
+        # Charges are not used, so the cutoff is not checked
+        generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            charge_style="none",
+            charge_cutoff=30.0 * u.angstrom,
+        )
+
+        # The perpendicular width of a triclinic box is smaller than
+        # its box lengths
+        box = mbuild.Box(lengths=[4.0, 4.0, 4.0], angles=[90.0, 90.0, 60.0])
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            vdw_cutoff=17.0 * u.angstrom,
+            charge_cutoff=17.0 * u.angstrom,
+        )
+        assert "cell_matrix" in inp_data
+        with pytest.raises(ValueError, match=r"perpendicular width"):
+            generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                vdw_cutoff=18.0 * u.angstrom,
+                charge_cutoff=18.0 * u.angstrom,
+            )
+
+    def test_vdw_cutoff_auto(self, methane_oplsaa):
+        liquid_box = mbuild.Box(lengths=[3.0, 3.0, 3.0])
+        vapor_box = mbuild.Box(lengths=[6.0, 6.0, 6.0])
+        system = mc.System(
+            [liquid_box, vapor_box],
+            [methane_oplsaa],
+            mols_to_add=[[300], [30]],
+        )
+        moveset = mc.MoveSet("gemc", [methane_oplsaa])
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            vdw_cutoff="auto",
+        )
+        # The vapor box is 80x less dense, so its cutoff is longer
+        # (12 * 80^(1/3) = 51.7) but limited to half of the box
+        assert (
+            "# VDW_Style\nlj cut_tail 12.0\nlj cut_tail 30.0\n" in inp_data
+        )
+        assert (
+            "# Charge_Style\ncoul ewald 12.0 1e-05\ncoul ewald 30.0 1e-05\n"
+            in inp_data
+        )
+
+        with pytest.raises(ValueError, match=r"cut_switch"):
+            generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                vdw_cutoff="auto",
+                cutoff_style="cut_switch",
+            )
+
+    def test_charge_style_auto(self, twocomp_system, methane_trappe, box):
+        (system, moveset) = twocomp_system
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            charge_style="auto",
+            ewald_accuracy=1e-3,
+        )
+        cutoff = tune_charge_style(system, accuracy=1e-3)[0]["charge_cutoff"]
+        assert 12.0 < cutoff < 25.0
+        assert (
+            "# Charge_Style\ncoul ewald {} 0.001\n".format(round(cutoff, 2))
+            in inp_data
+        )
+
+        # Explicit cutoffs are kept
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            charge_style="auto",
+            charge_cutoff=10.0 * u.angstrom,
+        )
+        assert "# Charge_Style\ncoul ewald 10.0 1e-05\n" in inp_data
+
+        # Species without charges do not need electrostatics
+        system = mc.System([box], [methane_trappe], mols_to_add=[[10]])
+        moveset = mc.MoveSet("nvt", [methane_trappe])
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            charge_style="auto",
+        )
+        assert "# Charge_Style\nnone\n" in inp_data
+
     def test_mixing_rule(self, onecomp_system):
         (system, moveset) = onecomp_system
         inp_data = generate_input(
@@ -550,6 +695,42 @@ class TestInpFunctions(BaseTest):
 
         assert "# Pair_Energy\ntrue\n" in inp_data
 
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            pair_energy="auto",
+        )
+
+        assert "# Pair_Energy\ntrue\n" in inp_data
+
+        # 1e5 molecules need ~150 GB for the pair energies
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            pair_energy="auto",
+            max_molecules=[100000],
+            memory_budget=16.0,
+        )
+
+        assert "# Pair_Energy\nfalse\n" in inp_data
+
+        with pytest.raises(ValueError, match=r"memory_budget must be"):
+            inp_data = generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                pair_energy="auto",
+                memory_budget=0.0,
+            )
+
         with pytest.raises(TypeError, match=r"be of type boolean"):
             inp_data = generate_input(
                 system=system,
@@ -601,6 +782,55 @@ class TestInpFunctions(BaseTest):
             "# Molecule_Files\nspecies1.mcf 1\nspecies2.mcf 2010\n" in inp_data
         )
 
+        # A high chemical potential fills the free volume of the box
+        with pytest.warns(UserWarning, match=r"Estimated max_molecules"):
+            inp_data = generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                chemical_potentials=["none", 10.0 * (u.kJ / u.mol)],
+                max_molecules="auto",
+            )
+        max_molecules = estimate_max_molecules(
+            system, moveset, 300.0 * u.K, ["none", 10.0 * (u.kJ / u.mol)]
+        )
+        assert max_molecules[0] == 1
+        assert 100 < max_molecules[1] < 2000
+        assert (
+            "# Molecule_Files\nspecies1.mcf 1\nspecies2.mcf {}\n".format(
+                max_molecules[1]
+            )
+            in inp_data
+        )
+
+        # A low chemical potential leaves the box nearly empty
+        with pytest.warns(UserWarning, match=r"Estimated max_molecules"):
+            inp_data = generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                chemical_potentials=["none", -50.0 * (u.kJ / u.mol)],
+                max_molecules="auto",
+            )
+        assert (
+            "# Molecule_Files\nspecies1.mcf 1\nspecies2.mcf 21\n" in inp_data
+        )
+
+        (system, moveset) = twocomp_system
+        with pytest.raises(ValueError, match=r"only supported for gcmc"):
+            inp_data = generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                max_molecules="auto",
+            )
+
         (system, moveset) = twocomp_system
         with pytest.raises(TypeError, match=r"should be a list"):
             inp_data = generate_input(
@@ -1437,6 +1667,55 @@ class TestInpFunctions(BaseTest):
                 steps_per_sweep=10.2,
             )
 
+    def test_output_freqs(self, onecomp_system):
+        (system, moveset) = onecomp_system
+        # The output of 10 methanes is limited by the number of rows
+        # and frames rather than the default disk budget
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=10000000,
+            temperature=300.0 * u.K,
+            prop_freq="auto",
+            coord_freq="auto",
+        )
+        assert "prop_freq 1000\ncoord_freq 10000\nrun 10000000" in inp_data
+
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=10000000,
+            temperature=300.0 * u.K,
+            prop_freq="auto",
+            coord_freq="auto",
+            disk_budget=0.001,
+        )
+        assert "prop_freq 20000\ncoord_freq 50000\nrun 10000000" in inp_data
+
+        with pytest.warns(UserWarning, match=r"more than the disk budget"):
+            inp_data = generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=1000000,
+                temperature=300.0 * u.K,
+                coord_freq=1,
+                disk_budget=1.0,
+            )
+
+        with pytest.raises(ValueError, match=r"disk_budget must be"):
+            inp_data = generate_input(
+                system=system,
+                moveset=moveset,
+                run_type="equilibration",
+                run_length=500,
+                temperature=300.0 * u.K,
+                coord_freq="auto",
+                disk_budget=-1.0,
+            )
+
     def test_property_info(self, onecomp_system, twobox_system):
         (system, moveset) = onecomp_system
         inp_data = generate_input(
@@ -1717,6 +1996,22 @@ class TestInpFunctions(BaseTest):
                 (system, moveset) = twocomp_system
                 write_mcfs(system, angle_style=[angle_style, angle_style])
 
+    def test_system_angle_style(self, methane_oplsaa, box):
+        system = mc.System(
+            [box], [methane_oplsaa], mols_to_add=[[10]], angle_style="fixed"
+        )
+        assert system.angle_style == ["fixed"]
+        with temporary_directory() as tmp_dir:
+            with temporary_cd(tmp_dir):
+                write_mcfs(system)
+                with open("species1.mcf") as mcf:
+                    mcf_data = mcf.read()
+                angle_info = mcf_data.split("# Angle_Info")[1].split("!")[0]
+                assert "fixed" in angle_info
+                assert "harmonic" not in angle_info
+                with pytest.warns(UserWarning, match=r"differs from"):
+                    write_mcfs(system, angle_style="harmonic")
+
     def test_angle_style_error(self, onecomp_system):
         (system, moveset) = onecomp_system
         with pytest.raises(ValueError, match="Invalid"):
@@ -1907,3 +2202,225 @@ class TestInpFunctions(BaseTest):
                         self.check_only_comments_or_whitespace(
                             inp_contents, start_idx
                         )
+
+    def test_generate_inputs(self, gcmc_system):
+        (system, moveset) = gcmc_system
+        base_kwargs = {
+            "run_type": "equilibration",
+            "run_length": 500,
+            "temperature": 300.0 * u.K,
+            "run_name": "sweep",
+        }
+        variations = [
+            {"chemical_potentials": ["none", -30.0 * (u.kJ / u.mol)]},
+            {
+                "chemical_potentials": ["none", -35.0 * (u.kJ / u.mol)],
+                "temperature": 350.0 * u.K,
+            },
+        ]
+        inputs = list(
+            generate_inputs(system, moveset, base_kwargs, variations)
+        )
+        assert len(inputs) == 2
+        (run_name, inp_data) = inputs[0]
+        assert run_name == "sweep.000"
+        assert "# Run_Name\nsweep.000.out" in inp_data
+        assert "# Temperature_Info\n300.0" in inp_data
+        assert "# Chemical_Potential_Info\nnone -30.0" in inp_data
+        (run_name, inp_data) = inputs[1]
+        assert run_name == "sweep.001"
+        assert "# Temperature_Info\n350.0" in inp_data
+        assert "# Chemical_Potential_Info\nnone -35.0" in inp_data
+
+    def test_generate_inputs_matches_generate_input(self, onecomp_system):
+        (system, moveset) = onecomp_system
+        (run_name, inp_data) = generate_inputs(
+            system,
+            moveset,
+            {"run_type": "equilibration", "run_length": 500},
+            [{"temperature": 300.0 * u.K, "run_name": "single"}],
+        )[0]
+        single = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+            run_name="single",
+            seeds=[1, 2],
+        )
+        # Drop the timestamp and seeds before comparing
+        assert inp_data.split("# Seed_Info")[1].split("\n", 2)[2] == (
+            single.split("# Seed_Info")[1].split("\n", 2)[2]
+        )
+
+    def test_generate_inputs_invalid(self, onecomp_system):
+        (system, moveset) = onecomp_system
+        base_kwargs = {"run_type": "equilibration", "run_length": 500}
+        with pytest.raises(ValueError, match=r"Invalid input argument"):
+            generate_inputs(
+                system,
+                moveset,
+                base_kwargs,
+                [{"temperature": 300.0 * u.K}, {"random_arg": 1}],
+            )
+        with pytest.raises(ValueError, match=r"temperature must be"):
+            generate_inputs(system, moveset, base_kwargs, [{}])
+        with pytest.raises(TypeError, match=r"list of dicts"):
+            generate_inputs(system, moveset, base_kwargs, {})
+        with pytest.raises(TypeError):
+            generate_inputs(
+                system,
+                moveset,
+                base_kwargs,
+                [{"temperature": 300.0 * u.K, "rcut_min": 1.0 * u.bar}],
+            )
+
+    def test_write_inputs(self, onecomp_system):
+        (system, moveset) = onecomp_system
+        base_kwargs = {"run_type": "equilibration", "run_length": 500}
+        variations = [
+            {"temperature": 300.0 * u.K},
+            {"temperature": 320.0 * u.K},
+        ]
+        with temporary_directory() as tmp_dir:
+            with temporary_cd(tmp_dir):
+                inp_names = write_inputs(
+                    system, moveset, base_kwargs, variations
+                )
+                assert inp_names == ["nvt.000.inp", "nvt.001.inp"]
+                for inp_name in inp_names:
+                    assert Path(inp_name).is_file()
+                with pytest.raises(ValueError, match=r"unique run_name"):
+                    write_inputs(
+                        system,
+                        moveset,
+                        base_kwargs,
+                        [{**v, "run_name": "same"} for v in variations],
+                    )
+
+    def test_write_inputs_invalid(self, gcmc_system):
+        (system, moveset) = gcmc_system
+        base_kwargs = {
+            "run_type": "equilibration",
+            "run_length": 500,
+            "temperature": 300.0 * u.K,
+        }
+        # The errors come from the last variation, so nothing should
+        # be written for the first
+        with temporary_directory() as tmp_dir:
+            with temporary_cd(tmp_dir):
+                with pytest.raises(ValueError, match=r"Chemical potential"):
+                    write_inputs(
+                        system,
+                        moveset,
+                        base_kwargs,
+                        [
+                            {
+                                "chemical_potentials": [
+                                    "none",
+                                    -30.0 * (u.kJ / u.mol),
+                                ]
+                            },
+                            {"chemical_potentials": [-30.0 * (u.kJ / u.mol)]},
+                        ],
+                    )
+                assert len(list(Path(".").glob("*.inp"))) == 0
+                with pytest.raises(ValueError, match=r"unique run_name"):
+                    write_inputs(
+                        system,
+                        moveset,
+                        base_kwargs,
+                        [
+                            {
+                                "chemical_potentials": [
+                                    "none",
+                                    -30.0 * (u.kJ / u.mol),
+                                ],
+                                "run_name": "same",
+                            },
+                            {
+                                "chemical_potentials": [
+                                    "none",
+                                    -35.0 * (u.kJ / u.mol),
+                                ],
+                                "run_name": "same",
+                            },
+                        ],
+                    )
+                assert len(list(Path(".").glob("*.inp"))) == 0
+
+
+class TestInpParser(BaseTest):
+    @pytest.fixture
+    def onecomp_inp(self, methane_oplsaa, box):
+        system = mc.System([box], [methane_oplsaa], mols_to_add=[[10]])
+        moveset = mc.MoveSet("nvt", [methane_oplsaa])
+        inp_data = generate_input(
+            system=system,
+            moveset=moveset,
+            run_type="equilibration",
+            run_length=500,
+            temperature=300.0 * u.K,
+        )
+        return inp_data
+
+    def test_roundtrip(self, onecomp_inp):
+        inp = CassandraInput.from_string(onecomp_inp)
+        expected = "".join(
+            line.strip() + "\n" for line in onecomp_inp.splitlines()
+        )
+        assert inp.to_string() == expected
+        assert inp.footer == ["END"]
+
+    def test_sections(self, onecomp_inp):
+        inp = CassandraInput.from_string(onecomp_inp)
+        assert "Run_Name" in inp
+        assert "Property_Info 1" in inp
+        assert "Prob_Translation" in inp
+        assert inp["Run_Name"].data == ["nvt.out"]
+        assert inp["Start_Type"].data == ["make_config 10"]
+        assert inp["Property_Info 1"].args == ["1"]
+        with pytest.raises(KeyError, match=r"not found"):
+            inp["Not_A_Section"]
+
+    def test_keyword(self, onecomp_inp):
+        inp = CassandraInput.from_string(onecomp_inp)
+        length_info = inp["Simulation_Length_Info"]
+        assert length_info.get_keyword("run") == "500"
+        assert length_info.get_keyword("units") == "steps"
+        length_info.set_keyword("run", 1000)
+        assert length_info.get_keyword("run") == "1000"
+        assert "run 1000\n!---" in inp.to_string()
+        with pytest.raises(KeyError, match=r"not found"):
+            length_info.get_keyword("block_averages")
+        length_info.set_keyword("block_averages", 10)
+        assert length_info.get_keyword("block_averages") == "10"
+
+    def test_set_data(self):
+        section = InputSection(
+            "# Start_Type", ["make_config 10", "make_config 5", "!----"]
+        )
+        section.data = "checkpoint gemc.out.chk"
+        assert section.lines == ["checkpoint gemc.out.chk", "", "!----"]
+        section.data = ["read_config 1 box1.in.xyz", "make_config 5"]
+        assert section.lines == [
+            "read_config 1 box1.in.xyz",
+            "make_config 5",
+            "",
+            "!----",
+        ]
+
+    def test_add_remove_section(self, onecomp_inp):
+        inp = CassandraInput.from_string(onecomp_inp)
+        section = InputSection("# Verbose_Logfile", ["true", "!----"])
+        inp.add_section(section, after="Run_Name")
+        assert inp.sections[1] == "Verbose_Logfile"
+        with pytest.raises(ValueError, match=r"already exists"):
+            inp.add_section(section)
+        inp.remove_section("Verbose_Logfile")
+        assert "Verbose_Logfile" not in inp
+
+    def test_file_not_found(self):
+        with pytest.raises(FileNotFoundError):
+            CassandraInput.from_file("does_not_exist.inp")
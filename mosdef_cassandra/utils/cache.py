@@ -0,0 +1,434 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+_species_cache = {}
+_move_size_cache = {}
+_timing_cache = {}
+_cache_dir = None
+
+# Number of timed runs kept in the history
+_MAX_TIMINGS = 1000
+
+
+def set_cache_dir(cache_dir):
+    """Set the directory used to persist cached data between sessions
+
+    Parameters
+    ----------
+    cache_dir : str or None
+        directory to store the cache files in. Created if it does
+        not exist. ``None`` disables the on-disk cache.
+    """
+    global _cache_dir
+    if cache_dir is not None:
+        cache_dir = os.path.abspath(os.path.expanduser(str(cache_dir)))
+        os.makedirs(cache_dir, exist_ok=True)
+    if cache_dir != _cache_dir:
+        # The move sizes and run history held in memory were loaded
+        # from (and are written back to) the previous directory
+        _move_size_cache.clear()
+        _timing_cache.clear()
+    _cache_dir = cache_dir
+
+
+def get_cache_dir():
+    """Return the on-disk cache directory, or None if disabled"""
+    return _cache_dir
+
+
+def clear_move_size_cache(disk=False):
+    """Empty the cache of tuned move sizes
+
+    Parameters
+    ----------
+    disk : boolean, optional, default=False
+        also remove the cached move sizes from the on-disk cache
+    """
+    _move_size_cache.clear()
+    move_size_dir = _move_size_dir()
+    if disk and move_size_dir is not None and os.path.isdir(move_size_dir):
+        for filename in os.listdir(move_size_dir):
+            if filename.endswith(".json"):
+                os.remove(os.path.join(move_size_dir, filename))
+
+
+def clear_timing_cache(disk=False):
+    """Empty the history of timed Cassandra runs
+
+    Parameters
+    ----------
+    disk : boolean, optional, default=False
+        also remove the history from the on-disk cache
+    """
+    _timing_cache.clear()
+    timing_file = _timing_file()
+    if disk and timing_file is not None and os.path.isfile(timing_file):
+        os.remove(timing_file)
+
+
+def clear_species_cache(disk=False):
+    """Empty the cache of constrained species geometries
+
+    Parameters
+    ----------
+    disk : boolean, optional, default=False
+        also remove the cached geometries from the on-disk cache
+    """
+    _species_cache.clear()
+    species_dir = _species_dir()
+    if disk and species_dir is not None and os.path.isdir(species_dir):
+        for filename in os.listdir(species_dir):
+            if filename.endswith(".npz"):
+                os.remove(os.path.join(species_dir, filename))
+
+
+def species_fingerprint(structure, coordinates=True):
+    """Hash of everything that determines a constrained species geometry
+
+    The fingerprint covers the atoms, the bonded topology with the
+    equilibrium bond lengths, and the input coordinates, which
+    the constraint solver starts from.
+
+    Parameters
+    ----------
+    structure : parmed.Structure
+        the species topology
+    coordinates : boolean, optional, default=True
+        include the coordinates; without them the fingerprint
+        identifies the species regardless of its conformation
+
+    Returns
+    -------
+    str
+        hex digest identifying the species
+    """
+    fingerprint = hashlib.sha1()
+    for atom in structure.atoms:
+        fingerprint.update(
+            "{} {} {};".format(
+                atom.name, atom.type, atom.atomic_number
+            ).encode()
+        )
+    for bond in structure.bonds:
+        req = None if bond.type is None else bond.type.req
+        fingerprint.update(
+            "b {} {} {};".format(bond.atom1.idx, bond.atom2.idx, req).encode()
+        )
+    for angle in structure.angles:
+        fingerprint.update(
+            "a {} {} {};".format(
+                angle.atom1.idx, angle.atom2.idx, angle.atom3.idx
+            ).encode()
+        )
+    fingerprint.update(
+        "d {} {};".format(
+            len(structure.dihedrals), len(structure.rb_torsions)
+        ).encode()
+    )
+    if coordinates:
+        xyz = np.round(np.asarray(structure.coordinates, dtype=float), 6)
+        # Avoid distinct hashes for 0.0 and -0.0
+        xyz += 0.0
+        fingerprint.update(xyz.tobytes())
+
+    return fingerprint.hexdigest()
+
+
+def get_species(fingerprint):
+    """Look up a cached constrained species geometry
+
+    The in-memory cache is checked first, then the on-disk cache
+    (if enabled).
+
+    Parameters
+    ----------
+    fingerprint : str
+        the species fingerprint from ``species_fingerprint``
+
+    Returns
+    -------
+    dict or None
+        "coordinates": the constrained coordinates in Angstrom,
+        "bond_constraints": (bonds, bond_lengths) or None,
+        "rigid": whether the species geometry is fully fixed,
+        "constrain": the ConstrainedMolecule, or None if the entry
+        was loaded from disk. Returns None if the species is not cached.
+    """
+    if fingerprint in _species_cache:
+        return _species_cache[fingerprint]
+
+    species_dir = _species_dir()
+    if species_dir is None:
+        return None
+    filename = os.path.join(species_dir, fingerprint + ".npz")
+    if not os.path.isfile(filename):
+        return None
+    with np.load(filename) as data:
+        if data["has_bond_constraints"]:
+            bond_constraints = (data["bonds"], data["bond_lengths"])
+        else:
+            bond_constraints = None
+        entry = {
+            "coordinates": data["coordinates"],
+            "bond_constraints": bond_constraints,
+            "rigid": bool(data["rigid"]),
+            "constrain": None,
+        }
+    _species_cache[fingerprint] = entry
+
+    return entry
+
+
+def store_species(
+    fingerprint, coordinates, bond_constraints, rigid, constrain=None
+):
+    """Add a constrained species geometry to the cache
+
+    Parameters
+    ----------
+    fingerprint : str
+        the species fingerprint from ``species_fingerprint``
+    coordinates : np.ndarray, shape=(n_atoms, 3)
+        the constrained coordinates in Angstrom
+    bond_constraints : tuple or None
+        (bonds, bond_lengths) as returned by ``get_bond_constraints``
+    rigid : boolean
+        whether the species geometry is fully fixed
+    constrain : constrainmol.ConstrainedMolecule, optional
+        the constraint model; kept in memory only
+
+    Returns
+    -------
+    dict
+        the cache entry
+    """
+    entry = {
+        "coordinates": np.array(coordinates, dtype=float),
+        "bond_constraints": bond_constraints,
+        "rigid": bool(rigid),
+        "constrain": constrain,
+    }
+    _species_cache[fingerprint] = entry
+
+    species_dir = _species_dir()
+    if species_dir is not None:
+        os.makedirs(species_dir, exist_ok=True)
+        if bond_constraints is None:
+            bonds = np.zeros((0, 2), dtype=int)
+            bond_lengths = np.zeros(0)
+        else:
+            bonds, bond_lengths = bond_constraints
+        # Write to a temporary file first so that concurrent
+        # processes never read a partially written entry
+        fd, tmp_name = tempfile.mkstemp(dir=species_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                coordinates=entry["coordinates"],
+                has_bond_constraints=bond_constraints is not None,
+                bonds=bonds,
+                bond_lengths=bond_lengths,
+                rigid=entry["rigid"],
+            )
+        os.replace(tmp_name, os.path.join(species_dir, fingerprint + ".npz"))
+
+    return entry
+
+
+def move_size_key(fingerprints, ensemble):
+    """Key of the move sizes of a set of species in one ensemble
+
+    Parameters
+    ----------
+    fingerprints : list
+        fingerprint of each species, in order
+    ensemble : str
+        the ensemble of the simulation
+
+    Returns
+    -------
+    str
+    """
+    key = hashlib.sha1()
+    key.update(ensemble.encode())
+    for fingerprint in fingerprints:
+        key.update(";{}".format(fingerprint).encode())
+    return key.hexdigest()
+
+
+def store_move_sizes(
+    key,
+    temperature,
+    max_translate,
+    max_rotate,
+    max_volume,
+    pressure=None,
+):
+    """Add tuned move sizes at one state point to the cache
+
+    An existing entry at the same state point is replaced.
+
+    Parameters
+    ----------
+    key : str
+        the key from ``move_size_key``
+    temperature : float
+        temperature in K
+    max_translate : array-like, shape=(n_boxes, n_species)
+        maximum translation in Angstrom
+    max_rotate : array-like, shape=(n_boxes, n_species)
+        maximum rotation in degrees
+    max_volume : array-like, shape=(n_boxes,) or (1,)
+        maximum volume change in Angstrom^3
+    pressure : float, optional
+        pressure in bar
+
+    Returns
+    -------
+    dict
+        the cache entry
+    """
+    entry = {
+        "temperature": float(temperature),
+        "pressure": None if pressure is None else float(pressure),
+        "max_translate": np.asarray(max_translate, dtype=float).tolist(),
+        "max_rotate": np.asarray(max_rotate, dtype=float).tolist(),
+        "max_volume": np.asarray(max_volume, dtype=float).tolist(),
+    }
+    entries = [
+        other
+        for other in _load_move_sizes(key)
+        if other["temperature"] != entry["temperature"]
+        or other["pressure"] != entry["pressure"]
+    ]
+    entries.append(entry)
+    _move_size_cache[key] = entries
+
+    move_size_dir = _move_size_dir()
+    if move_size_dir is not None:
+        os.makedirs(move_size_dir, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=move_size_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_name, os.path.join(move_size_dir, key + ".json"))
+
+    return entry
+
+
+def get_move_sizes(key, temperature, pressure=None):
+    """Find the cached move sizes closest to a state point
+
+    The distance between state points is the relative difference in
+    temperature, plus the relative difference in pressure if both
+    state points have one.
+
+    Parameters
+    ----------
+    key : str
+        the key from ``move_size_key``
+    temperature : float
+        temperature in K
+    pressure : float, optional
+        pressure in bar
+
+    Returns
+    -------
+    dict or None
+        the nearest entry, with the "temperature", "pressure",
+        "max_translate", "max_rotate", and "max_volume" as stored by
+        ``store_move_sizes``. None if there are no entries.
+    """
+    best = None
+    best_distance = np.inf
+    for entry in _load_move_sizes(key):
+        distance = abs(entry["temperature"] - temperature) / temperature
+        if pressure is not None and entry["pressure"] is not None:
+            distance += abs(entry["pressure"] - pressure) / max(
+                abs(pressure), 1.0
+            )
+        if distance < best_distance:
+            best = entry
+            best_distance = distance
+    return best
+
+
+def store_timing(record):
+    """Add a timed Cassandra run to the history
+
+    Only the most recent 1000 runs are kept.
+
+    Parameters
+    ----------
+    record : dict
+        the measurements of the run; must be JSON serializable
+
+    Returns
+    -------
+    dict
+        the record
+    """
+    timings = _load_timings() + [dict(record)]
+    timings = timings[-_MAX_TIMINGS:]
+    _timing_cache["timings"] = timings
+
+    timing_file = _timing_file()
+    if timing_file is not None:
+        fd, tmp_name = tempfile.mkstemp(dir=_cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(timings, f)
+        os.replace(tmp_name, timing_file)
+
+    return record
+
+
+def get_timings():
+    """Return the history of timed Cassandra runs, oldest first"""
+    return list(_load_timings())
+
+
+def _load_timings():
+    if "timings" in _timing_cache:
+        return _timing_cache["timings"]
+    timings = []
+    timing_file = _timing_file()
+    if timing_file is not None and os.path.isfile(timing_file):
+        with open(timing_file) as f:
+            timings = json.load(f)
+    _timing_cache["timings"] = timings
+    return timings
+
+
+def _timing_file():
+    if _cache_dir is None:
+        return None
+    return os.path.join(_cache_dir, "timings.json")
+
+
+def _load_move_sizes(key):
+    if key in _move_size_cache:
+        return _move_size_cache[key]
+    entries = []
+    move_size_dir = _move_size_dir()
+    if move_size_dir is not None:
+        filename = os.path.join(move_size_dir, key + ".json")
+        if os.path.isfile(filename):
+            with open(filename) as f:
+                entries = json.load(f)
+    _move_size_cache[key] = entries
+    return entries
+
+
+def _move_size_dir():
+    if _cache_dir is None:
+        return None
+    return os.path.join(_cache_dir, "move_sizes")
+
+
+def _species_dir():
+    if _cache_dir is None:
+        return None
+    return os.path.join(_cache_dir, "species")
@@ -0,0 +1,216 @@
+import numpy as np
+
+
+def get_bond_constraints(structure):
+    """Get the bond length constraints of a species
+
+    Parameters
+    ----------
+    structure : parmed.Structure
+        the species topology
+
+    Returns
+    -------
+    bonds : np.ndarray, shape=(n_bonds, 2)
+        indices of the two atoms in each bond
+    bond_lengths : np.ndarray, shape=(n_bonds,)
+        equilibrium length of each bond in Angstrom
+
+    Returns None if any bond is missing its equilibrium length.
+    """
+    bonds = []
+    bond_lengths = []
+    for bond in structure.bonds:
+        if bond.type is None or bond.type.req is None:
+            return None
+        bonds.append([bond.atom1.idx, bond.atom2.idx])
+        bond_lengths.append(bond.type.req)
+
+    bonds = np.array(bonds, dtype=int).reshape(-1, 2)
+    bond_lengths = np.array(bond_lengths, dtype=float)
+
+    return bonds, bond_lengths
+
+
+def is_rigid(structure):
+    """Check whether the geometry of a species is fully fixed
+
+    A species is considered rigid if it has no dihedrals and every
+    pair of atoms is either bonded or the two ends of an angle. With
+    fixed bond lengths and fixed angles (as in, e.g., SPC/E water)
+    every interatomic distance is then determined, so the molecule can
+    only move as a rigid body. Only the connectivity is checked; the
+    angles must also be fixed (``angle_style="fixed"``) for the species
+    to be treated as rigid.
+
+    Parameters
+    ----------
+    structure : parmed.Structure
+        the species topology
+
+    Returns
+    -------
+    bool
+    """
+    if len(structure.bonds) == 0:
+        return False
+    if len(structure.dihedrals) > 0 or len(structure.rb_torsions) > 0:
+        return False
+
+    neighbors = {atom.idx: set() for atom in structure.atoms}
+    for bond in structure.bonds:
+        neighbors[bond.atom1.idx].add(bond.atom2.idx)
+        neighbors[bond.atom2.idx].add(bond.atom1.idx)
+    angle_ends = {
+        frozenset((angle.atom1.idx, angle.atom3.idx))
+        for angle in structure.angles
+    }
+
+    n_atoms = len(structure.atoms)
+    for iatom in range(n_atoms):
+        for jatom in range(iatom + 1, n_atoms):
+            if jatom in neighbors[iatom]:
+                continue
+            if frozenset((iatom, jatom)) not in angle_ends:
+                return False
+
+    return True
+
+
+def align_template(template, xyz):
+    """Superimpose a rigid template onto a batch of molecules
+
+    Uses the Kabsch algorithm to find, for every molecule at once,
+    the proper rotation and translation of ``template`` that minimizes
+    the squared displacement from the molecule's current coordinates.
+
+    Parameters
+    ----------
+    template : np.ndarray, shape=(n_atoms, 3)
+        coordinates of the reference geometry
+    xyz : np.ndarray, shape=(n_mols, n_atoms, 3)
+        coordinates of each molecule
+
+    Returns
+    -------
+    aligned : np.ndarray, shape=(n_mols, n_atoms, 3)
+        the template placed at the position and orientation
+        of each molecule
+    """
+    template = np.asarray(template, dtype=float)
+    xyz = np.asarray(xyz, dtype=float)
+    if xyz.ndim != 3 or xyz.shape[1:] != template.shape:
+        raise ValueError(
+            "xyz must have shape (n_mols, n_atoms, 3) with the same "
+            "number of atoms as the template"
+        )
+    if xyz.shape[0] == 0:
+        return xyz.copy()
+
+    template_center = template.mean(axis=0)
+    centers = xyz.mean(axis=1)
+    centered_template = template - template_center
+    centered_xyz = xyz - centers[:, np.newaxis, :]
+
+    # Covariance matrix of each molecule with the template
+    covariance = np.einsum("ai,naj->nij", centered_template, centered_xyz)
+    u_mat, _, vt_mat = np.linalg.svd(covariance)
+    # Flip the last singular vector where needed to avoid reflections
+    sign = np.sign(np.linalg.det(np.einsum("nij,njk->nik", u_mat, vt_mat)))
+    sign[sign == 0.0] = 1.0
+    vt_mat[:, 2, :] *= sign[:, np.newaxis]
+    rotation = np.einsum("nij,njk->nik", u_mat, vt_mat)
+
+    aligned = np.einsum("aj,njk->nak", centered_template, rotation)
+    aligned += centers[:, np.newaxis, :]
+
+    return aligned
+
+
+def shake(xyz, bonds, bond_lengths, tolerance=1e-6, max_iterations=1000):
+    """Apply bond length constraints to a batch of molecules
+
+    A SHAKE-style iteration: each bond in turn is corrected along the
+    current bond vector, with the correction split equally between the
+    two atoms. Every step operates on all molecules at once, so the cost
+    of one iteration is independent of the number of molecules. The
+    iteration stops when every bond of every molecule is within
+    ``tolerance`` of its target length or after ``max_iterations``.
+
+    Parameters
+    ----------
+    xyz : np.ndarray, shape=(n_mols, n_atoms, 3)
+        coordinates of each molecule in Angstrom
+    bonds : np.ndarray, shape=(n_bonds, 2)
+        indices of the two atoms in each bond
+    bond_lengths : np.ndarray, shape=(n_bonds,)
+        target length of each bond in Angstrom
+    tolerance : float, optional, default=1e-6
+        maximum relative deviation of a bond length from its target
+    max_iterations : int, optional, default=1000
+        maximum number of sweeps over all bonds
+
+    Returns
+    -------
+    xyz : np.ndarray, shape=(n_mols, n_atoms, 3)
+        the constrained coordinates
+    converged : np.ndarray, shape=(n_mols,)
+        whether the constraints of each molecule were satisfied
+    """
+    xyz = np.array(xyz, dtype=float)
+    if xyz.ndim != 3 or xyz.shape[2] != 3:
+        raise ValueError("xyz must have shape (n_mols, n_atoms, 3)")
+    bonds = np.asarray(bonds, dtype=int).reshape(-1, 2)
+    bond_lengths = np.asarray(bond_lengths, dtype=float)
+    n_mols = xyz.shape[0]
+    if n_mols == 0 or len(bonds) == 0:
+        return xyz, np.ones(n_mols, dtype=bool)
+
+    target_sq = bond_lengths**2
+    for iteration in range(max_iterations):
+        max_deviation = np.zeros(n_mols)
+        for (iatom, jatom), d_sq in zip(bonds, target_sq):
+            r_ij = xyz[:, iatom] - xyz[:, jatom]
+            r_sq = np.einsum("ij,ij->i", r_ij, r_ij)
+            deviation = np.abs(r_sq - d_sq) / (2.0 * d_sq)
+            np.maximum(max_deviation, deviation, out=max_deviation)
+            # Overlapping atoms have no bond vector to correct along;
+            # leave them alone and let them fail to converge
+            with np.errstate(divide="ignore", invalid="ignore"):
+                g = np.where(r_sq > 0.0, (d_sq - r_sq) / (4.0 * r_sq), 0.0)
+            correction = g[:, np.newaxis] * r_ij
+            xyz[:, iatom] += correction
+            xyz[:, jatom] -= correction
+        if np.all(max_deviation < tolerance):
+            break
+
+    converged = bond_deviations(xyz, bonds, bond_lengths) < tolerance
+
+    return xyz, converged
+
+
+def bond_deviations(xyz, bonds, bond_lengths):
+    """Largest relative bond length deviation of each molecule
+
+    Parameters
+    ----------
+    xyz : np.ndarray, shape=(n_mols, n_atoms, 3)
+        coordinates of each molecule in Angstrom
+    bonds : np.ndarray, shape=(n_bonds, 2)
+        indices of the two atoms in each bond
+    bond_lengths : np.ndarray, shape=(n_bonds,)
+        target length of each bond in Angstrom
+
+    Returns
+    -------
+    deviations : np.ndarray, shape=(n_mols,)
+        max over bonds of abs(length - target) / target
+    """
+    xyz = np.asarray(xyz)
+    bonds = np.asarray(bonds, dtype=int).reshape(-1, 2)
+    bond_lengths = np.asarray(bond_lengths, dtype=float)
+    if len(bonds) == 0:
+        return np.zeros(xyz.shape[0])
+    r_ij = xyz[:, bonds[:, 0]] - xyz[:, bonds[:, 1]]
+    lengths = np.linalg.norm(r_ij, axis=2)
+    return np.max(np.abs(lengths - bond_lengths) / bond_lengths, axis=1)
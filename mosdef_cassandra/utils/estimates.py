@@ -0,0 +1,459 @@
+import numpy as np
+import unyt as u
+
+from mosdef_cassandra.utils.units import validate_unit
+
+# Physical constants in SI units
+_PLANCK = 6.62607015e-34
+_BOLTZMANN = 1.380649e-23
+_AMU = 1.66053906660e-27
+_GAS_CONSTANT = 8.314462618e-3  # kJ/mol/K
+
+# Approximate bytes preallocated by Cassandra per atom and per
+# molecule slot (coordinates, old coordinates, flags, COM, etc.),
+# and per molecule slot and box for the molecule lookup tables
+_BYTES_PER_ATOM = 120
+_BYTES_PER_MOLECULE = 200
+_BYTES_PER_MOLECULE_BOX = 8
+
+# Memory available to a Cassandra job in GB, for pair_energy="auto"
+DEFAULT_MEMORY_BUDGET = 4.0
+
+# Approximate bytes Cassandra writes per atom in each frame of the
+# .xyz file, per frame (plus per species) of the .H file, per column
+# of the .prp file, and per atom of the .chk file
+_XYZ_BYTES_PER_ATOM = 50
+_H_BYTES_PER_FRAME = 200
+_H_BYTES_PER_SPECIES = 20
+_PRP_BYTES_PER_VALUE = 20
+_CHK_BYTES_PER_ATOM = 80
+
+# Disk space for the output of a Cassandra job in GB, for
+# prop_freq="auto" and coord_freq="auto"
+DEFAULT_DISK_BUDGET = 1.0
+
+# Most rows of properties and frames of coordinates written with
+# prop_freq="auto" and coord_freq="auto"
+_MAX_PROPERTY_ROWS = 10000
+_MAX_FRAMES = 1000
+
+# Share of the disk budget given to the properties
+_PROPERTY_SHARE = 0.1
+
+
+def molecular_volume(structure):
+    """Volume of a molecule from the Lennard-Jones diameters of its atoms
+
+    Each atom is treated as a sphere with a diameter of its sigma. The
+    overlap between bonded atoms is ignored, so this is an upper bound.
+
+    Parameters
+    ----------
+    structure : parmed.Structure
+        the species topology
+
+    Returns
+    -------
+    float
+        molecular volume in Angstrom^3
+    """
+    sigmas = np.array([atom.sigma for atom in structure.atoms], dtype=float)
+    return float(np.sum(np.pi / 6.0 * sigmas**3))
+
+
+def ideal_gas_molecules(volume, temperature, chemical_potential, mass):
+    """Average number of molecules of an ideal gas in a volume
+
+    ``N = V exp(mu / kT) / Lambda^3``, where ``Lambda`` is the thermal
+    de Broglie wavelength. This is the chemical potential convention
+    used by Cassandra for GCMC.
+
+    Parameters
+    ----------
+    volume : float
+        volume in Angstrom^3
+    temperature : float
+        temperature in K
+    chemical_potential : float
+        chemical potential in kJ/mol
+    mass : float
+        molecular mass in amu
+
+    Returns
+    -------
+    float
+    """
+    wavelength = _PLANCK / np.sqrt(
+        2.0 * np.pi * mass * _AMU * _BOLTZMANN * temperature
+    )
+    wavelength *= 1.0e10
+    exponent = chemical_potential / (_GAS_CONSTANT * temperature)
+    # Beyond this the packing limit applies anyway
+    exponent = min(exponent, 700.0)
+    return volume * np.exp(exponent) / wavelength**3
+
+
+def estimate_max_molecules(
+    system,
+    moveset,
+    temperature,
+    chemical_potentials,
+    loading=None,
+    safety_factor=2.0,
+    packing_fraction=0.64,
+):
+    """Estimate the maximum number of molecules of each species in GCMC
+
+    The number of molecules of an insertable species is estimated from
+    the ideal gas loading at its chemical potential, or from
+    ``loading`` (e.g., the largest loading seen in a pilot run) if
+    that is larger. The estimate is capped at the number of molecules
+    that fits in the volume left free by the molecules already in the
+    box, at ``packing_fraction``. The result is the estimate times
+    ``safety_factor``, plus 10 molecules for the fluctuations of nearly
+    empty boxes, plus the molecules already in (or added to) the box.
+    Species that are not inserted keep their current number. The ideal
+    gas loading ignores adsorption and liquid non-ideality, so pass the
+    ``loading`` measured in a pilot run for adsorbed or dense fluids.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet; determines which species are inserted
+    temperature : unyt_quantity
+        temperature of the simulation
+    chemical_potentials : list
+        chemical potential of each species as a unyt_quantity with
+        units of energy/mol, or "none" for species that are not
+        inserted
+    loading : list, optional
+        expected number of molecules of each species, e.g., from a
+        pilot run. Use None for species without an expected loading.
+    safety_factor : float, optional, default=2.0
+        multiplier applied to the expected number of molecules
+    packing_fraction : float, optional, default=0.64
+        largest fraction of the free volume the inserted molecules
+        may occupy
+
+    Returns
+    -------
+    max_molecules : list
+        maximum number of molecules of each species
+    """
+    validate_unit(
+        temperature, u.dimensions.temperature, argument_name="temperature"
+    )
+    temperature = temperature.to_value("K")
+    n_species = len(system.species_topologies)
+    if len(chemical_potentials) != n_species:
+        raise ValueError("chemical_potentials must have one entry per species")
+    if loading is None:
+        loading = [None] * n_species
+    if len(loading) != n_species:
+        raise ValueError("loading must have one entry per species")
+    if safety_factor < 1.0:
+        raise ValueError("safety_factor must be at least 1.0")
+
+    volumes = [molecular_volume(top) for top in system.species_topologies]
+    max_molecules = []
+    for isp, top in enumerate(system.species_topologies):
+        existing = sum(
+            system.mols_in_boxes[ibox][isp] + system.mols_to_add[ibox][isp]
+            for ibox in range(len(system.boxes))
+        )
+        chemical_potential = chemical_potentials[isp]
+        if not moveset.insertable[isp] or isinstance(chemical_potential, str):
+            max_molecules.append(existing)
+            continue
+        validate_unit(
+            chemical_potential,
+            u.dimensions.energy,
+            argument_name="chemical_potentials",
+        )
+        chemical_potential = chemical_potential.to_value("kJ/mol")
+        mass = sum(atom.mass for atom in top.atoms)
+
+        expected = 0.0
+        packing_limit = 0.0
+        for ibox, box in enumerate(system.boxes):
+            box_volume = abs(np.linalg.det(box.vectors)) * 1000.0
+            occupied = sum(
+                (
+                    system.mols_in_boxes[ibox][jsp]
+                    + system.mols_to_add[ibox][jsp]
+                )
+                * volumes[jsp]
+                for jsp in range(n_species)
+            )
+            free_volume = max(box_volume - occupied, 0.0)
+            expected += ideal_gas_molecules(
+                free_volume, temperature, chemical_potential, mass
+            )
+            packing_limit += packing_fraction * free_volume / volumes[isp]
+        if loading[isp] is not None:
+            expected = max(expected, float(loading[isp]))
+        expected = min(expected, packing_limit)
+        max_molecules.append(
+            existing + int(np.ceil(safety_factor * expected)) + 10
+        )
+
+    return max_molecules
+
+
+def estimate_memory(system, max_molecules, pair_energy=True):
+    """Approximate memory Cassandra preallocates for the molecules
+
+    Cassandra allocates room for ``max_molecules`` of each species up
+    front, for their atoms, and for looking them up in each box. With
+    ``pair_energy`` it also stores the van der Waals and electrostatic
+    energy of every pair of molecules, which grows with the square of
+    the total number of molecules.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    max_molecules : list
+        maximum number of molecules of each species
+    pair_energy : boolean, optional, default=True
+        whether pair energies are stored
+
+    Returns
+    -------
+    memory : dict
+        the bytes for the "molecules" and their atoms, for the
+        "pair_energy" arrays, and the "total"
+    """
+    n_atoms = [len(top.atoms) for top in system.species_topologies]
+    n_boxes = len(system.boxes)
+    molecules = sum(
+        max_mols
+        * (
+            _BYTES_PER_MOLECULE
+            + _BYTES_PER_MOLECULE_BOX * n_boxes
+            + _BYTES_PER_ATOM * atoms
+        )
+        for max_mols, atoms in zip(max_molecules, n_atoms)
+    )
+    pair = 0
+    if pair_energy:
+        n_total = sum(max_molecules)
+        # One array for van der Waals and one for electrostatics
+        pair = 2 * 8 * n_total**2
+    return {
+        "molecules": molecules,
+        "pair_energy": pair,
+        "total": molecules + pair,
+    }
+
+
+def select_pair_energy(
+    system, max_molecules, memory_budget=DEFAULT_MEMORY_BUDGET
+):
+    """Whether the pair energies fit in a memory budget
+
+    Storing the pair energies makes moves faster, so they are stored
+    unless the estimated memory with them (see ``estimate_memory``)
+    exceeds ``memory_budget``.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    max_molecules : list
+        maximum number of molecules of each species
+    memory_budget : float, optional, default=4.0
+        memory available to Cassandra in GB
+
+    Returns
+    -------
+    boolean
+    """
+    _check_budget(memory_budget, "memory_budget")
+    memory = estimate_memory(system, max_molecules, pair_energy=True)
+    return bool(memory["total"] <= memory_budget * 1024**3)
+
+
+def estimate_output(
+    system,
+    moveset,
+    max_molecules,
+    run_length,
+    prop_freq,
+    coord_freq,
+    properties,
+    block_avg_freq=None,
+):
+    """Approximate size of the output files Cassandra writes
+
+    The coordinates of each box are written to the .xyz and .H files
+    every ``coord_freq`` and the properties to the .prp file every
+    ``prop_freq`` (or every ``block_avg_freq``), in the same units as
+    ``run_length``. In GCMC, the coordinates are sized for
+    ``max_molecules`` of each inserted species, so the estimate is an
+    upper bound. The checkpoint file is overwritten and only counts
+    once.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet; determines which species are inserted
+    max_molecules : list
+        maximum number of molecules of each species
+    run_length : int
+        length of the simulation
+    prop_freq : int
+        frequency of writing properties
+    coord_freq : int
+        frequency of writing coordinates
+    properties : list
+        properties written to the .prp files
+    block_avg_freq : int, optional
+        size of the block averages written instead of the properties
+
+    Returns
+    -------
+    output : dict
+        the bytes of each file, keyed by the name that follows the
+        run name (e.g., "out.box1.xyz"), and the "total"
+    """
+    n_species = len(system.species_topologies)
+    n_atoms = [len(top.atoms) for top in system.species_topologies]
+    n_frames = run_length // coord_freq
+    if block_avg_freq is not None:
+        n_rows = run_length // block_avg_freq
+    else:
+        n_rows = run_length // prop_freq
+    n_values = 1 + sum(
+        n_species if prop in ["nmols", "density"] else 1 for prop in properties
+    )
+
+    output = {}
+    for ibox in range(len(system.boxes)):
+        box_atoms = 0
+        for isp in range(n_species):
+            n_mols = (
+                system.mols_in_boxes[ibox][isp] + system.mols_to_add[ibox][isp]
+            )
+            if moveset.ensemble == "gcmc" and moveset.insertable[isp]:
+                n_mols = max(n_mols, max_molecules[isp])
+            box_atoms += n_mols * n_atoms[isp]
+        prefix = "out.box{}".format(ibox + 1)
+        output[prefix + ".xyz"] = n_frames * box_atoms * _XYZ_BYTES_PER_ATOM
+        output[prefix + ".H"] = n_frames * (
+            _H_BYTES_PER_FRAME + _H_BYTES_PER_SPECIES * n_species
+        )
+        output[prefix + ".prp"] = n_rows * n_values * _PRP_BYTES_PER_VALUE
+    output["out.chk"] = _CHK_BYTES_PER_ATOM * sum(
+        max_mols * atoms for max_mols, atoms in zip(max_molecules, n_atoms)
+    )
+    output["total"] = sum(output.values())
+    return output
+
+
+def select_output_freqs(
+    system,
+    moveset,
+    max_molecules,
+    run_length,
+    properties,
+    prop_freq="auto",
+    coord_freq="auto",
+    disk_budget=DEFAULT_DISK_BUDGET,
+):
+    """Output frequencies that fit the output files in a disk budget
+
+    With ``prop_freq="auto"``, the properties are written as often as
+    fits in a tenth of ``disk_budget``, but at most 10000 times. With
+    ``coord_freq="auto"``, the coordinates are written as often as fits
+    in what is left of the budget, but at most 1000 times and at least
+    once. Frequencies are rounded up to 1, 2, or 5 times a power of
+    ten. The size of the files is estimated with ``estimate_output``.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    moveset : mosdef_cassandra.MoveSet
+        the MoveSet; determines which species are inserted
+    max_molecules : list
+        maximum number of molecules of each species
+    run_length : int
+        length of the simulation
+    properties : list
+        properties written to the .prp files
+    prop_freq : int or "auto", optional, default="auto"
+        frequency of writing properties
+    coord_freq : int or "auto", optional, default="auto"
+        frequency of writing coordinates
+    disk_budget : float, optional, default=1.0
+        disk space for the output files in GB
+
+    Returns
+    -------
+    prop_freq : int
+    coord_freq : int
+    """
+    _check_budget(disk_budget, "disk_budget")
+    budget = disk_budget * 1024**3
+    # Size of a single row of properties and frame of coordinates
+    unit = estimate_output(system, moveset, max_molecules, 1, 1, 1, properties)
+    row = sum(
+        n_bytes for name, n_bytes in unit.items() if name.endswith(".prp")
+    )
+    frame = sum(
+        n_bytes
+        for name, n_bytes in unit.items()
+        if name.endswith(".xyz") or name.endswith(".H")
+    )
+
+    if prop_freq == "auto":
+        n_rows = min(_PROPERTY_SHARE * budget // row, _MAX_PROPERTY_ROWS)
+        prop_freq = min(
+            _round_up_freq(run_length / max(n_rows, 1)), run_length
+        )
+    if coord_freq == "auto":
+        output = estimate_output(
+            system,
+            moveset,
+            max_molecules,
+            run_length,
+            prop_freq,
+            run_length + 1,
+            properties,
+        )
+        n_frames = min((budget - output["total"]) // frame, _MAX_FRAMES)
+        coord_freq = min(
+            _round_up_freq(run_length / max(n_frames, 1)), run_length
+        )
+
+    return max(int(prop_freq), 1), max(int(coord_freq), 1)
+
+
+def format_bytes(n_bytes):
+    """Human readable size, e.g., "1.5 GB" """
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(n_bytes) < 1024.0:
+            return "{:.1f} {}".format(n_bytes, unit)
+        n_bytes /= 1024.0
+    return "{:.1f} TB".format(n_bytes)
+
+
+def _check_budget(budget, name):
+    if not isinstance(budget, (int, float)) or isinstance(budget, bool):
+        raise TypeError("{} must be a float (GB)".format(name))
+    if budget <= 0.0:
+        raise ValueError("{} must be greater than zero".format(name))
+
+
+def _round_up_freq(freq):
+    """Smallest of 1, 2, or 5 times a power of ten that is >= freq"""
+    freq = max(freq, 1.0)
+    power = 10 ** int(np.floor(np.log10(freq)))
+    for factor in [1, 2, 5, 10]:
+        if factor * power >= freq:
+            return int(factor * power)
@@ -0,0 +1,228 @@
+import numpy as np
+
+from mosdef_cassandra.utils.neighbors import perpendicular_widths
+
+# Shortest real-space cutoff considered when tuning, in Angstrom
+MIN_CHARGE_CUTOFF = 6.0
+
+
+def ewald_parameters(cutoff, accuracy):
+    """Ewald splitting parameter and reciprocal space cutoff
+
+    Cassandra derives both from the real-space cutoff and the
+    requested accuracy ``epsilon``: with ``p = sqrt(-ln(epsilon))``,
+    ``alpha = p / cutoff`` and ``k_cut = 2 * p * alpha``.
+
+    Parameters
+    ----------
+    cutoff : float
+        real-space cutoff in Angstrom
+    accuracy : float
+        relative accuracy of the Ewald sum
+
+    Returns
+    -------
+    alpha : float
+        splitting parameter in 1/Angstrom
+    k_cut : float
+        reciprocal space cutoff in 1/Angstrom
+    """
+    if not 0.0 < accuracy < 1.0:
+        raise ValueError("accuracy must be between 0 and 1")
+    if cutoff <= 0.0:
+        raise ValueError("cutoff must be greater than zero")
+    p_sqrt = np.sqrt(-np.log(accuracy))
+    alpha = p_sqrt / cutoff
+    return alpha, 2.0 * p_sqrt * alpha
+
+
+def ewald_cost(
+    box_matrix, n_charges, cutoff, accuracy, reciprocal_cost_ratio=1.0
+):
+    """Work per moved charge for the Ewald sum in one box
+
+    The real-space work is the number of charges within the cutoff of
+    the moved charge. The reciprocal space work is the number of
+    k-vectors whose structure factor must be updated, about
+    ``V k_cut^3 / (12 pi^2)`` using the symmetry between k and -k.
+
+    Parameters
+    ----------
+    box_matrix : np.ndarray, shape=(3, 3)
+        box vectors in Angstrom, one per row
+    n_charges : int
+        number of charged atoms in the box
+    cutoff : float
+        real-space cutoff in Angstrom
+    accuracy : float
+        relative accuracy of the Ewald sum
+    reciprocal_cost_ratio : float, optional, default=1.0
+        cost of updating one k-vector relative to one real-space pair
+
+    Returns
+    -------
+    cost : dict
+        "alpha" and "k_cut" (1/Angstrom), the number of "pairs" within
+        the cutoff and of "k_vectors", and the total "cost" in units of
+        real-space pair interactions
+    """
+    volume = abs(np.linalg.det(np.asarray(box_matrix, dtype=float)))
+    alpha, k_cut = ewald_parameters(cutoff, accuracy)
+    pairs = n_charges / volume * 4.0 / 3.0 * np.pi * cutoff**3
+    k_vectors = volume * k_cut**3 / (12.0 * np.pi**2)
+    return {
+        "alpha": alpha,
+        "k_cut": k_cut,
+        "pairs": pairs,
+        "k_vectors": k_vectors,
+        "cost": pairs + reciprocal_cost_ratio * k_vectors,
+    }
+
+
+def optimal_ewald_cutoff(
+    box_matrix,
+    n_charges,
+    accuracy,
+    reciprocal_cost_ratio=1.0,
+    min_cutoff=MIN_CHARGE_CUTOFF,
+):
+    """Real-space cutoff that minimizes the work of the Ewald sum
+
+    The real-space work grows as ``cutoff^3`` and the reciprocal space
+    work as ``cutoff^-3``, so the optimum is where both are equal. The
+    cutoff is kept between ``min_cutoff`` and half of the smallest
+    perpendicular width of the box.
+
+    Parameters
+    ----------
+    box_matrix : np.ndarray, shape=(3, 3)
+        box vectors in Angstrom, one per row
+    n_charges : int
+        number of charged atoms in the box
+    accuracy : float
+        relative accuracy of the Ewald sum
+    reciprocal_cost_ratio : float, optional, default=1.0
+        cost of updating one k-vector relative to one real-space pair
+    min_cutoff : float, optional, default=6.0
+        shortest cutoff to consider, in Angstrom
+
+    Returns
+    -------
+    float
+        cutoff in Angstrom
+    """
+    box_matrix = np.asarray(box_matrix, dtype=float)
+    max_cutoff = 0.5 * perpendicular_widths(box_matrix).min()
+    if n_charges == 0:
+        return min(min_cutoff, max_cutoff)
+    volume = abs(np.linalg.det(box_matrix))
+    # pairs = a * rc^3 and k_vectors = b / rc^3
+    a_coeff = n_charges / volume * 4.0 / 3.0 * np.pi
+    b_coeff = (
+        reciprocal_cost_ratio
+        * volume
+        * (2.0 * -np.log(accuracy)) ** 3
+        / (12.0 * np.pi**2)
+    )
+    cutoff = (b_coeff / a_coeff) ** (1.0 / 6.0)
+    return float(min(max(cutoff, min_cutoff), max_cutoff))
+
+
+def tune_charge_style(
+    system,
+    accuracy=1.0e-5,
+    allow_dsf=False,
+    dsf_cutoff=12.0,
+    reciprocal_cost_ratio=1.0,
+    min_cutoff=MIN_CHARGE_CUTOFF,
+):
+    """Recommend the cheapest charge style and cutoff for each box
+
+    For each box, the Ewald cutoff that minimizes the work at the
+    requested accuracy is found with ``optimal_ewald_cutoff``. With
+    ``allow_dsf``, the damped shifted force method is considered too,
+    with a cutoff of at least ``dsf_cutoff`` and a damping parameter
+    that gives the same real-space accuracy as the Ewald sum. DSF has
+    no reciprocal space work, but it only approximates the long-range
+    electrostatics and is best suited to homogeneous systems, so it is
+    not considered by default.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        the System to simulate
+    accuracy : float, optional, default=1e-5
+        relative accuracy of the Ewald sum
+    allow_dsf : boolean, optional, default=False
+        also consider the DSF method
+    dsf_cutoff : float, optional, default=12.0
+        shortest cutoff for DSF, in Angstrom
+    reciprocal_cost_ratio : float, optional, default=1.0
+        cost of updating one k-vector relative to one real-space pair
+    min_cutoff : float, optional, default=6.0
+        shortest cutoff to consider, in Angstrom
+
+    Returns
+    -------
+    recommendations : list
+        one dict per box with the "charge_style", the
+        "charge_cutoff" in Angstrom, the "ewald_accuracy" or
+        "dsf_damping" (None if not used), the number of charged atoms
+        "n_charges", and the "cost" per moved charge in units of
+        real-space pair interactions
+    """
+    recommendations = []
+    for ibox, box in enumerate(system.boxes):
+        if box.vectors is None:
+            raise ValueError(
+                "Box {} does not have box vectors".format(ibox + 1)
+            )
+        box_matrix = np.asarray(box.vectors, dtype=float) * 10.0
+        n_charges = 0
+        for isp, top in enumerate(system.species_topologies):
+            n_mols = system.mols_in_boxes[ibox][isp]
+            n_mols += system.mols_to_add[ibox][isp]
+            n_charged = sum(1 for atom in top.atoms if atom.charge != 0.0)
+            n_charges += n_mols * n_charged
+
+        cutoff = optimal_ewald_cutoff(
+            box_matrix,
+            n_charges,
+            accuracy,
+            reciprocal_cost_ratio=reciprocal_cost_ratio,
+            min_cutoff=min_cutoff,
+        )
+        cost = ewald_cost(
+            box_matrix,
+            n_charges,
+            cutoff,
+            accuracy,
+            reciprocal_cost_ratio=reciprocal_cost_ratio,
+        )
+        recommendation = {
+            "charge_style": "ewald",
+            "charge_cutoff": cutoff,
+            "ewald_accuracy": accuracy,
+            "dsf_damping": None,
+            "n_charges": n_charges,
+            "cost": cost["cost"],
+        }
+        if allow_dsf:
+            max_cutoff = 0.5 * perpendicular_widths(box_matrix).min()
+            box_dsf_cutoff = min(max(cutoff, dsf_cutoff), max_cutoff)
+            dsf_cost = ewald_cost(
+                box_matrix, n_charges, box_dsf_cutoff, accuracy
+            )
+            if dsf_cost["pairs"] < cost["cost"]:
+                recommendation.update(
+                    {
+                        "charge_style": "dsf",
+                        "charge_cutoff": box_dsf_cutoff,
+                        "ewald_accuracy": None,
+                        "dsf_damping": dsf_cost["alpha"],
+                        "cost": dsf_cost["pairs"],
+                    }
+                )
+        recommendations.append(recommendation)
+
+    return recommendations
@@ -0,0 +1,168 @@
+import itertools
+
+import numpy as np
+
+# Keeps the cell indices well within the range of a 64-bit integer;
+# larger cells are still at least ``cutoff`` wide
+_MAX_CELLS_PER_DIM = 2**20
+
+
+def perpendicular_widths(box_matrix):
+    """Distance between opposite faces of a (triclinic) box
+
+    Parameters
+    ----------
+    box_matrix : np.ndarray, shape=(3, 3)
+        box vectors, one per row
+
+    Returns
+    -------
+    widths : np.ndarray, shape=(3,)
+        width of the box perpendicular to the bc, ac, and ab planes
+    """
+    box_matrix = np.asarray(box_matrix, dtype=float).reshape(3, 3)
+    volume = abs(np.linalg.det(box_matrix))
+    a_vec, b_vec, c_vec = box_matrix
+    areas = np.linalg.norm(
+        [
+            np.cross(b_vec, c_vec),
+            np.cross(a_vec, c_vec),
+            np.cross(a_vec, b_vec),
+        ],
+        axis=1,
+    )
+    return volume / areas
+
+
+def find_close_pairs(xyz, box_matrix, cutoff, molecule_ids=None):
+    """Find all pairs of particles closer than ``cutoff``
+
+    Uses a cell list with periodic boundary conditions, so the cost
+    scales linearly with the number of particles. Only the occupied
+    cells are stored, so memory does not grow with the box volume.
+    Boxes too small for a 3x3x3 cell grid fall back to a direct search
+    over all pairs.
+
+    Parameters
+    ----------
+    xyz : np.ndarray, shape=(n_particles, 3)
+        particle coordinates
+    box_matrix : np.ndarray, shape=(3, 3)
+        box vectors, one per row, in the same units as ``xyz``
+    cutoff : float
+        pairs closer than this distance are returned
+    molecule_ids : np.ndarray, shape=(n_particles,), optional
+        molecule index of each particle; pairs within the same
+        molecule are skipped
+
+    Returns
+    -------
+    pairs : np.ndarray, shape=(n_pairs, 2)
+        particle indices of each pair, with the lower index first
+    distances : np.ndarray, shape=(n_pairs,)
+        distance between the particles of each pair
+    """
+    xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+    box_matrix = np.asarray(box_matrix, dtype=float).reshape(3, 3)
+    if molecule_ids is not None:
+        molecule_ids = np.asarray(molecule_ids).reshape(-1)
+        if molecule_ids.shape[0] != xyz.shape[0]:
+            raise ValueError("molecule_ids must have one entry per particle")
+    widths = perpendicular_widths(box_matrix)
+    if cutoff >= 0.5 * widths.min():
+        raise ValueError(
+            "cutoff must be less than half the smallest perpendicular "
+            "box width ({})".format(0.5 * widths.min())
+        )
+    if xyz.shape[0] < 2 or cutoff <= 0.0:
+        return np.zeros((0, 2), dtype=int), np.zeros(0)
+
+    frac = xyz @ np.linalg.inv(box_matrix)
+    frac -= np.floor(frac)
+    n_cells = np.floor(widths / cutoff)
+    n_cells = np.minimum(n_cells, _MAX_CELLS_PER_DIM).astype(int)
+    if np.any(n_cells < 3):
+        candidates = _all_pairs(xyz.shape[0])
+    else:
+        candidates = _cell_list_pairs(frac, n_cells)
+
+    pairs = []
+    distances = []
+    for iatoms, jatoms in candidates:
+        if molecule_ids is not None:
+            keep = molecule_ids[iatoms] != molecule_ids[jatoms]
+            iatoms = iatoms[keep]
+            jatoms = jatoms[keep]
+        dfrac = frac[jatoms] - frac[iatoms]
+        dfrac -= np.round(dfrac)
+        dist = np.linalg.norm(dfrac @ box_matrix, axis=1)
+        close = dist < cutoff
+        pairs.append(
+            np.column_stack(
+                [
+                    np.minimum(iatoms[close], jatoms[close]),
+                    np.maximum(iatoms[close], jatoms[close]),
+                ]
+            )
+        )
+        distances.append(dist[close])
+
+    if len(pairs) == 0:
+        return np.zeros((0, 2), dtype=int), np.zeros(0)
+    pairs = np.concatenate(pairs).astype(int)
+    distances = np.concatenate(distances)
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+
+    return pairs[order], distances[order]
+
+
+def _all_pairs(n_particles, chunk_size=1024):
+    """Yield every (i, j) pair with i < j, in chunks"""
+    for start in range(0, n_particles, chunk_size):
+        iatoms = np.arange(start, min(start + chunk_size, n_particles))
+        iatoms, jatoms = np.meshgrid(
+            iatoms, np.arange(n_particles), indexing="ij"
+        )
+        mask = jatoms > iatoms
+        yield iatoms[mask], jatoms[mask]
+
+
+def _cell_list_pairs(frac, n_cells):
+    """Yield candidate pairs in the same or neighboring cells"""
+    cell_xyz = np.minimum((frac * n_cells).astype(int), n_cells - 1)
+    cell_ids = np.ravel_multi_index(cell_xyz.T, n_cells)
+
+    # Table of the particles in each occupied cell, padded with -1.
+    # The extra last row is empty and stands in for unoccupied cells
+    occupied, cell_rows, counts = np.unique(
+        cell_ids, return_inverse=True, return_counts=True
+    )
+    cell_rows = cell_rows.reshape(-1)
+    order = np.argsort(cell_rows, kind="stable")
+    starts = np.cumsum(counts) - counts
+    slots = np.arange(len(order)) - starts[cell_rows[order]]
+    table = np.full((len(occupied) + 1, counts.max()), -1, dtype=int)
+    table[cell_rows[order], slots] = order
+
+    occupied_xyz = np.column_stack(np.unravel_index(occupied, n_cells))
+    # Half of the 26 neighbor cells plus the cell itself, so
+    # that each pair of cells is visited once
+    offsets = [
+        offset
+        for offset in itertools.product([-1, 0, 1], repeat=3)
+        if offset > (0, 0, 0)
+    ]
+    for offset in [(0, 0, 0)] + offsets:
+        neighbors = np.ravel_multi_index(
+            ((occupied_xyz + offset) % n_cells).T, n_cells
+        )
+        rows = np.searchsorted(occupied, neighbors)
+        found = occupied[np.minimum(rows, len(occupied) - 1)] == neighbors
+        rows[~found] = len(occupied)
+        iatoms = table[:-1][:, :, np.newaxis]
+        jatoms = table[rows][:, np.newaxis, :]
+        iatoms, jatoms = np.broadcast_arrays(iatoms, jatoms)
+        mask = (iatoms >= 0) & (jatoms >= 0)
+        if offset == (0, 0, 0):
+            mask &= iatoms < jatoms
+        yield iatoms[mask], jatoms[mask]
@@ -1,5 +1,12 @@
+import functools
+import numpy as np
 import unyt as u
-from unyt import accepts
+
+
+@functools.lru_cache(maxsize=None)
+def _has_dimension(dimension, valid_dimension):
+    """Cached comparison of two (sympy) dimension expressions"""
+    return dimension == valid_dimension
 
 
 def validate_unit(
@@ -14,20 +21,14 @@ def validate_unit(
             f"with dimensions of {valid_dimension}"
         )
 
-    if isinstance(unyt_array, u.unyt_array):
-
-        @accepts(unyt_array=valid_dimension)
-        def _validate(unyt_array):
-            return unyt_array
-
-    else:
+    if not isinstance(unyt_array, u.unyt_array):
         raise TypeError(err_msg)
 
-    try:
-        return _validate(unyt_array)
-    except TypeError:
+    if not _has_dimension(unyt_array.units.dimensions, valid_dimension):
         raise TypeError(err_msg)
 
+    return unyt_array
+
 
 def validate_unit_list(
     list_, valid_shape, valid_dimension, argument_name=None, err_msg=None
@@ -43,6 +44,16 @@ def validate_unit_list(
         )
 
     if type(list_) in (list, tuple):
+        # Fast path: every element shares the same units so the
+        # values can be stacked in a single call
+        unyt_array = _stack_homogeneous(list_, err_msg)
+        if unyt_array is not None:
+            if unyt_array.shape != valid_shape:
+                raise TypeError(err_msg)
+            return validate_unit(
+                unyt_array, valid_dimension, argument_name, err_msg
+            )
+
         new_list = []
         for item in list_:
             try:
@@ -63,3 +74,84 @@ def validate_unit_list(
         raise TypeError(err_msg)
 
     return validate_unit(unyt_array, valid_dimension, argument_name, err_msg)
+
+
+def validate_unit_values(
+    list_, valid_shape, valid_dimension, units, argument_name=None
+):
+    """Validate a (nested) list of unyt quantities and return the values
+
+    Parameters
+    ----------
+    list_ : list, unyt_array, or unyt_quantity
+        the quantities to validate
+    valid_shape : tuple
+        required shape of the quantities
+    valid_dimension : unyt.dimensions
+        required dimensions of the quantities
+    units : str or unyt.Unit
+        units to convert the values to
+    argument_name : str, optional
+        name of the argument for the error message
+
+    Returns
+    -------
+    values : np.ndarray
+        the values in ``units``
+    """
+    unyt_array = validate_unit_list(
+        list_, valid_shape, valid_dimension, argument_name
+    )
+    return unyt_array.to_value(units)
+
+
+def _stack_homogeneous(list_, err_msg):
+    """Stack a nested list of unyt_arrays that all share the same units
+
+    Returns None if the list contains anything other than nested
+    lists/tuples of unyt_arrays with identical units, in which case
+    the caller falls back to the element-by-element path.
+    """
+    units = _first_units(list_)
+    if units is None:
+        return None
+    values = _strip_units(list_, units)
+    if values is None:
+        return None
+    try:
+        values = np.array(values)
+    except ValueError:
+        raise TypeError(err_msg)
+    if values.dtype == object:
+        raise TypeError(err_msg)
+    return u.unyt_array(values, units)
+
+
+def _first_units(list_):
+    for item in list_:
+        if type(item) in (list, tuple):
+            units = _first_units(item)
+            if units is not None:
+                return units
+        elif isinstance(item, u.unyt_array):
+            return item.units
+        else:
+            return None
+    return None
+
+
+def _strip_units(list_, units):
+    values = []
+    for item in list_:
+        if type(item) in (list, tuple):
+            item_values = _strip_units(item, units)
+            if item_values is None:
+                return None
+        elif isinstance(item, u.unyt_array) and (
+            item.units is units or item.units == units
+        ):
+            item_values = item.view(np.ndarray)
+        else:
+            return None
+        values.append(item_values)
+    return values
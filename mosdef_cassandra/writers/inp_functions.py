@@ -1,14 +1,27 @@
-import mbuild
 import datetime
 import numpy as np
 import unyt as u
 import mosdef_cassandra
-import copy
 
 
 from unyt import dimensions
-
+from warnings import warn
+
+from mosdef_cassandra.utils.estimates import (
+    DEFAULT_DISK_BUDGET,
+    DEFAULT_MEMORY_BUDGET,
+    _check_budget,
+    estimate_max_molecules,
+    estimate_memory,
+    estimate_output,
+    format_bytes,
+    select_output_freqs,
+    select_pair_energy,
+)
+from mosdef_cassandra.utils.ewald import tune_charge_style
+from mosdef_cassandra.utils.neighbors import perpendicular_widths
 from mosdef_cassandra.utils.units import validate_unit, validate_unit_list
+from mosdef_cassandra.writers.inp_parser import CassandraInput
 
 
 def generate_input(
@@ -45,13 +58,7 @@ def generate_input(
     """
 
     # Sanity check on kwargs
-    valid_args = _get_possible_kwargs()
-    for arg in kwargs:
-        if arg not in valid_args:
-            raise ValueError(
-                "Invalid input argument {}. "
-                "Allowable options include {}".format(arg, valid_args)
-            )
+    _check_kwarg_names(kwargs)
 
     # Check/convert temperature
     validate_unit(temperature, dimensions.temperature)
@@ -63,6 +70,129 @@ def generate_input(
     # Check/convert kwargs units
     _check_kwarg_units(kwargs)
     _convert_kwarg_units(kwargs)
+
+    boxes = _get_box_matrices(system)
+
+    return _render_input(
+        system, moveset, run_type, run_length, temperature, boxes, kwargs
+    )
+
+
+def generate_inputs(system, moveset, base_kwargs, variations):
+    """Construct input files for a sweep over one or more parameters
+
+    The System, MoveSet, and the keyword arguments shared by every
+    input file are checked and converted once. Each entry of
+    ``variations`` is then validated on its own and merged on top of
+    ``base_kwargs`` before the input file is rendered. Every input file
+    is rendered before any is returned, so that an invalid variation
+    raises before any input file of the sweep is written.
+
+    Parameters
+    ----------
+    system : mosdef_cassandra.System
+        system to be simulated
+    moveset : mosdef_cassandra.MoveSet
+        move probabilities
+    base_kwargs : dict
+        arguments shared by every input file. ``run_type``,
+        ``run_length``, and ``temperature`` may be given here or in
+        each variation. All other keys must be valid keyword arguments
+        to ``generate_input``.
+    variations : list
+        list of dicts, one per input file. Entries override the
+        corresponding entries in ``base_kwargs``.
+
+    Returns
+    -------
+    inputs : list
+        one ``(run_name, inp_data)`` tuple per variation, where
+        ``inp_data`` is a string with the entire input file. If a
+        variation does not specify ``run_name``, the base run name is
+        suffixed with the index of the variation (e.g., ``nvt.000``,
+        ``nvt.001``, ...).
+    """
+    if not isinstance(base_kwargs, dict):
+        raise TypeError("base_kwargs must be a dict")
+    if not isinstance(variations, list):
+        raise TypeError("variations must be a list of dicts")
+    for variation in variations:
+        if not isinstance(variation, dict):
+            raise TypeError("variations must be a list of dicts")
+
+    base_kwargs, base_args = _split_run_args(base_kwargs)
+    _check_kwarg_names(base_kwargs)
+    if "temperature" in base_args:
+        validate_unit(base_args["temperature"], dimensions.temperature)
+        base_args["temperature"] = base_args["temperature"].to("kelvin")
+
+    # Everything shared between inputs is checked and converted once
+    moveset = _convert_moveset_units(moveset)
+    _check_kwarg_units(base_kwargs)
+    _convert_kwarg_units(base_kwargs)
+    boxes = _get_box_matrices(system)
+
+    base_run_name = base_kwargs.get("run_name", moveset.ensemble)
+
+    # Validate all variations up front so that a typo in the last
+    # entry does not leave a partial sweep on disk
+    checked_variations = []
+    for variation in variations:
+        variation_kwargs, variation_args = _split_run_args(variation)
+        _check_kwarg_names(variation_kwargs)
+        if "temperature" in variation_args:
+            validate_unit(
+                variation_args["temperature"], dimensions.temperature
+            )
+            variation_args["temperature"] = variation_args["temperature"].to(
+                "kelvin"
+            )
+        _check_kwarg_units(variation_kwargs)
+        _convert_kwarg_units(variation_kwargs)
+        run_args = {**base_args, **variation_args}
+        for arg in ["run_type", "run_length", "temperature"]:
+            if arg not in run_args:
+                raise ValueError(
+                    "{} must be specified in base_kwargs or in "
+                    "every variation".format(arg)
+                )
+        checked_variations.append((variation_kwargs, run_args))
+
+    # Checks that depend on the System and MoveSet (e.g., the chemical
+    # potentials or pressure) only run when an input is rendered
+    return _render_inputs(
+        system, moveset, boxes, base_kwargs, base_run_name, checked_variations
+    )
+
+
+def _render_inputs(
+    system, moveset, boxes, base_kwargs, base_run_name, checked_variations
+):
+    """Render the input files of a sweep"""
+    inputs = []
+    for idx, (variation_kwargs, run_args) in enumerate(checked_variations):
+        kwargs = {**base_kwargs, **variation_kwargs}
+        if "run_name" not in variation_kwargs:
+            kwargs["run_name"] = "{}.{:03d}".format(base_run_name, idx)
+        inp_data = _render_input(
+            system,
+            moveset,
+            run_args["run_type"],
+            run_args["run_length"],
+            run_args["temperature"],
+            boxes,
+            kwargs,
+        )
+        inputs.append((kwargs["run_name"], inp_data))
+
+    return inputs
+
+
+def _render_input(
+    system, moveset, run_type, run_length, temperature, boxes, kwargs
+):
+    """Write the input file from checked and converted arguments"""
+
     # Construct an input file section by section
     inp_data = """
 ! Generated by mosdef_cassandra version {} on {}
@@ -110,7 +240,8 @@ def generate_input(
     else:
         cutoff_style = "cut_tail"
 
-    if "vdw_cutoff" in kwargs:
+    auto_vdw_cutoff = _is_auto(kwargs.get("vdw_cutoff"))
+    if "vdw_cutoff" in kwargs and not auto_vdw_cutoff:
         vdw_cutoff = kwargs["vdw_cutoff"].to_value()
     else:
         vdw_cutoff = 12.0
@@ -120,7 +251,15 @@ def generate_input(
 
     vdw_styles = [vdw_style] * nbr_boxes
     cutoff_styles = [cutoff_style] * nbr_boxes
-    vdw_cutoffs = [vdw_cutoff] * nbr_boxes
+    if auto_vdw_cutoff:
+        if cutoff_style == "cut_switch":
+            raise ValueError(
+                'vdw_cutoff="auto" is not supported with the '
+                '"cut_switch" cutoff style'
+            )
+        vdw_cutoffs = _select_cutoffs(system, boxes, vdw_cutoff)
+    else:
+        vdw_cutoffs = [vdw_cutoff] * nbr_boxes
     # Support for per-box cutoffs
     if "vdw_cutoff_box1" in kwargs:
         vdw_cutoffs[0] = kwargs["vdw_cutoff_box1"].to_value()
@@ -133,7 +272,8 @@ def generate_input(
                 "cutoff for box 2 specified in kwargs"
             )
 
-    # TODO: Check that cutoff <= half box length
+    if vdw_style != "none":
+        _check_cutoffs(boxes, vdw_cutoffs, "vdw_cutoff")
     inp_data += get_vdw_style(vdw_styles, cutoff_styles, vdw_cutoffs)
 
     # Charge Style
@@ -158,7 +298,31 @@ def generate_input(
         dsf_damping = None
 
     charge_styles = [charge_style] * nbr_boxes
-    charge_cutoffs = [charge_cutoff] * nbr_boxes
+    if auto_vdw_cutoff and "charge_cutoff" not in kwargs:
+        # Same cutoffs as the van der Waals interactions
+        charge_cutoffs = list(vdw_cutoffs)
+    else:
+        charge_cutoffs = [charge_cutoff] * nbr_boxes
+
+    # Pick the Ewald cutoff of each box that minimizes the work
+    if charge_style == "auto":
+        has_charges = any(
+            atom.charge != 0.0
+            for top in system.species_topologies
+            for atom in top.atoms
+        )
+        if has_charges:
+            charge_styles = ["ewald"] * nbr_boxes
+            if "charge_cutoff" not in kwargs:
+                recommendations = tune_charge_style(
+                    system, accuracy=ewald_accuracy
+                )
+                charge_cutoffs = [
+                    round(recommendation["charge_cutoff"], 2)
+                    for recommendation in recommendations
+                ]
+        else:
+            charge_styles = ["none"] * nbr_boxes
 
     # Support for per-box cutoffs
     if "charge_cutoff_box1" in kwargs:
@@ -172,7 +336,14 @@ def generate_input(
                 "cutoff for box 2 specified in kwargs"
             )
 
-    # TODO: Check that cutoff <= half box length
+    _check_cutoffs(
+        boxes,
+        [
+            cutoff if style != "none" else None
+            for style, cutoff in zip(charge_styles, charge_cutoffs)
+        ],
+        "charge_cutoff",
+    )
     inp_data += get_charge_style(
         charge_styles,
         charge_cutoffs,
@@ -222,13 +393,26 @@ def generate_input(
         pair_energy = kwargs["pair_energy"]
     else:
         pair_energy = True
-    inp_data += get_pair_energy(pair_energy)
+    if pair_energy != "auto" and not isinstance(pair_energy, bool):
+        raise TypeError('pair_energy must be of type boolean or "auto"')
 
     # Molecule Files
     max_molecules_dict = {
         "species%d.mcf" % (i + 1): 0 for i in range(nbr_species)
     }
-    if "max_molecules" in kwargs:
+    estimated = kwargs.get("max_molecules") == "auto"
+    if estimated:
+        if moveset.ensemble != "gcmc" or "chemical_potentials" not in kwargs:
+            raise ValueError(
+                'max_molecules="auto" is only supported for gcmc with '
+                "chemical_potentials"
+            )
+        # Room for the ideal gas loading of each inserted species; this
+        # ignores adsorption and liquid non-ideality
+        max_molecules = estimate_max_molecules(
+            system, moveset, temperature, kwargs["chemical_potentials"]
+        )
+    elif "max_molecules" in kwargs:
         max_molecules = kwargs["max_molecules"]
         if not isinstance(max_molecules, list):
             raise TypeError(
@@ -243,35 +427,53 @@ def generate_input(
                     len(kwargs["max_molecules"]), nbr_species
                 )
             )
-        for i, max_mols in enumerate(max_molecules):
-            max_molecules_dict["species%d.mcf" % (i + 1)] = max_mols
     else:
+        max_molecules = []
         for isp in range(nbr_species):
             max_mols = 0
             for ibox in range(nbr_boxes):
                 max_mols += system.mols_in_boxes[ibox][isp]
                 max_mols += system.mols_to_add[ibox][isp]
-            # TODO: Document/improve this
-            # Memory is cheap (most of the time)
+            # Room for the molecules inserted in GCMC
             if moveset.ensemble == "gcmc" and moveset.insertable[isp]:
                 max_mols += 2000
+            max_molecules.append(max_mols)
+    for isp, max_mols in enumerate(max_molecules):
+        max_molecules_dict["species%d.mcf" % (isp + 1)] = max_mols
 
-            max_molecules_dict["species%d.mcf" % (isp + 1)] = max_mols
+    # Store pair energies only if they fit in the memory budget
+    if "memory_budget" in kwargs:
+        memory_budget = kwargs["memory_budget"]
+    else:
+        memory_budget = DEFAULT_MEMORY_BUDGET
+    auto_pair_energy = pair_energy == "auto"
+    if auto_pair_energy:
+        pair_energy = select_pair_energy(system, max_molecules, memory_budget)
+
+    if estimated or auto_pair_energy:
+        memory = estimate_memory(system, max_molecules, pair_energy)
+        message = ""
+        if estimated:
+            message += "Estimated max_molecules = {}. ".format(max_molecules)
+        if auto_pair_energy:
+            message += (
+                "Selected pair_energy = {} for a memory budget of "
+                "{} GB. ".format(pair_energy, memory_budget)
+            )
+        message += (
+            "Cassandra will preallocate about {} ({} for pair "
+            "energies).".format(
+                format_bytes(memory["total"]),
+                format_bytes(memory["pair_energy"]),
+            )
+        )
+        warn(message)
+
+    inp_data += get_pair_energy(pair_energy)
 
     inp_data += get_molecule_files(max_molecules_dict)
 
     # Box Info
-    boxes = []
-
-    for box in system.boxes:
-        if isinstance(box, mbuild.Compound):
-            box_matrix = copy.deepcopy(box.box.vectors)
-        else:
-            box_matrix = copy.deepcopy(box.vectors)
-
-        box_matrix = u.unyt_array(box_matrix, "nm")
-        # box_matrix = [u.unyt_array(i, "nm") for i in box_matrix]
-        boxes.append(box_matrix)
     inp_data += get_box_info(
         boxes, moveset._restricted_type, moveset._restricted_value
     )
@@ -327,15 +529,12 @@ def generate_input(
     if moveset.prob_translate > 0.0:
         move_prob_dict["translate"] = [
             moveset.prob_translate,
-            *[
-                [val.to_value() for val in box]
-                for box in moveset.max_translate
-            ],
+            *moveset.max_translate.to_value().tolist(),
         ]
     if moveset.prob_rotate > 0.0:
         move_prob_dict["rotate"] = [
             moveset.prob_rotate,
-            *[[val.to_value() for val in box] for box in moveset.max_rotate],
+            *moveset.max_rotate.to_value().tolist(),
         ]
     if moveset.prob_angle > 0.0:
         move_prob_dict["angle"] = moveset.prob_angle
@@ -353,7 +552,7 @@ def generate_input(
     if moveset.prob_volume > 0.0:
         move_prob_dict["volume"] = [
             moveset.prob_volume,
-            [i.to_value() for i in moveset.max_volume],
+            moveset.max_volume.to_value().tolist(),
         ]
     if moveset.prob_insert > 0.0:
         move_prob_dict["insert"] = [moveset.prob_insert, moveset.insertable]
@@ -376,13 +575,13 @@ def generate_input(
     inp_data += get_cbmc_info(
         moveset.cbmc_n_insert,
         moveset.cbmc_n_dihed,
-        [i.to_value() for i in moveset.cbmc_rcut],
+        moveset.cbmc_rcut.to_value().tolist(),
     )
 
     # Start type info
     start_types = []
     for ibox, box in enumerate(system.boxes):
-        if isinstance(box, mbuild.Compound):
+        if box.occupied:
             if sum(system.mols_to_add[ibox]) > 0:
                 existing_mols = " ".join(
                     [str(x) for x in system.mols_in_boxes[ibox]]
@@ -463,16 +662,6 @@ def generate_input(
     else:
         block_avg_freq = None
 
-    inp_data += get_simulation_length_info(
-        units,
-        prop_freq,
-        coord_freq,
-        run_length,
-        steps_per_sweep,
-        block_avg_freq,
-    )
-
-    # Properties section
     if "properties" in kwargs:
         properties = kwargs["properties"]
     else:
@@ -487,23 +676,84 @@ def generate_input(
             "mass_density",
         ]
 
+    # Fit the output files in the disk budget
+    if "disk_budget" in kwargs:
+        disk_budget = kwargs["disk_budget"]
+    else:
+        disk_budget = None
+    auto_freqs = _is_auto(prop_freq) or _is_auto(coord_freq)
+    if auto_freqs:
+        if disk_budget is None:
+            disk_budget = DEFAULT_DISK_BUDGET
+        prop_freq, coord_freq = select_output_freqs(
+            system,
+            moveset,
+            max_molecules,
+            run_length,
+            properties,
+            prop_freq=prop_freq,
+            coord_freq=coord_freq,
+            disk_budget=disk_budget,
+        )
+    if auto_freqs or disk_budget is not None:
+        _check_budget(disk_budget, "disk_budget")
+        output = estimate_output(
+            system,
+            moveset,
+            max_molecules,
+            run_length,
+            prop_freq,
+            coord_freq,
+            properties,
+            block_avg_freq=block_avg_freq,
+        )
+        if auto_freqs:
+            print(
+                "Selected prop_freq = {} and coord_freq = {} for a disk "
+                "budget of {} GB. Cassandra will write about {} of "
+                "output.".format(
+                    prop_freq,
+                    coord_freq,
+                    disk_budget,
+                    format_bytes(output["total"]),
+                )
+            )
+        if output["total"] > disk_budget * 1024**3:
+            largest = max(
+                [name for name in output if name != "total"],
+                key=lambda name: output[name],
+            )
+            warn(
+                "Cassandra will write about {} of output, more than the "
+                "disk budget of {} GB. The largest file is {}.{} ({}). "
+                'Increase coord_freq or prop_freq, or use "auto".'.format(
+                    format_bytes(output["total"]),
+                    disk_budget,
+                    run_name,
+                    largest,
+                    format_bytes(output[largest]),
+                )
+            )
+
+    inp_data += get_simulation_length_info(
+        units,
+        prop_freq,
+        coord_freq,
+        run_length,
+        steps_per_sweep,
+        block_avg_freq,
+    )
+
+    # Properties section
     inp_data += get_property_info(properties, nbr_boxes)
 
     # Empty fragment section unless restart
     fragment_files = None
     if "restart" in kwargs and kwargs["restart"]:
-        old_inp = kwargs["restart_name"] + ".inp"
-        fragment_files = []
-        start_fragment_section = False
-        with open(old_inp) as f:
-            for line in f:
-                if "# Fragment_Files" in line:
-                    start_fragment_section = True
-                    continue
-                if start_fragment_section:
-                    if "!--" in line:
-                        break
-                    fragment_files.append(line)
+        old_inp = CassandraInput.from_file(kwargs["restart_name"] + ".inp")
+        fragment_files = [
+            line + "\n" for line in old_inp["Fragment_Files"].data
+        ]
 
     inp_data += get_fragment_files(fragment_files)
 
@@ -1868,10 +2118,10 @@ def _get_possible_kwargs(desc=False):
         "verbose_log": "boolean, write verbose log file",
         "vdw_style": 'str, "lj" or "none"',
         "cutoff_style": 'str, "cut" or "cut_tail" or "cut_switch" or "cut_shift"',
-        "vdw_cutoff": 'unyt_array or unyt_quantity with `length` units, except for "cut_switch", where [inner_cutoff, outer_cutoff].',
+        "vdw_cutoff": 'unyt_array or unyt_quantity with `length` units, except for "cut_switch", where [inner_cutoff, outer_cutoff]. "auto" picks the cutoff of each box (12 Angstrom in the densest box)',
         "vdw_cutoff_box1": 'customize vdw cutoff for box 1. see "vdw_cutoff" for format',
         "vdw_cutoff_box2": 'customize vdw cutoff for box 2. see "vdw_cutoff" for format',
-        "charge_style": 'str, "none" or "cut" or "ewald" or "dsf"',
+        "charge_style": 'str, "none" or "cut" or "ewald" or "dsf" or "auto" (ewald with the cutoff of each box chosen to minimize the work, or "none" without charges)',
         "charge_cutoff": "unyt_array or unyt_quantity with `length` units",
         "charge_cutoff_box1": 'customize charge cutoff for box 1. see "charge_cutoff" for format',
         "charge_cutoff_box2": 'customize charge cutoff for box 2. see "charge_cutoff" for format',
@@ -1881,8 +2131,9 @@ def _get_possible_kwargs(desc=False):
         "custom_mixing_dict": "dict, one key-value pair per atomtype-pair, key=str of species comb, value=str of params",
         "seeds": "list of ints, [seed1,seed2], where each seed is an integer",
         "rcut_min": "unyt_array or unyt_quantity with `length` units, automatically reject move if atoms are closer than this distance",
-        "pair_energy": "boolean, store pair energies (faster but requires more memory)",
-        "max_molecules": "list of ints, maximum number of molecules for each species",
+        "pair_energy": 'boolean or "auto", store pair energies (faster but requires more memory). "auto" stores them if they fit in the memory budget',
+        "memory_budget": 'float, memory available to Cassandra in GB, used by pair_energy="auto" (default=4.0)',
+        "max_molecules": 'list of ints or "auto", maximum number of molecules for each species. "auto" (gcmc only) estimates it from the ideal gas loading at the chemical potentials',
         "pressure": "unyt_array or unyt_quantity with `pressure` units, desired pressure (npt and gemc-npt)",
         "pressure_box1": 'customize pressure for box 1. see "pressure" for format',
         "pressure_box2": 'customize pressure for box 2. see "pressure" for format',
@@ -1890,8 +2141,9 @@ def _get_possible_kwargs(desc=False):
         "thermal_stat_freq": "int, frequency of printing/updating non-volume moves",
         "vol_stat_freq": "int, frequency of printing/updating volume moves",
         "units": 'str, units for run/thermo/coord run_length/freqs. "minutes" or "steps" or "sweeps"',
-        "prop_freq": "int, frequency of writing thermo properties",
-        "coord_freq": "int, frequency of writing coordinates",
+        "prop_freq": 'int or "auto", frequency of writing thermo properties. "auto" writes them as often as fits in a tenth of the disk budget (at most 10000 times)',
+        "coord_freq": 'int or "auto", frequency of writing coordinates. "auto" writes them as often as fits in the disk budget (at most 1000 times)',
+        "disk_budget": 'float, disk space for the output files in GB. Used by prop_freq/coord_freq="auto" (default=1.0); otherwise warns if the output is estimated to be larger',
         "steps_per_sweep": "int, number of MC steps defined as a single sweep",
         "block_avg_freq": "int, block average size",
         "properties": (
@@ -1899,7 +2151,7 @@ def _get_possible_kwargs(desc=False):
             '"energy_total", "energy_lj", "energy_elec", "energy_intra", "enthalpy",'
             '"pressure", "volume", "nmols", "density", "mass_density"'
         ),
-        "angle_style": "list of str, angle style for each species",
+        "angle_style": "list of str, angle style for each species in the MCF files. Defaults to the angle_style of the System",
     }
     if desc:
         return valid_kwargs
@@ -1943,11 +2195,120 @@ def _check_restricted_insertions(box, restriction_type, restriction_value):
             )
 
 
+def _check_kwarg_names(kwargs):
+    """Check that all kwargs are valid input arguments"""
+    valid_args = _get_possible_kwargs()
+    for arg in kwargs:
+        if arg not in valid_args:
+            raise ValueError(
+                "Invalid input argument {}. "
+                "Allowable options include {}".format(arg, valid_args)
+            )
+
+
+def _split_run_args(kwargs):
+    """Separate run_type, run_length, and temperature from the kwargs"""
+    kwargs = dict(kwargs)
+    run_args = {}
+    for arg in ["run_type", "run_length", "temperature"]:
+        if arg in kwargs:
+            run_args[arg] = kwargs.pop(arg)
+    return kwargs, run_args
+
+
+def _get_box_matrices(system):
+    """Get the box matrix of each box in the system in nm"""
+    boxes = []
+    for ibox, box in enumerate(system.boxes):
+        if box.vectors is None:
+            raise ValueError(
+                "Box {} does not have box vectors. Set the box of "
+                "the mbuild.Compound before creating the "
+                "System".format(ibox + 1)
+            )
+        boxes.append(u.unyt_array(box.vectors, "nm"))
+    return boxes
+
+
+def _is_auto(value):
+    return isinstance(value, str) and value == "auto"
+
+
+def _check_cutoffs(boxes, cutoffs, name):
+    """Check that each cutoff fits in its box
+
+    With periodic boundaries, a cutoff must not exceed half of the
+    smallest perpendicular width of the box, the distance between its
+    closest pair of opposite faces. For orthogonal boxes this is half
+    the shortest box length.
+
+    Parameters
+    ----------
+    boxes : list
+        box matrix of each box as a unyt_array
+    cutoffs : list
+        cutoff of each box in Angstrom, [inner, outer] for switched
+        cutoffs, or None if the box has no cutoff
+    name : str
+        name of the cutoff for the error message
+    """
+    for ibox, (box, cutoff) in enumerate(zip(boxes, cutoffs)):
+        if cutoff is None:
+            continue
+        cutoff = np.max(cutoff)
+        max_cutoff = 0.5 * perpendicular_widths(box.to_value("angstrom")).min()
+        if cutoff > max_cutoff * (1.0 + 1.0e-8):
+            raise ValueError(
+                "The {} of box {} ({} Angstrom) is larger than half "
+                "of the smallest perpendicular width of the box ({:.4f} "
+                "Angstrom). Use a smaller cutoff or a larger "
+                "box.".format(name, ibox + 1, cutoff, max_cutoff)
+            )
+
+
+def _select_cutoffs(system, boxes, cutoff):
+    """Cutoff of each box for the same work per move in every box
+
+    The densest box uses ``cutoff``. Less dense boxes, e.g., the vapor
+    box in GEMC, get a longer cutoff with the same expected number of
+    atoms within it. Every cutoff is limited to half of the smallest
+    perpendicular width of its box.
+
+    Returns
+    -------
+    cutoffs : list
+        cutoff of each box in Angstrom
+    """
+    n_atoms = [len(top.atoms) for top in system.species_topologies]
+    max_cutoffs = []
+    densities = []
+    for ibox, box in enumerate(boxes):
+        box_matrix = box.to_value("angstrom")
+        max_cutoffs.append(0.5 * perpendicular_widths(box_matrix).min())
+        atoms = sum(
+            (system.mols_in_boxes[ibox][isp] + system.mols_to_add[ibox][isp])
+            * n_atoms[isp]
+            for isp in range(len(n_atoms))
+        )
+        densities.append(atoms / abs(np.linalg.det(box_matrix)))
+
+    reference = max(densities)
+    cutoffs = []
+    for max_cutoff, density in zip(max_cutoffs, densities):
+        if density > 0.0:
+            box_cutoff = cutoff * (reference / density) ** (1.0 / 3.0)
+        else:
+            box_cutoff = max_cutoff
+        cutoffs.append(round(min(box_cutoff, max_cutoff), 2))
+    return cutoffs
+
+
 def _check_kwarg_units(kwargs):
     """Check the units of kwargs"""
-    _check_kwarg_units_helper(
-        kwargs, "vdw_cutoff", dimensions.length, list_length=2
-    )
+    if not _is_auto(kwargs.get("vdw_cutoff")):
+        _check_kwarg_units_helper(
+            kwargs, "vdw_cutoff", dimensions.length, list_length=2
+        )
     _check_kwarg_units_helper(
         kwargs, "vdw_cutoff_box1", dimensions.length, list_length=2
     )
@@ -1996,7 +2357,8 @@ def _check_kwarg_units_helper(kwargs, kwarg_name, dimension, list_length=0):
 
 def _convert_kwarg_units(kwargs):
     """Convert kwargs that are unyt units"""
-    _convert_kwarg_units_helper(kwargs, "vdw_cutoff", "angstrom")
+    if not _is_auto(kwargs.get("vdw_cutoff")):
+        _convert_kwarg_units_helper(kwargs, "vdw_cutoff", "angstrom")
     _convert_kwarg_units_helper(kwargs, "vdw_cutoff_box1", "angstrom")
     _convert_kwarg_units_helper(kwargs, "vdw_cutoff_box2", "angstrom")
     _convert_kwarg_units_helper(kwargs, "charge_cutoff", "angstrom")
@@ -2045,10 +2407,7 @@ def _convert_moveset_units(moveset):
             new_restricted_value.append(new_boxvals)
     moveset._restricted_value = new_restricted_value
 
-    moveset.max_translate = moveset.max_translate.to("angstrom")
-    moveset.max_rotate = moveset.max_rotate.to("degree")
-    moveset.max_dihedral = moveset.max_dihedral.to("degree")
-    moveset.max_volume = moveset.max_volume.to("angstrom**3")
-    moveset.cbmc_rcut = moveset.cbmc_rcut.to("angstrom")
+    # The MoveSet setters already store the move sizes and CBMC
+    # cutoffs in the units of the input file
 
     return moveset
@@ -0,0 +1,281 @@
+from pathlib import Path
+
+
+class InputSection(object):
+    def __init__(self, header, lines=None):
+        """A single section of a Cassandra input file
+
+        A section begins with a header line such as ``# Start_Type``
+        or ``# Property_Info 1`` and extends until the next header.
+        The raw lines of the section (including blank lines and
+        ``!`` comment/separator lines) are kept so that the section
+        can be written back out unchanged. The ``data`` property
+        exposes only the lines that Cassandra actually reads.
+
+        Parameters
+        ----------
+        header : str
+            the header line, with or without the leading ``#``
+        lines : list, optional
+            the lines following the header, one string per line
+        """
+        tokens = header.lstrip("#").split()
+        if len(tokens) == 0:
+            raise ValueError("Section header cannot be empty")
+        self.name = tokens[0]
+        self.args = tokens[1:]
+        if lines is None:
+            lines = []
+        self.lines = [line.strip() for line in lines]
+
+    @property
+    def key(self):
+        """Key used to look the section up in a CassandraInput"""
+        return " ".join([self.name] + self.args)
+
+    @property
+    def data(self):
+        """The non-blank, non-comment lines of the section"""
+        return [line for line in self.lines if _is_data(line)]
+
+    @data.setter
+    def data(self, data):
+        if isinstance(data, str):
+            data = [data]
+        data = [str(line).strip() for line in data]
+        data_idxs = [
+            idx for idx, line in enumerate(self.lines) if _is_data(line)
+        ]
+        # Overwrite existing data lines in place so that the layout
+        # of the section is preserved. Leftover data lines are blanked
+        # and any additional lines follow the last data line.
+        for idx, line_idx in enumerate(data_idxs):
+            if idx < len(data):
+                self.lines[line_idx] = data[idx]
+            else:
+                self.lines[line_idx] = ""
+        if len(data) > len(data_idxs):
+            if len(data_idxs) > 0:
+                insert_idx = data_idxs[-1] + 1
+            else:
+                insert_idx = 0
+            self.lines[insert_idx:insert_idx] = data[len(data_idxs) :]
+
+    def get_keyword(self, keyword):
+        """Return the value(s) following ``keyword`` in the section
+
+        Intended for sections such as ``Simulation_Length_Info`` or
+        ``CBMC_Info`` where each line has the form ``keyword value``.
+
+        Parameters
+        ----------
+        keyword : str
+            the first token of the line to look for
+
+        Returns
+        -------
+        str
+            the remainder of the line after the keyword
+        """
+        for line in self.data:
+            tokens = line.split(maxsplit=1)
+            if tokens[0] == keyword:
+                if len(tokens) == 1:
+                    return ""
+                return tokens[1]
+        raise KeyError(
+            "Keyword {} not found in section {}".format(keyword, self.key)
+        )
+
+    def set_keyword(self, keyword, value):
+        """Set the value(s) following ``keyword`` in the section
+
+        If ``keyword`` is not yet present it is appended after the
+        last data line of the section.
+
+        Parameters
+        ----------
+        keyword : str
+            the first token of the line to edit
+        value : str, int, float or list
+            new value; lists are joined with spaces
+        """
+        if isinstance(value, (list, tuple)):
+            value = " ".join([str(v) for v in value])
+        new_line = "{} {}".format(keyword, value)
+        for idx, line in enumerate(self.lines):
+            if _is_data(line) and line.split()[0] == keyword:
+                self.lines[idx] = new_line
+                return
+        self.data = self.data + [new_line]
+
+    def to_string(self):
+        """Return the section as it appears in the input file"""
+        contents = "# " + self.key + "\n"
+        for line in self.lines:
+            contents += line + "\n"
+        return contents
+
+
+class CassandraInput(object):
+    def __init__(self, sections=None, preamble=None, footer=None):
+        """A structured representation of a Cassandra input file
+
+        The input file is stored as an ordered collection of
+        ``InputSection`` objects keyed by their header (e.g.,
+        ``"Start_Type"`` or ``"Property_Info 1"``). Sections can be
+        inspected and edited and the file written back out with
+        ``write``. Lines that are not part of a section (the leading
+        comment and the trailing ``END``) are kept verbatim.
+
+        Parameters
+        ----------
+        sections : list, optional
+            list of InputSection objects, in file order
+        preamble : list, optional
+            lines before the first section header
+        footer : list, optional
+            lines from the ``END`` statement onwards
+
+        Returns
+        -------
+        CassandraInput
+        """
+        if sections is None:
+            sections = []
+        if preamble is None:
+            preamble = []
+        if footer is None:
+            footer = []
+        self._sections = {}
+        for section in sections:
+            self.add_section(section)
+        self.preamble = [line.strip() for line in preamble]
+        self.footer = [line.strip() for line in footer]
+
+    @classmethod
+    def from_string(cls, inp_data):
+        """Parse the contents of a Cassandra input file
+
+        Parameters
+        ----------
+        inp_data : str
+            contents of the input file
+
+        Returns
+        -------
+        CassandraInput
+        """
+        preamble = []
+        footer = []
+        sections = []
+        current = None
+        for line in inp_data.splitlines():
+            stripped = line.strip()
+            if footer or stripped.upper() == "END":
+                footer.append(stripped)
+            elif stripped.startswith("#"):
+                current = InputSection(stripped)
+                sections.append(current)
+            elif current is None:
+                preamble.append(stripped)
+            else:
+                current.lines.append(stripped)
+
+        return cls(sections, preamble=preamble, footer=footer)
+
+    @classmethod
+    def from_file(cls, filename):
+        """Read and parse a Cassandra input file
+
+        Parameters
+        ----------
+        filename : str or pathlib.Path
+            path to the .inp file
+
+        Returns
+        -------
+        CassandraInput
+        """
+        if not Path(filename).is_file():
+            raise FileNotFoundError(f"Input file {filename} does not exist.")
+        with open(filename) as f:
+            return cls.from_string(f.read())
+
+    @property
+    def sections(self):
+        """List of section keys in file order"""
+        return list(self._sections.keys())
+
+    def add_section(self, section, after=None):
+        """Add a section to the input file
+
+        Parameters
+        ----------
+        section : InputSection
+            the section to add
+        after : str, optional
+            key of the section after which the new section is
+            placed. By default the section is appended.
+        """
+        if not isinstance(section, InputSection):
+            raise TypeError("section must be an InputSection")
+        if section.key in self._sections:
+            raise ValueError(
+                "Section {} already exists in the input file".format(
+                    section.key
+                )
+            )
+        if after is None:
+            self._sections[section.key] = section
+            return
+        if after not in self._sections:
+            raise KeyError("Section {} not found".format(after))
+        new_sections = {}
+        for key, existing in self._sections.items():
+            new_sections[key] = existing
+            if key == after:
+                new_sections[section.key] = section
+        self._sections = new_sections
+
+    def remove_section(self, key):
+        """Remove the section ``key`` from the input file"""
+        if key not in self._sections:
+            raise KeyError("Section {} not found".format(key))
+        del self._sections[key]
+
+    def __contains__(self, key):
+        return key in self._sections
+
+    def __getitem__(self, key):
+        if key not in self._sections:
+            raise KeyError(
+                "Section {} not found. Available sections: {}".format(
+                    key, self.sections
+                )
+            )
+        return self._sections[key]
+
+    def __setitem__(self, key, data):
+        """Replace the data lines of an existing section"""
+        self[key].data = data
+
+    def to_string(self):
+        """Return the contents of the input file as a string"""
+        contents = ""
+        for line in self.preamble:
+            contents += line + "\n"
+        for section in self._sections.values():
+            contents += section.to_string()
+        for line in self.footer:
+            contents += line + "\n"
+        return contents
+
+    def write(self, filename):
+        """Write the input file to ``filename``"""
+        with open(filename, "w") as f:
+            f.write(self.to_string())
+
+
+def _is_data(line):
+    return len(line) > 0 and not line.startswith("!")
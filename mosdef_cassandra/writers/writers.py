@@ -1,24 +1,31 @@
 import parmed
-import mbuild
 import gmso
 from gmso.formats.mcf import write_mcf as gmso_write_mcf
 from mbuild.formats.cassandramcf import write_mcf
-from pathlib import Path
 from warnings import warn
 
 from mosdef_cassandra import System, MoveSet
+from mosdef_cassandra.core.box import BoxSnapshot
 from mosdef_cassandra.writers.inp_functions import generate_input
+from mosdef_cassandra.writers.inp_functions import generate_inputs
+from mosdef_cassandra.writers.inp_parser import CassandraInput
 
 
-def write_mcfs(system, angle_style="harmonic"):
+def write_mcfs(system, angle_style=None):
     """Write a MCF file for a given mosdef_cassandra.System
     Parameters
     ----------
     system : mosdef_cassandra.System
         System to simulate in Cassandra
-    angle_style : str, default="harmonic"
-        Angle style for the system, valid arguments: "harmonic", "fixed"
+    angle_style : str or list, default=None
+        Angle style for the system, valid arguments: "harmonic", "fixed".
+        Defaults to the angle_style of the System.
     """
+    if not isinstance(system, System):
+        raise TypeError('"system" must be of type ' "mosdef_cassandra.System")
+
+    if angle_style is None:
+        angle_style = system.angle_style
     if type(angle_style) == str:
         angle_style = [angle_style] * len(system.species_topologies)
 
@@ -28,8 +35,13 @@ def write_mcfs(system, angle_style="harmonic"):
                 'Invalid "angle_style" {} given.'.format(angle_style)
             )
 
-    if not isinstance(system, System):
-        raise TypeError('"system" must be of type ' "mosdef_cassandra.System")
+    if list(angle_style) != system.angle_style:
+        warn(
+            'The "angle_style" {} differs from the angle_style {} of '
+            "the System, which is used to fix the bonds of each "
+            'species. Pass "angle_style" to mosdef_cassandra.System '
+            "instead.".format(angle_style, system.angle_style)
+        )
 
     for species_count, species in enumerate(system.species_topologies):
         if not isinstance(species, parmed.Structure):
@@ -75,20 +87,17 @@ def write_configs(system):
         raise TypeError('"system" must be of type ' "mosdef_cassandra.System")
 
     for box_count, box in enumerate(system.boxes):
-        if not isinstance(box, mbuild.Compound) and not isinstance(
-            box, mbuild.Box
-        ):
+        if not isinstance(box, BoxSnapshot):
             raise TypeError(
                 'Your "system" object appears to have '
-                "been corrupted. Box {} is not a mbuild"
-                ".Compound or mbuild.Box object".format(box)
+                "been corrupted. Box {} is not a "
+                "BoxSnapshot object".format(box)
             )
 
         # Only save if box has particles inside
-        # This only occurs if box is an mbuild.Compound
-        if isinstance(box, mbuild.Compound):
+        if box.occupied:
             xyz_name = "box{}.in.xyz".format(box_count + 1)
-            box.save(xyz_name, overwrite=True)
+            box.save(xyz_name)
 
 
 def write_input(system, moveset, run_type, run_length, temperature, **kwargs):
@@ -113,6 +122,38 @@ def write_input(system, moveset, run_type, run_length, temperature, **kwargs):
     return inp_name
 
 
+def write_inputs(system, moveset, base_kwargs, variations):
+    """Write one input file per variation of a parameter sweep
+
+    Every input file is generated and the file names are checked
+    before any file is written, so an invalid sweep leaves nothing on
+    disk. See ``mosdef_cassandra.writers.inp_functions.generate_inputs``
+    for a description of the arguments.
+
+    Returns
+    -------
+    inp_names : list
+        names of the input files that were written
+    """
+    inputs = generate_inputs(system, moveset, base_kwargs, variations)
+
+    inp_names = []
+    for run_name, inp_data in inputs:
+        inp_name = run_name + ".inp"
+        if inp_name in inp_names:
+            raise ValueError(
+                "Multiple variations write to {}. Please specify a "
+                "unique run_name for each variation".format(inp_name)
+            )
+        inp_names.append(inp_name)
+
+    for inp_name, (run_name, inp_data) in zip(inp_names, inputs):
+        with open(inp_name, "w") as inp:
+            inp.write(inp_data)
+
+    return inp_names
+
+
 def write_restart_input(restart_from, run_name, run_type, run_length):
     """Write an input file for a restart run"""
     input_contents = _generate_restart_inp(
@@ -126,60 +167,35 @@ def _generate_restart_inp(restart_from, run_name, run_type, run_length):
     """Create the input file for a restart"""
     # Extract contents of old input file
     old_inpfile_name = restart_from + ".inp"
-    if not Path(old_inpfile_name).is_file():
-        raise FileNotFoundError(
-            f"Input file {old_inpfile_name} does not exist."
-        )
-
-    inp_contents = []
-    with open(old_inpfile_name) as f:
-        for line in f:
-            inp_contents.append(line.strip())
+    inp = CassandraInput.from_file(old_inpfile_name)
 
     # Edit sections run_name, run_type, run_length
-    for idx, line in enumerate(inp_contents):
-        if "# Run_Name" in line:
-            inp_contents[idx + 1] = run_name + ".out"
-        if "# Start_Type" in line:
-            inp_contents[idx + 1] = "checkpoint " + restart_from + ".out.chk"
-            i = idx + 2
-            while i < len(inp_contents) and not inp_contents[
-                i
-            ].strip().startswith("#"):
-                if not inp_contents[i].strip().startswith("!"):
-                    inp_contents[i] = (
-                        ""  # Replace non-comment lines with an empty string
-                    )
-                i += 1
-        if run_type is not None:
-            if "# Run_Type" in line:
-                old_contents = inp_contents[idx + 1].split()
-                inp_contents[idx + 1] = (
-                    run_type + " " + " ".join(old_contents[1:])
-                )
-        if run_length is not None:
-            if "# Simulation_Length_Info" in line:
-                # Verify new run length is >= original
-                if run_length < int(inp_contents[idx + 4].split()[1]):
-                    raise ValueError(
-                        "Total run length on restart cannot be less than "
-                        "the original run length. Please see the mc.restart "
-                        "documentation for more details."
-                    )
-                if run_length == int(inp_contents[idx + 4].split()[1]):
-                    warn(
-                        "Total run length on restart is equal to the "
-                        "original run length. This will not extend your "
-                        " simulation. Please see the mc.restart "
-                        "documentation for more details."
-                    )
-                inp_contents[idx + 4] = "run " + str(run_length)
-
-    new_inp_contents = ""
-    for line in inp_contents:
-        new_inp_contents += line + "\n"
-
-    return new_inp_contents
+    inp["Run_Name"] = run_name + ".out"
+    # A single checkpoint line replaces the start type of every box
+    inp["Start_Type"] = "checkpoint " + restart_from + ".out.chk"
+    if run_type is not None:
+        old_contents = inp["Run_Type"].data[0].split()
+        inp["Run_Type"] = run_type + " " + " ".join(old_contents[1:])
+    if run_length is not None:
+        length_info = inp["Simulation_Length_Info"]
+        old_run_length = int(length_info.get_keyword("run"))
+        # Verify new run length is >= original
+        if run_length < old_run_length:
+            raise ValueError(
+                "Total run length on restart cannot be less than "
+                "the original run length. Please see the mc.restart "
+                "documentation for more details."
+            )
+        if run_length == old_run_length:
+            warn(
+                "Total run length on restart is equal to the "
+                "original run length. This will not extend your "
+                " simulation. Please see the mc.restart "
+                "documentation for more details."
+            )
+        length_info.set_keyword("run", run_length)
+
+    return inp.to_string()
 
 
 def print_inputfile(
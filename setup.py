@@ -16,6 +16,16 @@ requirements = [
     "mbuild >=0.10.8",
 ]
 
+# Optional dependencies of mosdef_cassandra.analysis. The analysis
+# tools themselves only need NumPy; see the installation docs for a
+# slim install without the simulation dependencies.
+extras_require = {
+    "analysis": [
+        "unyt >=2.4",
+        "pandas >=1.0",
+    ],
+}
+
 setup(
     name="mosdef_cassandra",
     version=__version__,
@@ -25,6 +35,7 @@ setup(
     author_email="rdefever@nd.edu",
     url="https://github.com/MaginnGroup/mosdef_cassandra",
     install_requires=requirements,
-    python_requires=">=3.6, <4",
+    extras_require=extras_require,
+    python_requires=">=3.7, <4",
     include_package_data=True,
 )